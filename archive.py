@@ -0,0 +1,192 @@
+import sys
+import json
+import zlib
+import sqlite3
+import argparse
+
+from issues import json_default, issue_from_json
+from scoring import RESULT_CATEGORIES
+
+DEFAULT_PATH = 'reports.sqlite3'
+COMPRESSION_LEVEL = 6
+
+# One row per page: the small summary the site report lists, kept apart
+# from the compressed report_data so listing pages never inflates a blob.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    summary TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+def default_dictionary():
+    """Preset zlib dictionary: the keys and category names every report_data repeats.
+
+    Each page is compressed on its own, so without it every blob would pay
+    again for the same few hundred bytes of structure. The dictionary an
+    archive was created with is stored in it.
+    """
+    skeleton = {
+        'title': '', 'url': 'https://', 'author_name': 'NOVAMKR, LLC', 'score': 100,
+        'deductions': {}, 'notes': {}, 'profile': None, 'resources': None, 'images': None,
+        'incomplete': [], 'skipped': [], 'skip_reason': None,
+        'issues_data': {cat: {'issues': [{'issue': '', 'count': 1, 'locations': [[1, 0]]}]}
+                        for cat, _ in RESULT_CATEGORIES},
+    }
+    return json.dumps(skeleton, separators=(',', ':')).encode('utf-8')
+
+def _restore(data):
+    """report_data as generate_report expects it, from its JSON form."""
+    data['issues_data'] = {cat: {'issues': [issue_from_json(i) for i in entry['issues']]}
+                           for cat, entry in data['issues_data'].items()}
+    for key in ('resources', 'images'):
+        if data.get(key):
+            data[key]['issues'] = [issue_from_json(i) for i in data[key]['issues']]
+    return data
+
+class ArchivedPages:
+    """The archive's page summaries as a sized iterable, read from SQLite as they are iterated."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def __iter__(self):
+        for (summary,) in self.db.execute('SELECT summary FROM pages ORDER BY id'):
+            yield json.loads(summary)
+
+class ReportArchive:
+    """Every page of a batch in one SQLite file, instead of one HTML report per page.
+
+    Each page's report_data is stored as a zlib blob (compressed against a
+    preset dictionary) under its report name, with its site-report
+    summary alongside. A page's report is rendered on demand by one
+    indexed lookup; the site report streams the summaries without touching
+    the blobs.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'zdict'").fetchone()
+        if row is None:
+            self.zdict = default_dictionary()
+            with self.db:
+                self.db.execute("INSERT INTO meta VALUES ('zdict', ?)", (self.zdict,))
+        else:
+            self.zdict = bytes(row[0])
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _compress(self, obj):
+        c = zlib.compressobj(COMPRESSION_LEVEL, zdict=self.zdict)
+        raw = json.dumps(obj, default=json_default, separators=(',', ':')).encode('utf-8')
+        return c.compress(raw) + c.flush()
+
+    def _decompress(self, blob):
+        d = zlib.decompressobj(zdict=self.zdict)
+        return json.loads(d.decompress(blob) + d.flush())
+
+    def clear(self):
+        """Drop every stored page and the site findings, so a new batch starts empty."""
+        with self.db:
+            self.db.execute('DELETE FROM pages')
+            self.db.execute("DELETE FROM meta WHERE key = 'site'")
+
+    def add(self, name, report_data, summary):
+        """Store (or replace) one page's report_data under its report name."""
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO pages (name, summary, data) VALUES (?, ?, ?)',
+                            (name, json.dumps(summary, default=json_default),
+                             self._compress(report_data)))
+
+    def set_site(self, site_data):
+        """Store the site-wide findings (everything in site_data but the page list)."""
+        rest = {k: v for k, v in site_data.items() if k != 'pages'}
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('site', ?)", (self._compress(rest),))
+
+    def pages(self):
+        return ArchivedPages(self.db)
+
+    def report_data(self, name):
+        """One page's report_data, ready for generate_report; KeyError if it is not archived."""
+        row = self.db.execute('SELECT data FROM pages WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return _restore(self._decompress(row[0]))
+
+    def site_data(self):
+        """site_data for generate_site_report, its pages streamed from the archive."""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'site'").fetchone()
+        site = self._decompress(row[0]) if row else {}
+        if 'average_score' not in site:
+            avg = self.db.execute("SELECT AVG(json_extract(summary, '$.score')) FROM pages").fetchone()[0]
+            site['average_score'] = avg or 0.0
+        site['pages'] = self.pages()
+        return site
+
+    def render(self, name, filename):
+        from report import generate_report
+        generate_report(filename, self.report_data(name), generate_pdf=False)
+
+    def extract_command(self, name):
+        return f"python archive.py {self.path} extract {name}"
+
+    def render_site(self, filename):
+        """Write the site report; each page names the command that extracts its report."""
+        from report import generate_site_report
+        generate_site_report(filename, self.site_data(), lambda page: (
+            f"{page['title']}<br><code>{self.extract_command(page['report'])}</code>"))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Read reports from a batch report archive.")
+    parser.add_argument('archive', help="Archive written by batch.py --archive.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="Every archived page with its score.")
+    p = sub.add_parser('extract', help="Write one page's HTML report (e.g. to open it in reviewer.py).")
+    p.add_argument('name', help="Report name, as listed by 'list'.")
+    p.add_argument('-o', '--output', help="Output file (default: the report name).")
+    p = sub.add_parser('site', help="Write the site report.")
+    p.add_argument('-o', '--output', default='site_report.html')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with ReportArchive(args.archive) as archive:
+        if args.command == 'list':
+            for page in archive.pages():
+                print(f"{page['score']:>3}/100  {page['report']}  {page['file']}")
+        elif args.command == 'extract':
+            try:
+                archive.render(args.name, args.output or args.name)
+            except KeyError:
+                print(f"No page named {args.name} in {args.archive}")
+                return 1
+            print(f"Report: {args.output or args.name}")
+        elif args.command == 'site':
+            archive.render_site(args.output)
+            print(f"Site report: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import argparse
+
+from issues import json_default, fingerprint, finding_count, issue_from_json, issue_text, issue_count
+
+def _from_report_data(data):
+    """Normalize a report_data-like dict whose issues came from JSON or a parsed report."""
+    data = dict(data)
+    data['issues_data'] = {cat: {'issues': [issue_from_json(i) for i in entry['issues']]}
+                           for cat, entry in data['issues_data'].items()}
+    return data
+
+def load_audit(path, run_profile='full'):
+    """report_data for one side of a diff.
+
+    path is a result set saved as JSON (service.py / build_report_data
+    output), an HTML report written by this tool, or a captured page, which
+    is analyzed with the given run profile.
+    """
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return _from_report_data(json.load(f))
+    from reviewer import parse_report
+    parsed = parse_report(path)
+    if parsed:
+        return _from_report_data(parsed)
+    import website_checker as wc
+    import profiler
+    soup, html = wc.load_html_file(path)
+    results = wc.run_checks(soup, html, profiler.Profiler(), run_profile=run_profile)
+    return wc.build_report_data(soup, results)
+
+def index_issues(issues_data):
+    """{fingerprint: (category, issue)} for every distinct finding in issues_data."""
+    found = {}
+    for category, entry in issues_data.items():
+        for issue in entry['issues']:
+            found.setdefault(fingerprint(category, issue_text(issue)), (category, issue))
+    return found
+
+def _by_category(index, keys):
+    grouped = {}
+    for key in keys:
+        category, issue = index[key]
+        grouped.setdefault(category, []).append(issue)
+    return grouped
+
+def diff_audits(old, new):
+    """Findings added, removed and unchanged between two report_data dicts.
+
+    Findings are matched by fingerprint with set operations on the two
+    indexes, so the cost is linear in the number of findings. Returns
+    {'old_score', 'new_score', 'score_change', 'added': {category: [issue]},
+    'removed': {category: [issue]}, 'unchanged'}.
+    """
+    before, after = index_issues(old['issues_data']), index_issues(new['issues_data'])
+    added = after.keys() - before.keys()
+    removed = before.keys() - after.keys()
+    return {
+        'old_score': old['score'],
+        'new_score': new['score'],
+        'score_change': new['score'] - old['score'],
+        'added': _by_category(after, added),
+        'removed': _by_category(before, removed),
+        'unchanged': len(after) - len(added),
+    }
+
+def delta_report_data(new, diff):
+    """new's report_data cut down to the added findings, with a 'delta' summary of the rest."""
+    data = dict(new)
+    data['issues_data'] = {cat: {'issues': diff['added'].get(cat, [])} for cat in new['issues_data']}
+    data['delta'] = {
+        'old_score': diff['old_score'],
+        'new_score': diff['new_score'],
+        'added': finding_count(data['issues_data']),
+        'unchanged': diff['unchanged'],
+        'removed': [(cat, issue_text(issue))
+                    for cat, issues in sorted(diff['removed'].items()) for issue in issues],
+    }
+    # Only the added findings are listed, so per-section timings and tables would mislead
+    for key in ('profile', 'resources', 'images'):
+        data[key] = None
+    return data
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two audits and write a report of what changed.")
+    parser.add_argument('old', help="Earlier audit: results JSON, HTML report or captured page.")
+    parser.add_argument('new', help="Later audit, in any of the same forms.")
+    parser.add_argument('-o', '--output', help="Delta report file (default: <new>_delta.html).")
+    parser.add_argument('--json', action='store_true', help="Print the diff as JSON instead of writing a report.")
+    parser.add_argument('--run-profile', default='full', choices=('full', 'offline', 'fast'),
+                        help="Profile used when a side is a captured page (default: full).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    old = load_audit(args.old, args.run_profile)
+    new = load_audit(args.new, args.run_profile)
+    diff = diff_audits(old, new)
+    if args.json:
+        print(json.dumps(diff, default=json_default, indent=2))
+        return 0
+    from report import generate_report
+    data = delta_report_data(new, diff)
+    delta = data['delta']
+    filename = args.output or os.path.splitext(args.new)[0] + '_delta.html'
+    generate_report(filename, data, generate_pdf=False)
+    print(f"Score: {delta['old_score']:g} -> {delta['new_score']:g} ({diff['score_change']:+g}); "
+          f"{delta['added']} added, {len(delta['removed'])} removed, {delta['unchanged']} unchanged")
+    for cat, issues in sorted(diff['added'].items()):
+        for issue in issues:
+            count = issue_count(issue)
+            print(f"  + [{cat}] {issue_text(issue)}" + (f" (x{count})" if count > 1 else ''))
+    for cat, text in delta['removed']:
+        print(f"  - [{cat}] {text}")
+    print(f"Delta report: {filename}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
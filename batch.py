@@ -0,0 +1,279 @@
+import os
+import sys
+import argparse
+import itertools
+
+import profiler
+import website_checker as wc
+from dom_index import get_index
+from issues import issue_count
+from link_graph import SiteLinks
+from near_dup import NearDuplicates, page_shingles, signature
+from report import generate_report, generate_site_report
+from unused_css import SiteUsage
+
+PAGE_EXTENSIONS = ('.html', '.htm', '.txt')
+SITE_REPORT = 'site_report.html'
+# Checks that go to the network; with dedupe_network only cluster representatives run them
+NETWORK_CHECKS = tuple(key for key, _, _, kind in wc.CHECKS if kind == 'network')
+
+def iter_pages(sources):
+    """Page files from a mix of file and directory paths; directories are not recursed."""
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                path = os.path.join(source, name)
+                if os.path.isfile(path) and name.lower().endswith(PAGE_EXTENSIONS):
+                    yield path
+        else:
+            yield source
+
+def sitemap_pages(reader):
+    """(url, html, url) for every page from a sitemap.SitemapReader that could be fetched.
+
+    Pages are fetched a few ahead of the one being analyzed.
+    """
+    from sitemap import prefetch
+    for url, _, status, html in prefetch(reader):
+        if html is None:
+            print(f"  --/100  {url} not fetched ({status})")
+            continue
+        yield url, html, url
+
+class BatchRun:
+    """Analyze pages one at a time and fold each into site-wide aggregates.
+
+    Every page gets its own report in out_dir; only small per-page summaries
+    (the DOM features needed for site-wide unused CSS and a MinHash
+    signature for near-duplicate clustering, fragment targets and same-site
+    links for the offline link graph) outlive the page.
+    dedupe_network=True skips the network checks on pages that are near
+    duplicates of an earlier page; they are marked not run in the report.
+    history (a history.History) records every page's audit and metrics (a
+    metrics.Metrics) its score and finding counts. With archive (an
+    archive.ReportArchive) page reports are stored there instead of being
+    written as HTML files.
+    """
+
+    def __init__(self, out_dir='.', budget=None, check_timeout=None, deadlines=None,
+                 dedupe_network=False, history=None, metrics=None, archive=None):
+        self.out_dir = out_dir
+        self.budget = budget
+        self.check_timeout = check_timeout
+        self.deadlines = deadlines
+        self.dedupe_network = dedupe_network
+        self.history = history
+        self.metrics = metrics
+        self.archive = archive
+        self.pages = []
+        self.css = SiteUsage()
+        self.duplicates = NearDuplicates()
+        self.links = SiteLinks()
+        self._filenames = set()
+
+    def _report_path(self, soup):
+        base, ext = os.path.splitext(wc.generate_report_filename(soup))
+        name, n = base + ext, 1
+        while name in self._filenames:
+            n += 1
+            name = f"{base}_{n}{ext}"
+        self._filenames.add(name)
+        return os.path.join(self.out_dir, name)
+
+    def analyze_page(self, path, html_content=None, url=None):
+        """Analyze the page in path, or html_content fetched from url (path then names the page)."""
+        prof = profiler.Profiler()
+        prof.start()
+        try:
+            with prof.section('parse'):
+                if html_content is None:
+                    soup, html_content = wc.load_html_file(path)
+                else:
+                    soup = wc.parse_html(html_content)
+            with prof.section('near_duplicates'):
+                duplicate_of = self.duplicates.add(len(self.pages),
+                                                   signature(page_shingles(get_index(soup))))
+            with prof.section('link_graph'):
+                self.links.add_page(soup, path, url)
+            only = None
+            if duplicate_of is not None and self.dedupe_network:
+                only = [key for key, _, _, _ in wc.CHECKS if key not in NETWORK_CHECKS]
+            results = wc.run_checks(soup, html_content, prof, self.budget, self.check_timeout,
+                                    self.deadlines, only=only, options={'site_links': self.links})
+        finally:
+            prof.stop()
+        report_path = self._report_path(soup)
+        original = self.pages[duplicate_of]['file'] if duplicate_of is not None else None
+        if only is not None:
+            # run_checks gave the left-out network checks empty results; say why
+            results['skip_reason'] = (f"Network checks were not run on this near-duplicate of "
+                                      f"{original}")
+        report_data = wc.build_report_data(soup, results)
+        if url and not report_data['url'].startswith('https://'):
+            # The page does not say where it lives, but the sitemap did
+            report_data['url'] = url
+        if self.archive is None:
+            generate_report(report_path, report_data)
+        if self.history is not None:
+            self.history.record(report_data, prof.summary())
+        if self.metrics is not None:
+            self.metrics.observe_audit(report_data)
+
+        linked = [(source, css) for source, tag, css in wc.collect_stylesheet_sources(soup)
+                  if tag.name == 'link']
+        self.css.add_page(get_index(soup).features, linked)
+        page = {
+            'file': path,
+            'title': report_data['title'],
+            'url': report_data['url'],
+            'score': report_data['score'],
+            'issues': sum(issue_count(i) for cat in report_data['issues_data'].values()
+                          for i in cat['issues']),
+            'report': os.path.relpath(report_path, self.out_dir),
+            'incomplete': report_data['incomplete'],
+            'duplicate_of': original,
+        }
+        if self.archive is not None:
+            self.archive.add(page['report'], report_data, page)
+        self.pages.append(page)
+        return page
+
+    def summary(self):
+        scores = [p['score'] for p in self.pages]
+        by_file = {p['file']: p for p in self.pages}
+        internal = self.links.verify()
+        for link in internal['broken']:
+            link['page'] = by_file[link.pop('file')]
+            link['target'] = by_file.get(link['target'])
+        return {
+            'pages': self.pages,
+            'average_score': sum(scores) / len(scores) if scores else 0.0,
+            'unused_css': self.css.summary(),
+            'duplicates': [{'representative': self.pages[c['representative']],
+                            'pages': [self.pages[k] for k in c['members']],
+                            'similarity': c['similarity']}
+                           for c in self.duplicates.clusters()],
+            'internal_links': internal,
+        }
+
+def analyze_batch(sources, out_dir='.', budget=None, check_timeout=None, deadlines=None,
+                  dedupe_network=False, history=None, metrics=None, sitemaps=None, since=None,
+                  archive=None):
+    """Analyze every page in sources, write per-page reports and the site report.
+
+    history is the path of a history database to record every page's audit
+    in; metrics the path of a Prometheus textfile to write the batch's
+    metrics to once it is done. sitemaps (paths or URLs of sitemaps or
+    sitemap indexes) add the pages they list, fetched as they are reached;
+    pages whose lastmod is before since (epoch seconds), or not after
+    their latest audit in history, are left out. archive is the path of a
+    report archive (see archive.py) to store page reports in instead of
+    HTML files.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    store = None
+    if history:
+        from history import History
+        store = History(history)
+    collector = None
+    if metrics:
+        from metrics import Metrics
+        collector = Metrics().install()
+    reports = None
+    if archive:
+        from archive import ReportArchive
+        reports = ReportArchive(archive)
+        reports.clear()
+    run = BatchRun(out_dir, budget, check_timeout, deadlines, dedupe_network, store, collector,
+                   reports)
+    pages = ((path, None, None) for path in iter_pages(sources))
+    reader = None
+    if sitemaps:
+        from sitemap import SitemapReader, lastmod_skipper
+        reader = SitemapReader(sitemaps, lastmod_skipper(since, store))
+        pages = itertools.chain(pages, sitemap_pages(reader))
+    try:
+        for path, html_content, url in pages:
+            page = run.analyze_page(path, html_content, url)
+            similar = f"  (near duplicate of {page['duplicate_of']})" if page['duplicate_of'] else ''
+            print(f"{page['score']:>3}/100  {path} -> {page['report']}{similar}")
+    finally:
+        if store is not None:
+            store.close()
+        if collector is not None:
+            collector.uninstall()
+    if reader is not None:
+        skipped = ''.join(f", {reader.skipped_by[reason]} {text}" for reason, text in
+                          (('since', 'older than --since'), ('unchanged', 'unchanged since last audit'))
+                          if reason in reader.skipped_by)
+        print(f"Sitemaps: {reader.sitemaps} read, {reader.urls} page(s) queued, "
+              f"{reader.duplicates} duplicate(s){skipped}, {reader.rejected} rejected")
+        for source, error in reader.errors:
+            print(f"  {source}: {error}")
+    site_data = run.summary()
+    site_report = os.path.join(out_dir, SITE_REPORT)
+    if reports is not None:
+        # There are no page HTML files to link to: the site report names
+        # the extract command of each page instead
+        reports.set_site(site_data)
+        reports.render_site(site_report)
+        print(f"Page reports: {archive} (extract one with {reports.extract_command('<report>')})")
+        reports.close()
+    else:
+        generate_site_report(site_report, site_data)
+    print(f"Site report: {site_report} ({len(site_data['pages'])} page(s), "
+          f"{len(site_data['duplicates'])} near-duplicate group(s), "
+          f"{len(site_data['internal_links']['broken'])} broken internal link(s), "
+          f"average score {site_data['average_score']:.1f}/100)")
+    if collector is not None:
+        from metrics import write_textfile
+        write_textfile(metrics, collector)
+    return site_data
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a set of captured pages and write a site report.")
+    parser.add_argument('pages', nargs='*', help="Page files, or directories of .html/.htm/.txt files.")
+    parser.add_argument('--sitemap', action='append', default=[], metavar='PATH_OR_URL',
+                        help="Also audit every page listed in this sitemap or sitemap index "
+                             "(.xml or .xml.gz); may be repeated.")
+    parser.add_argument('--archive', metavar='FILE',
+                        help="Store page reports in this compressed archive instead of one HTML "
+                             "file per page, replacing any earlier run (read them with archive.py).")
+    parser.add_argument('--since', metavar='DATE',
+                        help="Skip sitemap pages whose lastmod is before DATE (e.g. 2024-05-01).")
+    parser.add_argument('--out', default='.', metavar='DIR', help="Where to write the reports.")
+    parser.add_argument('--budget', type=float, metavar='SECONDS',
+                        help="Time budget per page; checks still running are marked incomplete.")
+    parser.add_argument('--check-timeout', type=float, metavar='SECONDS',
+                        help="Default deadline for each individual check.")
+    parser.add_argument('--deadline', action='append', default=[], metavar='CHECK=SECONDS',
+                        type=wc.deadline_arg,
+                        help="Deadline for one check, e.g. --deadline broken_links=20.")
+    parser.add_argument('--dedupe-network', action='store_true',
+                        help="Run link and image checks only on the first page of each group of "
+                             "near-duplicate pages.")
+    parser.add_argument('--history', metavar='DB',
+                        help="Record every page's audit in this SQLite history database.")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Write the batch's metrics to FILE in Prometheus text format.")
+    args = parser.parse_args(argv)
+    if not args.pages and not args.sitemap:
+        parser.error("give page files/directories, --sitemap, or both")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    since = None
+    if args.since:
+        from sitemap import parse_lastmod
+        since = parse_lastmod(args.since)
+        if since is None:
+            print(f"--since: not a date: {args.since}")
+            return 2
+    analyze_batch(args.pages, args.out, args.budget, args.check_timeout,
+                  wc.parse_deadlines(args.deadline), args.dedupe_network, args.history,
+                  args.metrics, args.sitemap, since, args.archive)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
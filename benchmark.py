@@ -0,0 +1,332 @@
+import os
+import sys
+import time
+import json
+import math
+import inspect
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+import net
+import profiler
+import website_checker
+from scheduler import Scheduler, Job
+from page_generator import generate_page, params_for_size
+from local_server import StandInServer
+
+DEFAULT_SIZES = '10K,100K,1M'
+UNITS = {'K': 1024, 'M': 1024 * 1024, 'G': 1024 * 1024 * 1024}
+
+def parse_size(text):
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+def format_size(n):
+    for unit in ('G', 'M', 'K'):
+        if n >= UNITS[unit]:
+            return f"{n / UNITS[unit]:g}{unit}"
+    return str(n)
+
+# Inputs bench_page supplies besides website_checker.ARTIFACTS; check_* helpers
+# taking anything else (a URL, network profiles) are not page checks and are left out
+PAGE_INPUTS = ('soup', 'html_content', 'html_text', 'site_links')
+
+def check_functions():
+    """Every page-level check_* in website_checker with the inputs it takes, in definition order."""
+    checks = []
+    for name, func in inspect.getmembers(website_checker, inspect.isfunction):
+        if name.startswith('check_') and func.__module__ == website_checker.__name__:
+            params = list(inspect.signature(func).parameters)
+            if not all(p in PAGE_INPUTS or p in website_checker.ARTIFACTS for p in params):
+                continue
+            checks.append((func.__code__.co_firstlineno, name, func, params))
+    return [(name, func, params) for _, name, func, params in sorted(checks)]
+
+def bench_page(path, out_dir, only=None, skip=()):
+    """Time load_html_file, each check_* and generate_report once on one page.
+
+    Shared inputs (stylesheets, parsed CSS) are timed once, under their
+    builders' names, by the first check that needs them. Every cache in
+    net.CACHES (with the per-host breaker and rate state) is cleared first,
+    so each run is cold and repeats and sizes do not feed each other.
+    """
+    def wanted(name):
+        return (not only or name in only) and name not in skip
+
+    net.clear_caches()
+    prof = profiler.Profiler()
+    prof.start()
+    try:
+        soup, html_content = prof.call(website_checker.load_html_file, path)
+        inputs = website_checker.Artifacts({'soup': soup, 'html_content': html_content,
+                                            'html_text': html_content, 'site_links': None,
+                                            'network': True}, prof)
+        results = {}
+        for name, func, params in check_functions():
+            if not wanted(name):
+                continue
+            args = [inputs.get(p) for p in params]
+            results[name] = prof.call(func, *args)
+        if wanted('generate_report'):
+            report_data = website_checker.build_report_data(soup, _full_results(results))
+            report_path = os.path.join(out_dir, 'report.html')
+            prof.call(website_checker.generate_report, report_path, report_data)
+    finally:
+        prof.stop()
+    return {name: t['wall'] for name, t in prof.timings.items()}
+
+def _full_results(results):
+    """Map check_* results to the analyze_html result keys; skipped checks count as clean."""
+    keys = {
+        'check_accessibility': 'accessibility',
+        'check_keyboard_accessibility': 'keyboard_accessibility',
+        'check_color_contrast': 'color_contrast',
+        'check_missing_aria': 'missing_aria',
+        'check_missing_alt': 'missing_alt',
+        'check_exposed_keys': 'exposed_keys',
+        'check_https': 'https',
+        'check_broken_links': 'broken_links',
+        'check_image_sizes': 'large_images',
+        'check_outdated_html': 'outdated_html',
+        'check_clickable_images': 'clickable_images',
+        'check_responsive_viewport': 'responsive_viewport',
+        'check_modern_doctype': 'modern_doctype',
+        'check_layout_tables': 'layout_tables',
+        'check_web_vitals': 'web_vitals',
+        'check_unused_css_js': 'unused_css_js',
+        'check_grammar': 'grammar',
+    }
+    return {key: results.get(func, []) for func, key in keys.items()}
+
+def scaling_exponent(sizes, times):
+    """Least-squares slope of log(time) vs log(size): ~1 is linear, ~2 quadratic."""
+    pts = [(math.log(s), math.log(t)) for s, t in zip(sizes, times) if t > 0]
+    if len(pts) < 2:
+        return None
+    mx = sum(x for x, _ in pts) / len(pts)
+    my = sum(y for _, y in pts) / len(pts)
+    var = sum((x - mx) ** 2 for x, _ in pts)
+    return sum((x - mx) * (y - my) for x, y in pts) / var if var else None
+
+def run_suite(sizes, repeat=3, params=None, only=None, skip=(), network=False, latency=0.0):
+    """Benchmark every size and return {size_label: {func: best_seconds}}."""
+    params = params or {}
+    server = None
+    if network:
+        server = StandInServer(latency=latency).start()
+        params.setdefault('external_links', 20)
+        params.setdefault('external_images', 8)
+        params.setdefault('external_stylesheets', 2)
+        for i in range(params['external_stylesheets']):
+            server.add_route(f'/css/{i}.css', '.remote { color: #777; background-color: #888; }',
+                             content_type='text/css')
+    base_url = server.base_url if server else None
+    suite = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in sizes:
+                page_params = params_for_size(size, base_url=base_url, **params)
+                html = generate_page(base_url=base_url, **page_params)
+                path = os.path.join(tmp, 'page.html')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                # Big pages take long enough that one run is representative
+                runs = repeat if size < 10 * UNITS['M'] else 1
+                best = {}
+                for _ in range(runs):
+                    for name, secs in bench_page(path, tmp, only, skip).items():
+                        best[name] = min(secs, best.get(name, secs))
+                label = format_size(size)
+                suite[label] = best
+                print(f"{label:>6}: {len(html)/1024:,.0f} KB generated, "
+                      f"{sum(best.values()):.3f}s total", file=sys.stderr)
+    finally:
+        if server:
+            server.stop()
+    return suite
+
+def print_curves(suite):
+    """One row per function: time at each size plus the fitted scaling exponent."""
+    labels = list(suite)
+    sizes = [parse_size(label) for label in labels]
+    names = []
+    for timings in suite.values():
+        names.extend(n for n in timings if n not in names)
+    print(f"{'Function (ms)':<32}" + ''.join(f"{label:>10}" for label in labels) + f"{'Exponent':>10}")
+    for name in names:
+        times = [suite[label].get(name) for label in labels]
+        cells = ''.join(f"{t*1000:>10.1f}" if t is not None else f"{'-':>10}" for t in times)
+        known = [(s, t) for s, t in zip(sizes, times) if t is not None]
+        exp = scaling_exponent([s for s, _ in known], [t for _, t in known])
+        print(f"{name:<32}{cells}{exp:>10.2f}" if exp is not None else f"{name:<32}{cells}{'-':>10}")
+
+def compare_baseline(suite, baseline, tolerance=0.25, min_seconds=0.005):
+    """Return [(size, func, old, new)] for functions slower than baseline by > tolerance.
+
+    Timings under min_seconds are ignored since they are mostly noise.
+    """
+    regressions = []
+    for label, timings in suite.items():
+        for name, new in timings.items():
+            old = baseline.get(label, {}).get(name)
+            if old is None or max(old, new) < min_seconds:
+                continue
+            if new > old * (1 + tolerance):
+                regressions.append((label, name, old, new))
+    return regressions
+
+def bench_breaker(links=3 * website_checker.LINK_POOL_SIZE, delay=6.0):
+    """Wall time of find_broken_links on links that all time out, with and without the circuit breaker.
+
+    Every link is a ?delay= URL on one stand-in host, slower than
+    check_link's timeout. With the breaker the host is cut off after
+    net.FAILURE_THRESHOLD timeouts and the remaining links fail fast;
+    without it every link waits out its own timeout. Then checks that a
+    half-open probe cancelled by its deadline lets the next caller probe.
+    """
+    health = net.host_health
+    threshold, retry_after = health.threshold, health.retry_after
+    out = {}
+    try:
+        with StandInServer() as server:
+            hrefs = [server.url(f'/slow/{i}?delay={delay}') for i in range(links)]
+            for name, limit in (('no_breaker', links + 1), ('breaker', threshold)):
+                net.clear_caches()
+                health.threshold = limit
+                started = time.perf_counter()
+                website_checker.find_broken_links(hrefs)
+                out[name] = time.perf_counter() - started
+            out['fast_failures'] = health.fast_failures
+            # The circuit is open: make the next caller a probe, and cancel it
+            health.retry_after = 0
+            Scheduler(deadlines={'probe': 1e-6}).run([Job('probe', website_checker.check_link,
+                                                          (hrefs[0],), True)])
+            waited = time.monotonic() + 1
+            while health.state(hrefs[0]) == 'half_open' and time.monotonic() < waited:
+                time.sleep(0.01)
+            out['reprobed'] = health.allow(hrefs[0])
+            health.release(hrefs[0])
+    finally:
+        health.threshold, health.retry_after = threshold, retry_after
+        net.clear_caches()
+    return out
+
+def print_breaker(result):
+    print(f"Without breaker: {result['no_breaker']:.2f}s")
+    print(f"With breaker:    {result['breaker']:.2f}s ({result['fast_failures']} links failed fast)")
+    print(f"Cancelled probe released: {'yes' if result['reprobed'] else 'NO'}")
+
+HEAVY_MODULES = ('requests', 'cssutils', 'PIL', 'bs4', 'pdfkit', 'tkinter')
+
+STARTUP_SCENARIOS = {
+    'import website_checker': "import website_checker",
+    'import scoring + report': "import scoring, report",
+    'import reviewer (headless)': "import reviewer",
+    'small page, offline': ("import website_checker as w, io, contextlib\n"
+                            "with contextlib.redirect_stdout(io.StringIO()):\n"
+                            "    w.analyze_html('page.html')"),
+}
+
+def measure_startup(runs=5):
+    """Cold-start wall time (median of runs) and heavy modules loaded, per scenario.
+
+    Each run is a fresh interpreter so nothing is shared between runs.
+    """
+    repo = os.path.dirname(os.path.abspath(__file__))
+    probe = ("import sys, time\nt = time.perf_counter()\nsys.path.insert(0, {repo!r})\n{code}\n"
+             "print(time.perf_counter() - t)\n"
+             "print(','.join(sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r}))))")
+    out = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'page.html'), 'w', encoding='utf-8') as f:
+            f.write(generate_page(elements=20, images=5, links=10, css_rules=10, text_nodes=20))
+        for name, code in STARTUP_SCENARIOS.items():
+            script = probe.format(repo=repo, code=code, heavy=HEAVY_MODULES)
+            times, loaded = [], ''
+            for _ in range(runs):
+                started = time.perf_counter()
+                proc = subprocess.run([sys.executable, '-c', script], cwd=tmp,
+                                      capture_output=True, text=True, check=True)
+                total = time.perf_counter() - started
+                lines = proc.stdout.splitlines()
+                times.append((total, float(lines[-2])))
+                loaded = lines[-1]
+            out[name] = {
+                'process': statistics.median(t for t, _ in times),
+                'in_process': statistics.median(t for _, t in times),
+                'heavy_modules': loaded.split(',') if loaded else [],
+            }
+    return out
+
+def print_startup(startup):
+    print(f"{'Scenario':<30}{'Process (ms)':>14}{'Import+run (ms)':>17}  Heavy modules loaded")
+    for name, r in startup.items():
+        print(f"{name:<30}{r['process']*1000:>14.1f}{r['in_process']*1000:>17.1f}  "
+              f"{', '.join(r['heavy_modules']) or '-'}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark website_checker on synthetic pages.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated page sizes (default: {DEFAULT_SIZES}; "
+                             "add 10M or 100M explicitly, they take minutes).")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per size below 10M; best is kept.")
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                        help="Override a page_generator parameter, e.g. --param secret_density=0.01.")
+    parser.add_argument('--only', help="Comma-separated function names to benchmark.")
+    parser.add_argument('--skip', default='', help="Comma-separated function names to leave out.")
+    parser.add_argument('--network', action='store_true',
+                        help="Point external links/images/stylesheets at a local stand-in server.")
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="Per-request latency of the stand-in server in seconds.")
+    parser.add_argument('--startup', action='store_true',
+                        help="Measure cold-start time of fresh interpreters instead of check scaling.")
+    parser.add_argument('--breaker', action='store_true',
+                        help="Time links that all time out with and without the per-host circuit breaker.")
+    parser.add_argument('--save-baseline', metavar='FILE', help="Write timings to FILE as JSON.")
+    parser.add_argument('--compare', metavar='FILE', help="Compare against a saved baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown vs baseline before flagging a regression.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    params = {}
+    for item in args.param:
+        key, _, value = item.partition('=')
+        params[key] = float(value) if '.' in value else int(value)
+    only = set(args.only.split(',')) if args.only else None
+    skip = set(filter(None, args.skip.split(',')))
+    if args.breaker:
+        result = bench_breaker()
+        print_breaker(result)
+        return 0 if result['reprobed'] and result['breaker'] < result['no_breaker'] else 1
+    if args.startup:
+        startup = measure_startup(args.repeat)
+        print_startup(startup)
+        suite = {'startup': {name: r['process'] for name, r in startup.items()}}
+    else:
+        sizes = [parse_size(s) for s in args.sizes.split(',')]
+        suite = run_suite(sizes, args.repeat, params, only, skip, args.network, args.latency)
+        print_curves(suite)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(suite, f, indent=2, sort_keys=True)
+        print(f"Baseline saved: {args.save_baseline}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(suite, baseline, args.tolerance)
+        for label, name, old, new in regressions:
+            print(f"REGRESSION {label} {name}: {old*1000:.1f} ms -> {new*1000:.1f} ms ({new/old:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import threading
+
+from unused_css import DomFeatures
+from issues import location_of
+from spelling import is_checked_lang
+from web_vitals import VitalsCollector
+
+_lock = threading.Lock()
+
+# input types that never need an accessible name of their own
+UNNAMED_INPUT_TYPES = {'hidden'}
+# input types whose value attribute is their visible label
+VALUE_LABEL_INPUT_TYPES = {'submit', 'button', 'reset'}
+# elements whose text is code, markup or not rendered as prose
+VERBATIM_TAGS = {'script', 'style', 'template', 'noscript', 'textarea', 'code', 'pre', 'kbd',
+                 'samp', 'var', 'svg', 'math'}
+
+def get_index(soup):
+    """The DocumentIndex for soup, built on first use and shared by every check."""
+    index = soup.__dict__.get('_dom_index')
+    if index is None:
+        with _lock:
+            index = soup.__dict__.get('_dom_index')
+            if index is None:
+                index = DocumentIndex(soup)
+                soup.__dict__['_dom_index'] = index
+    return index
+
+def _attr(tag, name):
+    value = tag.get(name)
+    if isinstance(value, list):
+        value = ' '.join(value)
+    return value.strip() if value else ''
+
+class NodeContext:
+    """What a node inherits from itself and its ancestors (self-inclusive).
+
+    Nodes that change nothing share their parent's context object.
+    """
+    __slots__ = ('anchor', 'in_main', 'lang', 'hidden', 'styled', 'label', 'in_head', 'verbatim')
+
+    def __init__(self, anchor=None, in_main=False, lang='', hidden=False, styled=None, label=None,
+                 in_head=False, verbatim=False):
+        self.anchor = anchor      # nearest <a>
+        self.in_main = in_main    # inside <main> or role="main"
+        self.lang = lang          # inherited lang attribute
+        self.hidden = hidden      # inside aria-hidden="true"
+        self.styled = styled      # nearest element with an inline style attribute
+        self.label = label        # nearest wrapping <label>
+        self.in_head = in_head    # inside <head>
+        self.verbatim = verbatim  # inside code, script, style or other non-prose text
+
+    @property
+    def anchor_has_href(self):
+        return self.anchor is not None and bool(self.anchor.get('href'))
+
+    def derive(self, tag):
+        """Context for a child tag; returns self when the tag changes nothing."""
+        name = tag.name
+        is_main = name == 'main' or tag.get('role') == 'main'
+        lang = _attr(tag, 'lang')
+        hidden = tag.get('aria-hidden') == 'true'
+        styled = tag.has_attr('style')
+        is_head = name == 'head' and not self.in_head
+        is_verbatim = name in VERBATIM_TAGS and not self.verbatim
+        if not (name in ('a', 'label') or (is_main and not self.in_main) or lang
+                or (hidden and not self.hidden) or styled or is_head or is_verbatim):
+            return self
+        return NodeContext(
+            tag if name == 'a' else self.anchor,
+            self.in_main or is_main,
+            lang or self.lang,
+            self.hidden or hidden,
+            tag if styled else self.styled,
+            tag if name == 'label' else self.label,
+            self.in_head or is_head,
+            self.verbatim or is_verbatim,
+        )
+
+ROOT_CONTEXT = NodeContext()
+
+class DocumentIndex:
+    """Per-page indexes built in a single walk over the parsed tree.
+
+    - ids: id attribute -> first element carrying it
+    - names: <a name=...> -> first anchor carrying it (legacy fragment targets)
+    - links: every <a>/<area> with an href, in document order
+    - labels_for: <label for=...> target id -> label elements
+    - context: per-element NodeContext (nearest anchor, inside <main>,
+      inherited lang, inside aria-hidden, nearest styled ancestor, wrapping
+      label), propagated top-down so checks never climb with find_parent()
+    - name content: whether an element's subtree holds anything that names it
+      (non-whitespace text, an <img alt>, or an aria-label), computed once per
+      node bottom-up so checks never re-walk subtrees with get_text().
+    - vitals: web_vitals.VitalsCollector fed every tag during the same walk.
+    - features: unused_css.DomFeatures (tags, classes, ids, attribute names).
+    - prose: (text, location) of every text node outside code/script/style
+      in an English (or unmarked) language, collected on first use by the
+      spelling check or near-duplicate detection.
+    - tag_names: every tag name in document order (page fingerprints).
+    """
+
+    def __init__(self, soup):
+        from bs4 import NavigableString, CData, Tag
+        text_types = (NavigableString, CData)
+        self.soup = soup
+        self.ids = {}
+        self.names = {}
+        self.links = []
+        self.labels_for = {}
+        self.main = None
+        self._contexts = {}
+        self._named = set()
+        self.vitals = VitalsCollector()
+        self.features = DomFeatures()
+        self._prose = None
+        self.tag_names = []
+
+        # Document order visits every ancestor before its descendants, so
+        # each tag's context can be derived from its parent's.
+        contexts = self._contexts
+        nodes = list(soup.descendants)
+        for node in nodes:
+            if isinstance(node, Tag):
+                ctx = contexts.get(id(node.parent), ROOT_CONTEXT).derive(node)
+                contexts[id(node)] = ctx
+                self.vitals.visit(node, ctx)
+                self.features.add_tag(node)
+                self.tag_names.append(node.name)
+                if node.name in ('script', 'style') and node.string:
+                    self.vitals.inline(node, len(node.string.encode('utf-8')))
+                if self.main is None and ctx.in_main:
+                    self.main = node
+                e_id = _attr(node, 'id')
+                if e_id and e_id not in self.ids:
+                    self.ids[e_id] = node
+                if node.name in ('a', 'area') and node.has_attr('href'):
+                    self.links.append(node)
+                if node.name == 'a':
+                    e_name = _attr(node, 'name')
+                    if e_name and e_name not in self.names:
+                        self.names[e_name] = node
+                if node.name == 'label':
+                    target = _attr(node, 'for')
+                    if target:
+                        self.labels_for.setdefault(target, []).append(node)
+
+        # Reverse document order visits every descendant before its ancestor,
+        # so one pass propagates "has name content" up the tree.
+        named = self._named
+        for node in reversed(nodes):
+            parent = node.parent
+            if type(node) in text_types:
+                if parent is not None and not node.isspace() and node:
+                    named.add(id(parent))
+            elif isinstance(node, Tag):
+                if id(node) not in named:
+                    if _attr(node, 'aria-label') or (node.name == 'img' and _attr(node, 'alt')):
+                        named.add(id(node))
+                if id(node) in named and parent is not None:
+                    named.add(id(parent))
+
+    @property
+    def prose(self):
+        if self._prose is None:
+            from bs4 import NavigableString
+            contexts = self._contexts
+            self._prose = []
+            for node in self.soup.descendants:
+                if type(node) is NavigableString:
+                    parent = node.parent
+                    ctx = contexts.get(id(parent), ROOT_CONTEXT)
+                    if not ctx.verbatim and is_checked_lang(ctx.lang):
+                        self._prose.append((node, location_of(parent)))
+        return self._prose
+
+    def context(self, node):
+        """NodeContext of a tag, or of a text node's parent element."""
+        ctx = self._contexts.get(id(node))
+        if ctx is None:
+            ctx = self._contexts.get(id(node.parent), ROOT_CONTEXT)
+        return ctx
+
+    def parent_context(self, tag):
+        """Context inherited from tag's ancestors only (find_parent semantics)."""
+        return self._contexts.get(id(tag.parent), ROOT_CONTEXT)
+
+    def has_name_content(self, tag):
+        """True if tag's subtree contains text, an image alt or an aria-label."""
+        return id(tag) in self._named
+
+    def element_by_id(self, e_id):
+        return self.ids.get(e_id)
+
+    def labelledby_resolves(self, tag):
+        """aria-labelledby counts only if some referenced id exists and provides a name."""
+        for ref in _attr(tag, 'aria-labelledby').split():
+            target = self.ids.get(ref)
+            if target is not None and (self.has_name_content(target) or _attr(target, 'aria-label')):
+                return True
+        return False
+
+    def has_label(self, tag):
+        """Form control named by a <label for=id> or by a wrapping <label>."""
+        e_id = _attr(tag, 'id')
+        if e_id and any(self.has_name_content(lbl) for lbl in self.labels_for.get(e_id, ())):
+            return True
+        wrapper = self.parent_context(tag).label
+        return wrapper is not None and self.has_name_content(wrapper)
+
+    def needs_name(self, tag):
+        if tag.name == 'a':
+            return bool(tag.get('href'))
+        if tag.name == 'input':
+            return _attr(tag, 'type').lower() not in UNNAMED_INPUT_TYPES
+        return True
+
+    def has_accessible_name(self, tag):
+        """Approximation of the accessible-name computation for interactive elements."""
+        if _attr(tag, 'aria-label') or self.labelledby_resolves(tag):
+            return True
+        if tag.name in ('input', 'select', 'textarea'):
+            if self.has_label(tag):
+                return True
+            input_type = _attr(tag, 'type').lower()
+            if tag.name == 'input' and input_type in VALUE_LABEL_INPUT_TYPES and _attr(tag, 'value'):
+                return True
+            if tag.name == 'input' and input_type == 'image' and _attr(tag, 'alt'):
+                return True
+            if _attr(tag, 'placeholder'):
+                return True
+        if _attr(tag, 'alt') or _attr(tag, 'title'):
+            return True
+        return self.has_name_content(tag)
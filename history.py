@@ -0,0 +1,220 @@
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+from issues import issue_text, issue_count, fingerprint
+
+DEFAULT_PATH = 'audit_history.sqlite3'
+
+# Issue texts are stored once and referenced by fingerprint, so the per-audit
+# table holds only integers; both big tables are clustered on their keys.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audits (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    ts REAL NOT NULL,
+    score INTEGER NOT NULL,
+    deductions TEXT NOT NULL,
+    wall REAL
+);
+CREATE INDEX IF NOT EXISTS audits_url_ts ON audits (url, ts);
+CREATE TABLE IF NOT EXISTS issue_texts (
+    fingerprint INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS issues (
+    audit_id INTEGER NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (audit_id, fingerprint)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS timings (
+    audit_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    wall REAL NOT NULL,
+    PRIMARY KEY (audit_id, name)
+) WITHOUT ROWID;
+"""
+
+def audit_issues(issues_data):
+    """{fingerprint: (category, text, count)} for every finding in a report's issues_data."""
+    found = {}
+    for category, data in issues_data.items():
+        for issue in data['issues']:
+            text = issue_text(issue)
+            fp = fingerprint(category, text)
+            prev = found.get(fp)
+            found[fp] = (category, text, (prev[2] if prev else 0) + issue_count(issue))
+    return found
+
+class History:
+    """SQLite store of past audits: scores, deductions, findings and check timings."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def record(self, report_data, summary=None, ts=None):
+        """Store one audit from build_report_data() output; returns its id.
+
+        summary is the run's Profiler.summary(), for per-check timings.
+        """
+        summary = summary or {}
+        timings = summary.get('timings', {})
+        issues = audit_issues(report_data['issues_data'])
+        with self.db:
+            cur = self.db.execute(
+                'INSERT INTO audits (url, title, ts, score, deductions, wall) VALUES (?, ?, ?, ?, ?, ?)',
+                (report_data['url'] or '', report_data['title'], ts or time.time(),
+                 report_data['score'], json.dumps(report_data['deductions']),
+                 summary.get('total_wall')))
+            audit_id = cur.lastrowid
+            self.db.executemany('INSERT OR IGNORE INTO issue_texts VALUES (?, ?, ?)',
+                                ((fp, cat, text) for fp, (cat, text, _) in issues.items()))
+            self.db.executemany('INSERT INTO issues VALUES (?, ?, ?)',
+                                ((audit_id, fp, count) for fp, (_, _, count) in issues.items()))
+            self.db.executemany('INSERT INTO timings VALUES (?, ?, ?)',
+                                ((audit_id, name, t['wall']) for name, t in timings.items()))
+        return audit_id
+
+    def urls(self):
+        """[{'url', 'audits', 'last_ts', 'last_score'}] for every URL audited."""
+        # With MAX(), SQLite takes the bare score column from the row holding the maximum
+        rows = self.db.execute(
+            'SELECT url, COUNT(*), MAX(ts), score FROM audits GROUP BY url ORDER BY url')
+        return [{'url': url, 'audits': n, 'last_ts': ts, 'last_score': score}
+                for url, n, ts, score in rows]
+
+    def trend(self, url, since=None, limit=None):
+        """[{'id', 'ts', 'score', 'title', 'deductions'}] for url, oldest first."""
+        rows = self.db.execute(
+            'SELECT id, ts, score, title, deductions FROM audits WHERE url = ? AND ts >= ? '
+            'ORDER BY ts DESC LIMIT ?', (url, since or 0, limit or -1)).fetchall()
+        return [{'id': i, 'ts': ts, 'score': score, 'title': title, 'deductions': json.loads(d)}
+                for i, ts, score, title, d in reversed(rows)]
+
+    def previous_audit(self, audit_id):
+        """Id of the audit of the same URL just before audit_id, or None."""
+        row = self.db.execute(
+            'SELECT p.id FROM audits a JOIN audits p ON p.url = a.url AND p.ts < a.ts '
+            'WHERE a.id = ? ORDER BY p.ts DESC LIMIT 1', (audit_id,)).fetchone()
+        return row[0] if row else None
+
+    def latest_audit(self, url):
+        row = self.db.execute('SELECT id FROM audits WHERE url = ? ORDER BY ts DESC LIMIT 1',
+                              (url,)).fetchone()
+        return row[0] if row else None
+
+    def last_audited(self, url):
+        """Time of url's latest audit, or None if it was never audited."""
+        row = self.db.execute('SELECT MAX(ts) FROM audits WHERE url = ?', (url,)).fetchone()
+        return row[0]
+
+    def _issues_only_in(self, audit_id, other_id):
+        return [{'category': cat, 'text': text, 'count': count} for cat, text, count in self.db.execute(
+            'SELECT t.category, t.text, i.count FROM issues i '
+            'JOIN issue_texts t ON t.fingerprint = i.fingerprint '
+            'WHERE i.audit_id = ? AND NOT EXISTS '
+            '(SELECT 1 FROM issues o WHERE o.audit_id = ? AND o.fingerprint = i.fingerprint) '
+            'ORDER BY t.category, t.text', (audit_id, other_id))]
+
+    def changes(self, audit_id, since_id=None):
+        """{'audit', 'since', 'new': [...], 'resolved': [...]} between two audits.
+
+        since_id defaults to the previous audit of the same URL; each entry
+        is {'category', 'text', 'count'}.
+        """
+        since_id = since_id if since_id is not None else self.previous_audit(audit_id)
+        return {
+            'audit': audit_id,
+            'since': since_id,
+            'new': self._issues_only_in(audit_id, since_id) if since_id else [],
+            'resolved': self._issues_only_in(since_id, audit_id) if since_id else [],
+        }
+
+    def slowest_checks(self, url=None, since=None, limit=10):
+        """[{'name', 'runs', 'avg', 'max'}] by average wall time, over url's audits (or all)."""
+        where, args = 'a.ts >= ?', [since or 0]
+        if url is not None:
+            where += ' AND a.url = ?'
+            args.append(url)
+        rows = self.db.execute(
+            f'SELECT t.name, COUNT(*), AVG(t.wall), MAX(t.wall) FROM audits a '
+            f'JOIN timings t ON t.audit_id = a.id WHERE {where} '
+            f'GROUP BY t.name ORDER BY AVG(t.wall) DESC LIMIT ?', args + [limit]).fetchall()
+        return [{'name': n, 'runs': runs, 'avg': avg, 'max': mx} for n, runs, avg, mx in rows]
+
+def _when(ts):
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(ts))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query the audit history store.")
+    parser.add_argument('--db', default=DEFAULT_PATH, help=f"History database (default: {DEFAULT_PATH}).")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('urls', help="Every URL audited, with its latest score.")
+    p = sub.add_parser('trend', help="Score over time for one URL.")
+    p.add_argument('url')
+    p.add_argument('--days', type=float, help="Only audits from the last DAYS days.")
+    p = sub.add_parser('changes', help="Issues new or resolved in the latest (or given) audit.")
+    p.add_argument('url')
+    p.add_argument('--audit', type=int, help="Audit id to compare with the one before it.")
+    p = sub.add_parser('slowest', help="Checks with the highest average wall time.")
+    p.add_argument('url', nargs='?')
+    p.add_argument('--days', type=float, help="Only audits from the last DAYS days.")
+    p.add_argument('--limit', type=int, default=10)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    since = time.time() - args.days * 86400 if getattr(args, 'days', None) else None
+    with History(args.db) as history:
+        if args.command == 'urls':
+            for row in history.urls():
+                print(f"{row['last_score']:>3}/100  {row['audits']:>5} audit(s)  "
+                      f"last {_when(row['last_ts'])}  {row['url']}")
+        elif args.command == 'trend':
+            previous = None
+            for row in history.trend(args.url, since):
+                delta = f" ({row['score'] - previous:+d})" if previous is not None else ''
+                print(f"{_when(row['ts'])}  #{row['id']:<6} {row['score']:>3}/100{delta}")
+                previous = row['score']
+        elif args.command == 'changes':
+            audit_id = args.audit or history.latest_audit(args.url)
+            if audit_id is None:
+                print(f"No audits of {args.url}")
+                return 1
+            diff = history.changes(audit_id)
+            if diff['since'] is None:
+                print(f"Audit #{audit_id} is the first of {args.url}; nothing to compare.")
+                return 0
+            print(f"Audit #{audit_id} vs #{diff['since']}: {len(diff['new'])} new, "
+                  f"{len(diff['resolved'])} resolved")
+            for label, entries in (('+', diff['new']), ('-', diff['resolved'])):
+                for e in entries:
+                    print(f"  {label} [{e['category']}] {e['text']}" +
+                          (f" (x{e['count']})" if e['count'] > 1 else ''))
+        elif args.command == 'slowest':
+            print(f"{'Check':<32}{'Runs':>6}{'Avg (ms)':>10}{'Max (ms)':>10}")
+            for row in history.slowest_checks(args.url, since, args.limit):
+                print(f"{row['name']:<32}{row['runs']:>6}{row['avg']*1000:>10.1f}{row['max']*1000:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import io
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import net
+import profiler
+from issues import IssueList, location_of
+from scheduler import checkpoint
+
+FETCH_POOL_SIZE = 8
+# Enough of the file for Image.open to find the dimensions of almost any image
+HEADER_BYTES = 64 * 1024
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+# Images smaller than this are not worth re-encoding
+MIN_ENCODE_BYTES = 8 * 1024
+# Allow for 2x (retina) displays before calling an image oversized
+DEVICE_PIXEL_RATIO = 2
+# Report only savings at least this large
+MIN_SAVINGS_BYTES = 4 * 1024
+
+ENCODABLE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'AVIF')
+# Re-encoding settings close to what image CDNs use by default
+ENCODINGS = {
+    'JPEG': {'quality': 85, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 80, 'method': 4},
+    'AVIF': {'quality': 60, 'speed': 8},
+}
+
+_analysis_cache = net.TTLCache(maxsize=5000, ttl=300)   # (url, target) -> analysis row
+net.CACHES['image_analysis'] = _analysis_cache
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool(workers=None):
+    """Process pool for decoding/encoding, started on first use and kept for later pages.
+
+    Workers are spawned rather than forked: forking while the scheduler's
+    and fetch threads hold locks can deadlock the child. As with any spawn
+    pool, scripts calling this must guard their entry point with
+    if __name__ == "__main__".
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                            mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def _discard_pool(pool):
+    """Forget a pool whose worker died so the next page starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _dimension(tag, name):
+    value = (tag.get(name) or '').strip().lower()
+    if value.endswith('px'):
+        value = value[:-2]
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+def collect_images(soup, base=None):
+    """[{'url', 'rendered', 'location'}] for every http(s) <img>, deduplicated by URL.
+
+    rendered is the (width, height) the page lays the image out at from its
+    width/height attributes, the largest if an image is used more than once,
+    or None if neither attribute is set.
+    """
+    from resources import absolute_url
+    found = {}
+    for img in soup.find_all('img', src=True):
+        url = absolute_url(img['src'], base)
+        if not url:
+            continue
+        width, height = _dimension(img, 'width'), _dimension(img, 'height')
+        entry = found.get(url)
+        if entry is None:
+            entry = found[url] = {'url': url, 'rendered': None, 'location': location_of(img),
+                                  'declared': []}
+        if width or height:
+            entry['declared'].append((width, height))
+    for entry in found.values():
+        declared = entry.pop('declared')
+        if declared:
+            entry['rendered'] = (max(w or 0 for w, _ in declared), max(h or 0 for _, h in declared))
+    return list(found.values())
+
+def rendered_size(rendered, intrinsic):
+    """Fill in a missing rendered dimension from the intrinsic aspect ratio."""
+    width, height = rendered
+    iw, ih = intrinsic
+    if not width:
+        width = round(height * iw / ih)
+    if not height:
+        height = round(width * ih / iw)
+    return width, height
+
+def fetch_image(url):
+    """GET an image, reading only its header unless it is big enough to re-encode.
+
+    Returns {'url', 'status', 'format', 'size', 'bytes', 'body', 'elapsed'};
+    body is the full file, or None when only the header was needed.
+    """
+    import requests
+    from PIL import Image, UnidentifiedImageError
+    started = time.perf_counter()
+    info = {'url': url, 'status': None, 'format': None, 'size': None, 'bytes': 0, 'body': None,
+            'elapsed': 0.0}
+    if not net.host_health.allow(url):
+        info['status'] = net.HOST_UNREACHABLE
+        return info
+    try:
+        if not net.rate_controller.acquire(url):
+            info['status'] = net.THROTTLED
+            return info
+        resp = net.get_session().get(url, timeout=15, stream=True)
+        net.host_health.success(url)
+        net.rate_controller.feedback(url, resp.status_code, time.perf_counter() - started,
+                                     net.parse_retry_after(resp.headers.get('Retry-After')))
+        try:
+            info['status'] = resp.status_code
+            head = resp.raw.read(HEADER_BYTES, decode_content=True)
+            length = resp.headers.get('Content-Length')
+            length = int(length) if length and length.isdigit() else None
+            body = None
+            try:
+                with Image.open(io.BytesIO(head)) as img:
+                    info['format'], info['size'] = img.format, img.size
+            except (UnidentifiedImageError, OSError, SyntaxError):
+                # Header did not fit in the first read: fall back to the whole file
+                body = head + resp.raw.read(MAX_IMAGE_BYTES, decode_content=True)
+                try:
+                    with Image.open(io.BytesIO(body)) as img:
+                        info['format'], info['size'] = img.format, img.size
+                except (UnidentifiedImageError, OSError, SyntaxError):
+                    pass
+            if body is None and info['format'] in ENCODABLE_FORMATS and (
+                    length is None or length >= MIN_ENCODE_BYTES):
+                body = head + resp.raw.read(MAX_IMAGE_BYTES, decode_content=True)
+            info['bytes'] = len(body) if body is not None else (length or len(head))
+            if body is not None and info['format'] in ENCODABLE_FORMATS:
+                info['body'] = body
+        finally:
+            resp.close()
+    except requests.exceptions.RequestException as e:
+        net.rate_controller.feedback(url, None, time.perf_counter() - started)
+        if net.connection_failed(e):
+            net.host_health.failure(url)
+            info['status'] = net.HOST_UNREACHABLE
+    finally:
+        net.host_health.release(url)
+    info['elapsed'] = time.perf_counter() - started
+    profiler.record_request(url, info['status'], info['bytes'], info['elapsed'])
+    return info
+
+def encoded_sizes(body, target):
+    """Bytes of the image resized to target in its own format, as WebP and as AVIF.
+
+    Runs in a worker process. JPEGs are decoded with draft(), which lets the
+    decoder scale down by up to 8x instead of decoding every pixel.
+    """
+    from PIL import Image, features
+    img = Image.open(io.BytesIO(body))
+    fmt = img.format
+    img.draft('RGB', target)
+    has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+    img = img.convert('RGBA' if has_alpha else 'RGB')
+    if img.size != target:
+        img = img.resize(target, Image.LANCZOS)
+    sizes = {}
+    for name in (fmt, 'WEBP', 'AVIF'):
+        if name in sizes or (name == 'AVIF' and not features.check('avif')):
+            continue
+        image = img.convert('RGB') if name == 'JPEG' else img
+        buf = io.BytesIO()
+        image.save(buf, name, **ENCODINGS.get(name, {}))
+        sizes[name] = buf.tell()
+    return sizes
+
+def _target(rendered, intrinsic):
+    """Pixel size worth serving: the rendered size at DEVICE_PIXEL_RATIO, never upscaled."""
+    if rendered is None:
+        return intrinsic
+    width, height = rendered
+    iw, ih = intrinsic
+    return (min(iw, width * DEVICE_PIXEL_RATIO), min(ih, height * DEVICE_PIXEL_RATIO))
+
+def _issues_for(row):
+    found = []
+    kb = row['savings'] / 1024
+    if row['ratio'] and row['ratio'] > DEVICE_PIXEL_RATIO and row['savings'] >= MIN_SAVINGS_BYTES:
+        (iw, ih), (rw, rh) = row['size'], row['rendered']
+        found.append(f"Image {iw}x{ih} displayed at {rw}x{rh} ({row['ratio']:.1f}x larger than "
+                     f"needed), ~{kb:.1f} KB could be saved resized as {row['best_format']}: "
+                     f"{row['url']}")
+    elif row['best_format'] and row['best_format'] != row['format'] and row['savings'] >= MIN_SAVINGS_BYTES:
+        found.append(f"{row['format']} image could be ~{kb:.1f} KB "
+                     f"({row['savings'] / row['bytes']:.0%}) smaller as {row['best_format']}: {row['url']}")
+    return found
+
+def analyze_images(soup, workers=None, pool_size=FETCH_POOL_SIZE):
+    """Intrinsic vs. rendered size and re-encoding savings for every image on the page.
+
+    Images are fetched on a thread pool (header only where that is enough);
+    re-encoding runs on a process pool across CPU cores (workers, default
+    one per core). Returns {'images': [row, ...], 'bytes', 'savings', 'issues'}.
+    """
+    from resources import page_base
+    entries = collect_images(soup, page_base(soup))
+    rows, pending = [], []
+    for entry in entries:
+        cached = _analysis_cache.get((entry['url'], entry['rendered']))
+        if cached is not net.MISSING:
+            rows.append(dict(cached, location=entry['location']))
+        else:
+            pending.append(entry)
+
+    prof = profiler.active()
+
+    def fetch(entry):
+        profiler.activate(prof)
+        try:
+            return entry, fetch_image(entry['url'])
+        finally:
+            profiler.activate(None)
+
+    encodes = {}
+    fetched = []
+    if pending:
+        threads = ThreadPoolExecutor(max_workers=min(pool_size, len(pending)))
+        try:
+            for future in as_completed([threads.submit(fetch, e) for e in pending]):
+                checkpoint()
+                entry, info = future.result()
+                fetched.append((entry, info))
+                if info['body'] is not None:
+                    target = _target(entry['rendered'] and rendered_size(entry['rendered'], info['size']),
+                                     info['size'])
+                    pool = get_pool(workers)
+                    encodes[entry['url']] = (target, pool, pool.submit(encoded_sizes, info['body'],
+                                                                       target))
+                    info['body'] = None
+        finally:
+            # Do not wait for stragglers when the check was cancelled
+            threads.shutdown(wait=False, cancel_futures=True)
+
+    try:
+        for entry, info in fetched:
+            row = {'url': entry['url'], 'location': entry['location'], 'status': info['status'],
+                   'format': info['format'], 'size': info['size'], 'bytes': info['bytes'],
+                   'rendered': None, 'ratio': None, 'target': None, 'encoded': {},
+                   'best_format': None, 'savings': 0}
+            if info['size'] and entry['rendered']:
+                row['rendered'] = rendered_size(entry['rendered'], info['size'])
+                row['ratio'] = max(info['size'][0] / row['rendered'][0],
+                                   info['size'][1] / row['rendered'][1])
+            if entry['url'] in encodes:
+                checkpoint()
+                row['target'], pool, future = encodes.pop(entry['url'])
+                try:
+                    row['encoded'] = future.result()
+                except BrokenProcessPool:
+                    _discard_pool(pool)
+                    rows.append(row)
+                    continue
+                except Exception:
+                    # Corrupt or unsupported image data: report dimensions only
+                    row['encoded'] = {}
+                if row['encoded']:
+                    best = min(row['encoded'], key=row['encoded'].get)
+                    row['best_format'] = best
+                    row['savings'] = max(row['bytes'] - row['encoded'][best], 0)
+            if row['status'] not in (net.HOST_UNREACHABLE, net.THROTTLED) + net.THROTTLE_STATUSES:
+                _analysis_cache.set((entry['url'], entry['rendered']),
+                                    {k: v for k, v in row.items() if k != 'location'})
+            rows.append(row)
+    finally:
+        for _, _, future in encodes.values():
+            future.cancel()
+
+    issues = IssueList()
+    for row in rows:
+        for text in _issues_for(row):
+            issues.add(text, row['location'])
+    rows.sort(key=lambda r: -r['savings'])
+    return {
+        'images': rows,
+        'bytes': sum(r['bytes'] for r in rows),
+        'savings': sum(r['savings'] for r in rows),
+        'issues': issues,
+    }
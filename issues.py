@@ -0,0 +1,145 @@
+import re
+import hashlib
+
+MAX_SAMPLES = 3
+# Measured values that drift between runs of the same finding (contrast
+# ratios, KB estimates, timings); they do not make it a different finding
+_MEASURED_RE = re.compile(r'\d+\.\d+')
+
+def location_of(tag):
+    """(line, column) of a parsed tag, or None if the parser did not record it."""
+    line = getattr(tag, 'sourceline', None)
+    if line is None:
+        return None
+    return (line, getattr(tag, 'sourcepos', 0) or 0)
+
+def format_location(loc):
+    if isinstance(loc, tuple):
+        return f"line {loc[0]}:{loc[1]}"
+    return f"line {loc}"
+
+class Issue:
+    """One distinct finding: its text, how often it occurred and a few sample locations."""
+    __slots__ = ('text', 'count', 'samples')
+
+    def __init__(self, text, count=1, samples=None):
+        self.text = text
+        self.count = count
+        self.samples = samples
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"Issue({self.text!r}, count={self.count})"
+
+    def locations(self):
+        """Human-readable sample locations, e.g. 'line 12:4, line 40:8'."""
+        return ', '.join(format_location(loc) for loc in self.samples or ())
+
+    def as_json(self):
+        return {'issue': self.text, 'count': self.count,
+                'locations': [list(loc) if isinstance(loc, tuple) else loc for loc in self.samples or ()]}
+
+class IssueList:
+    """Findings with identical text collapsed into a single Issue record.
+
+    len() counts every occurrence so scoring sees the same numbers as a plain
+    list of strings would; iteration yields one Issue per distinct text.
+    """
+    __slots__ = ('_records', '_total')
+
+    def __init__(self, items=()):
+        self._records = {}
+        self._total = 0
+        for item in items:
+            self.add(item)
+
+    def add(self, text, location=None, count=1):
+        rec = self._records.get(text)
+        if rec is None:
+            rec = self._records[text] = Issue(text, 0)
+        rec.count += count
+        self._total += count
+        if location is not None:
+            if rec.samples is None:
+                rec.samples = []
+            if len(rec.samples) < MAX_SAMPLES:
+                rec.samples.append(location)
+
+    def merge(self, other):
+        """Fold another IssueList's records into this one."""
+        for rec in other:
+            self.add(rec.text, count=rec.count)
+            mine = self._records[rec.text]
+            for loc in rec.samples or ():
+                if mine.samples is None:
+                    mine.samples = []
+                if len(mine.samples) < MAX_SAMPLES:
+                    mine.samples.append(loc)
+
+    def __len__(self):
+        return self._total
+
+    def __bool__(self):
+        return self._total > 0
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, text):
+        return text in self._records
+
+    def unique_count(self):
+        return len(self._records)
+
+    def as_json(self):
+        return [rec.as_json() for rec in self._records.values()]
+
+def issue_text(issue):
+    """Display text for any result entry: Issue, plain string, (url, detail) tuple or parsed-report dict."""
+    if isinstance(issue, Issue):
+        return issue.text
+    if isinstance(issue, dict):
+        return issue['issue']
+    return issue if isinstance(issue, str) else issue[0]
+
+def issue_count(issue):
+    return issue.count if isinstance(issue, Issue) else 1
+
+def finding_count(issues_data):
+    """Distinct findings in issues_data, one per fingerprint as audit_diff matches them.
+
+    A collapsed entry counts once however often it occurred (len() of an
+    IssueList would count every occurrence).
+    """
+    return sum(len({fingerprint(cat, issue_text(issue)) for issue in entry['issues']})
+               for cat, entry in issues_data.items())
+
+def issue_from_json(item):
+    """Issue, str or tuple back from what json_default (or reviewer.parse_report) produced."""
+    if isinstance(item, dict):
+        locations = [tuple(loc) if isinstance(loc, list) else loc
+                     for loc in item.get('locations') or ()]
+        return Issue(item['issue'], item.get('count', 1), locations or None)
+    return tuple(item) if isinstance(item, list) else item
+
+def json_default(obj):
+    """json.dumps default= hook for Issue/IssueList (and anything else via str)."""
+    if hasattr(obj, 'as_json'):
+        return obj.as_json()
+    return str(obj)
+
+def normalize_text(text):
+    """Finding text with whitespace collapsed and measured decimals replaced by '#'."""
+    text = ' '.join(text.split())
+    return _MEASURED_RE.sub('#', text) if '.' in text else text
+
+def fingerprint(category, text):
+    """Stable signed 64-bit id of one finding (fits an SQLite INTEGER).
+
+    Computed on the normalized text, so the same finding matches across
+    runs even where a measured value moved slightly.
+    """
+    key = f"{category}\0{normalize_text(text)}".encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little', signed=True)
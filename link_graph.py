@@ -0,0 +1,129 @@
+import os
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit, urlunsplit, unquote
+
+from dom_index import get_index
+from issues import location_of
+
+# Reason reported for a #fragment that matches no id or <a name> on its target page
+MISSING_FRAGMENT = 'missing_fragment'
+# hrefs that are not documents and are never checked
+SKIPPED_SCHEMES = ('mailto:', 'tel:', 'sms:', 'javascript:', 'data:', 'blob:', 'about:')
+# Fragments every page has: "#" and "#top" scroll to the top
+BUILTIN_FRAGMENTS = {'', 'top'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize(url):
+    """(url without its fragment, fragment) with scheme and host lowercased and default ports dropped."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or ('/' if scheme in DEFAULT_PORTS else '')
+    return urlunsplit((scheme, host, path, parts.query, '')), unquote(parts.fragment)
+
+def page_key(soup, path=None, url=None):
+    """Where the page lives: its <base>/canonical/og:url, else the URL it was fetched from, else the
+    file it was read from, else None."""
+    from resources import page_base
+    base = page_base(soup) or url
+    if base:
+        return normalize(base)[0]
+    if path:
+        return Path(os.path.abspath(path)).as_uri()
+    return None
+
+def same_site(url, key):
+    """True if url is on the same scheme and host as the page key (any file: URL for file pages)."""
+    a, b = urlsplit(url), urlsplit(key)
+    return a.scheme == b.scheme and a.netloc == b.netloc
+
+def collect_links(soup, key=None):
+    """[{'href', 'url', 'fragment', 'local', 'location'}] for every <a>/<area> href on the page.
+
+    url is the href resolved against key (None if it cannot be resolved or
+    is not a document); local marks same-document links ("#x", or a link
+    back to key), which can always be verified against this page alone.
+    """
+    return link_entries(get_index(soup).links, key)
+
+def link_entries(tags, key=None):
+    """collect_links for any <a>/<area> tags with get() and a source position (parsed or streamed)."""
+    found = []
+    for tag in tags:
+        href = (tag.get('href') or '').strip()
+        if not href or href.lower().startswith(SKIPPED_SCHEMES):
+            continue
+        if href.startswith('#'):
+            found.append({'href': href, 'url': key, 'fragment': unquote(href[1:]), 'local': True,
+                          'location': location_of(tag)})
+            continue
+        url = href
+        if href.startswith('//'):
+            url = 'https:' + href
+        elif key and not urlsplit(href).scheme:
+            url = urljoin(key, href)
+        if not urlsplit(url).scheme:
+            continue
+        url, fragment = normalize(url)
+        found.append({'href': href, 'url': url, 'fragment': fragment,
+                      'local': key is not None and url == key, 'location': location_of(tag)})
+    return found
+
+def link_targets(soup):
+    """Every fragment the page can scroll to: element ids and <a name>s."""
+    index = get_index(soup)
+    return set(index.ids) | set(index.names)
+
+def fragment_issues(links, targets):
+    """(href, MISSING_FRAGMENT) for same-document links whose fragment has no target."""
+    return [(link['href'], MISSING_FRAGMENT) for link in links
+            if link['local'] and link['fragment'] not in BUILTIN_FRAGMENTS
+            and link['fragment'] not in targets]
+
+class SiteLinks:
+    """Link graph of a batch of pages, verified offline once every page is in.
+
+    add_page() keeps each page's fragment targets and its links to other
+    pages on the same site; verify() checks those links against the pages
+    captured, so they never go to the network. Only small per-page
+    summaries are kept, not the parsed pages.
+    """
+
+    def __init__(self):
+        self.pages = {}     # page key -> fragment targets
+        self.files = {}     # page key -> file it was read from
+        self.pending = []   # (file, href, url, fragment, location) of same-site links
+
+    def add_page(self, soup, path=None, url=None):
+        """Index one page read from path (or fetched from url); returns its key (None if it has no base URL or file)."""
+        key = page_key(soup, path, url)
+        if key is None:
+            return None
+        if key not in self.pages:
+            self.pages[key] = frozenset(link_targets(soup))
+            self.files[key] = path
+        for link in collect_links(soup, key):
+            # Bare #fragments are verified with the page itself (check_broken_links)
+            if not link['href'].startswith('#') and same_site(link['url'], key):
+                self.pending.append((path, link['href'], link['url'], link['fragment'],
+                                     link['location']))
+        return key
+
+    def verify(self):
+        """{'checked', 'broken': [{'file', 'href', 'target', 'reason', 'location'}], 'uncaptured'}.
+
+        A link whose page was captured is broken if its fragment is missing
+        there; links to pages outside the batch are only counted, since
+        nothing offline says whether they exist.
+        """
+        broken, uncaptured = [], set()
+        for path, href, url, fragment, location in self.pending:
+            targets = self.pages.get(url)
+            if targets is None:
+                uncaptured.add(url)
+            elif fragment not in BUILTIN_FRAGMENTS and fragment not in targets:
+                broken.append({'file': path, 'href': href, 'target': self.files[url],
+                               'reason': MISSING_FRAGMENT, 'location': location})
+        return {'checked': len(self.pending), 'broken': broken, 'uncaptured': sorted(uncaptured)}
@@ -0,0 +1,110 @@
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+class StandInServer:
+    """Local HTTP stand-in for network checks and benchmarks.
+
+    Any path returns 200 with a short body unless it matches a route added with
+    add_route() or one of these conventions:
+      /status/<code>/...   respond with that status code
+      /size/<bytes>/...    respond with a body (and Content-Length) of that size
+    A ?delay=<seconds> query adds extra latency to a single URL on top of the
+    server-wide latency.
+    """
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.routes = {}
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def add_route(self, path, body=b'', status=200, headers=None, content_type='text/html'):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        hdrs = {'Content-Type': content_type}
+        hdrs.update(headers or {})
+        self.routes[path] = (status, hdrs, body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def respond(self, path, query):
+        """Resolve (status, headers, body) for a request path."""
+        if path in self.routes:
+            return self.routes[path]
+        parts = path.strip('/').split('/')
+        if len(parts) >= 2 and parts[0] == 'status' and parts[1].isdigit():
+            hdrs = {'Content-Type': 'text/plain'}
+            if 'retry_after' in query:
+                hdrs['Retry-After'] = query['retry_after'][0]
+            return int(parts[1]), hdrs, b'status'
+        if len(parts) >= 2 and parts[0] == 'size' and parts[1].isdigit():
+            return 200, {'Content-Type': 'application/octet-stream'}, b'\0' * int(parts[1])
+        return 200, {'Content-Type': 'text/html'}, b'<html><body>ok</body></html>'
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _serve(self, send_body):
+                with server._lock:
+                    server.request_count += 1
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                delay = server.latency + float(query.get('delay', ['0'])[0])
+                if delay:
+                    time.sleep(delay)
+                status, headers, body = server.respond(parts.path, query)
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    # The client gave up (e.g. timed out on a ?delay= URL) before the reply
+                    pass
+
+            def do_GET(self):
+                self._serve(True)
+
+            def do_HEAD(self):
+                self._serve(False)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,191 @@
+import os
+import threading
+from collections import OrderedDict
+
+import net
+import profiler
+from issues import finding_count
+from scoring import RESULT_CATEGORIES
+
+PREFIX = 'webvitals'
+# Pages whose latest score is exported; the least recently audited are
+# dropped beyond this so a long-running service keeps a bounded label set
+MAX_PAGES = 500
+SECTION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+AUDIT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+CATEGORY_KEYS = dict(RESULT_CATEGORIES)
+
+def status_class(status):
+    """'2xx'..'5xx' for HTTP statuses; net's markers (unreachable, throttled) as they are, else 'error'."""
+    if isinstance(status, int):
+        return f"{status // 100}xx"
+    return status if isinstance(status, str) else 'error'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) for one label set."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, labels):
+        for bound, n in zip(self.buckets, self.counts):
+            yield '_bucket', labels + (('le', _number(float(bound))),), n
+        yield '_bucket', labels + (('le', '+Inf'),), self.count
+        yield '_sum', labels, self.sum
+        yield '_count', labels, self.count
+
+class Metrics:
+    """Audit and performance metrics of this process, rendered as Prometheus/OpenMetrics text.
+
+    install() subscribes to the profiler's events, so section timings and
+    requests are counted as they happen; observe_audit() records a page's
+    score and per-category finding counts, observe_failure() an audit that
+    raised instead (its wall time is still in the duration histogram). Labels are check and cache
+    names, status classes and (bounded by max_pages) page URLs.
+    """
+
+    def __init__(self, max_pages=MAX_PAGES):
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self.sections = {}        # name -> Histogram
+        self.requests = {}        # status class -> [count, bytes, Histogram]
+        self.audits = 0
+        self.failures = 0
+        self.audit_wall = Histogram(AUDIT_BUCKETS)
+        self.pages = OrderedDict()   # page -> (score, {category key: count})
+
+    def install(self):
+        profiler.add_hook(self.on_event)
+        return self
+
+    def uninstall(self):
+        profiler.remove_hook(self.on_event)
+
+    def on_event(self, event, data):
+        with self._lock:
+            if event == 'section':
+                hist = self.sections.get(data['name'])
+                if hist is None:
+                    hist = self.sections[data['name']] = Histogram(SECTION_BUCKETS)
+                hist.observe(data['wall'])
+            elif event == 'request':
+                entry = self.requests.get(status_class(data['status']))
+                if entry is None:
+                    entry = self.requests[status_class(data['status'])] = [0, 0, Histogram(LATENCY_BUCKETS)]
+                entry[0] += 1
+                entry[1] += data['bytes'] or 0
+                entry[2].observe(data['elapsed'])
+            elif event == 'page':
+                self.audit_wall.observe(data['total_wall'])
+
+    def observe_audit(self, report_data):
+        """Record one audit's score and distinct finding counts (build_report_data() output)."""
+        page = report_data.get('url') or report_data.get('title') or 'unknown'
+        counts = {CATEGORY_KEYS.get(cat, cat): finding_count({cat: data})
+                  for cat, data in report_data['issues_data'].items()}
+        with self._lock:
+            self.audits += 1
+            self.pages.pop(page, None)
+            self.pages[page] = (report_data['score'], counts)
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+
+    def observe_failure(self):
+        """Count an audit that failed after it started (so it has no score)."""
+        with self._lock:
+            self.failures += 1
+
+    def families(self):
+        """[(name, type, help, [(suffix, labels, value)])] for everything collected so far."""
+        with self._lock:
+            fams = [
+                ('audits', 'counter', "Audits completed.", [('_total', (), self.audits)]),
+                ('audit_failures', 'counter', "Audits that raised before completing.",
+                 [('_total', (), self.failures)]),
+                ('audit_duration_seconds', 'histogram', "Wall time of a whole audit, failed or not.",
+                 list(self.audit_wall.samples(()))),
+                ('page_score', 'gauge', "Health score of the page's latest audit.",
+                 [('', (('page', page),), score) for page, (score, _) in self.pages.items()]),
+                ('page_findings', 'gauge', "Distinct findings per category in the page's latest audit.",
+                 [('', (('page', page), ('category', cat)), n)
+                  for page, (_, counts) in self.pages.items() for cat, n in counts.items()]),
+                ('section_duration_seconds', 'histogram',
+                 "Wall time of parsing, each check and each shared artifact.",
+                 [s for name, hist in sorted(self.sections.items())
+                  for s in hist.samples((('check', name),))]),
+                ('http_requests', 'counter', "HTTP requests made by checks, by status class.",
+                 [('_total', (('status_class', cls),), e[0]) for cls, e in sorted(self.requests.items())]),
+                ('http_response_bytes', 'counter', "Bytes fetched by checks, by status class.",
+                 [('_total', (('status_class', cls),), e[1]) for cls, e in sorted(self.requests.items())]),
+                ('http_request_duration_seconds', 'histogram', "Latency of HTTP requests made by checks.",
+                 [s for cls, e in sorted(self.requests.items())
+                  for s in e[2].samples((('status_class', cls),))]),
+            ]
+        caches = {name: s for name, s in sorted(net.cache_stats().items()) if 'hits' in s}
+        fams += [
+            ('cache_hits', 'counter', "Lookups answered from an in-memory cache.",
+             [('_total', (('cache', name),), s['hits']) for name, s in caches.items()]),
+            ('cache_misses', 'counter', "Lookups an in-memory cache could not answer.",
+             [('_total', (('cache', name),), s['misses']) for name, s in caches.items()]),
+            ('cache_hit_ratio', 'gauge', "Share of lookups answered from the cache.",
+             [('', (('cache', name),), s['hits'] / (s['hits'] + s['misses']))
+              for name, s in caches.items() if s['hits'] + s['misses']]),
+            ('cache_entries', 'gauge', "Entries held by an in-memory cache.",
+             [('', (('cache', name),), s['size']) for name, s in caches.items()]),
+        ]
+        return fams
+
+    def render(self, openmetrics=False, extra=()):
+        """Exposition text: Prometheus 0.0.4 (node_exporter textfile) or OpenMetrics 1.0.
+
+        extra is more families in the families() format, e.g. service gauges.
+        """
+        lines = []
+        for name, kind, text, samples in list(self.families()) + list(extra):
+            name = f"{PREFIX}_{name}"
+            # OpenMetrics names the counter family without its _total suffix;
+            # the Prometheus format types the sample name itself
+            family = name + ('_total' if kind == 'counter' and not openmetrics else '')
+            lines.append(f"# HELP {family} {text}")
+            lines.append(f"# TYPE {family} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+def write_textfile(path, metrics):
+    """Write metrics for node_exporter's textfile collector, atomically (it may read at any time)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(metrics.render())
+    os.replace(tmp, path)
@@ -0,0 +1,124 @@
+import re
+import hashlib
+
+# Signature length; BANDS * ROWS must equal it
+NUM_BINS = 128
+BANDS = 16
+ROWS = 8
+# Pages at least this similar (estimated Jaccard of their shingle sets) are clustered.
+# With 16 bands of 8 rows, pairs above ~0.7 almost always share a bucket.
+SIMILARITY_THRESHOLD = 0.8
+SHINGLE_SIZE = 5
+
+TOKEN_RE = re.compile(r'\w+')
+_VALUE_BITS = 64 - (NUM_BINS.bit_length() - 1)
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def shingles(tokens, size=SHINGLE_SIZE, prefix=''):
+    """Overlapping size-grams of tokens (one shingle of everything if there are fewer)."""
+    if len(tokens) <= size:
+        return {prefix + ' '.join(tokens)} if tokens else set()
+    return {prefix + ' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+def page_shingles(index):
+    """Word shingles of the visible text plus shingles of the tag sequence, from a DocumentIndex."""
+    words = TOKEN_RE.findall(' '.join(text for text, _ in index.prose).lower())
+    return shingles(words) | shingles(index.tag_names, prefix='<>')
+
+def signature(shingle_set):
+    """One-permutation MinHash: the minimum hash per bin, with empty bins densified.
+
+    Each shingle is hashed once (not once per permutation); its low bits pick
+    a bin and the rest is the value. Empty bins borrow the next non-empty
+    bin's value, offset by the distance, so small pages still compare fairly.
+    """
+    bins = [None] * NUM_BINS
+    for shingle in shingle_set:
+        h = _hash64(shingle)
+        b, value = h % NUM_BINS, h // NUM_BINS
+        if bins[b] is None or value < bins[b]:
+            bins[b] = value
+    if all(v is None for v in bins):
+        return (0,) * NUM_BINS
+    sig = []
+    for b in range(NUM_BINS):
+        step = 0
+        while bins[(b + step) % NUM_BINS] is None:
+            step += 1
+        sig.append(bins[(b + step) % NUM_BINS] + (step << _VALUE_BITS))
+    return tuple(sig)
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_BINS
+
+class NearDuplicates:
+    """Incremental LSH clustering of page signatures.
+
+    Each signature is split into BANDS bands; pages sharing a band are
+    candidates and only candidates are compared, so adding a page costs
+    time proportional to its candidates, not to the pages seen so far.
+    The earliest page of a cluster is its representative.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.signatures = {}    # key -> signature, in insertion order
+        self.buckets = {}       # (band, rows) -> keys
+        self.parent = {}        # union-find over keys
+        self.order = {}         # key -> insertion number
+
+    def _find(self, key):
+        root = key
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[key] != root:
+            self.parent[key], key = root, self.parent[key]
+        return root
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            if self.order[rb] < self.order[ra]:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+    def add(self, key, sig):
+        """Index a page; returns the representative of the cluster it joins, or None."""
+        self.signatures[key] = sig
+        self.parent[key] = key
+        self.order[key] = len(self.order)
+        candidates = set()
+        for band in range(BANDS):
+            bucket = self.buckets.setdefault((band, sig[band * ROWS:(band + 1) * ROWS]), [])
+            candidates.update(bucket)
+            bucket.append(key)
+        for other in candidates:
+            if similarity(sig, self.signatures[other]) >= self.threshold:
+                self._union(key, other)
+        root = self._find(key)
+        return root if root != key else None
+
+    def clusters(self):
+        """[{'representative', 'members', 'similarity'}] for every cluster of two or more pages.
+
+        members lists every page (representative first); similarity is the
+        lowest estimated similarity of a member to the representative.
+        """
+        groups = {}
+        for key in self.signatures:
+            groups.setdefault(self._find(key), []).append(key)
+        found = []
+        for root, members in groups.items():
+            if len(members) < 2:
+                continue
+            rep_sig = self.signatures[root]
+            found.append({
+                'representative': root,
+                'members': members,
+                'similarity': min(similarity(rep_sig, self.signatures[k]) for k in members[1:]),
+            })
+        found.sort(key=lambda c: -len(c['members']))
+        return found
@@ -0,0 +1,354 @@
+import time
+import random
+import socket
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+
+USER_AGENT = 'WebsiteChecker/1.0'
+
+MISSING = object()
+
+# Status/reason reported for URLs on a host whose circuit is open
+HOST_UNREACHABLE = 'host_unreachable'
+# Consecutive connection failures (timeouts, refused, DNS errors) that open a host's circuit
+FAILURE_THRESHOLD = 3
+# Seconds an open circuit waits before letting one probe request through
+RETRY_AFTER = 30.0
+
+# Reason reported for URLs still answering 429/503 after every retry; not a broken link
+THROTTLED = 'throttled'
+THROTTLE_STATUSES = (429, 503)
+# Per-host request rate (requests/second): start, floor and ceiling for AIMD
+INITIAL_RATE = 4.0
+MIN_RATE = 0.5
+MAX_RATE = 20.0
+# Requests a host may receive back to back before the rate applies
+BURST = 4
+# Rate added per fast response; factor applied on a throttled or slow one
+RATE_INCREASE = 0.5
+RATE_DECREASE = 0.5
+# A response slower than this counts as the host struggling
+SLOW_RESPONSE = 2.0
+# Retries after a 429/503, and the longest wait (Retry-After or backoff) worth making
+MAX_RETRIES = 3
+MAX_RETRY_WAIT = 30.0
+BACKOFF_BASE = 0.5
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ttl seconds (None = never)."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key, MISSING)
+            if entry is not MISSING:
+                value, stored = entry
+                if self.ttl is None or time.monotonic() - stored < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+# Shared across every page analyzed by this process, so a long-running
+# service (or a batch) does not re-fetch the same URLs.
+link_cache = TTLCache(maxsize=20000, ttl=300)         # href -> broken reason or None
+image_size_cache = TTLCache(maxsize=20000, ttl=300)   # src -> (status, content-length)
+stylesheet_cache = TTLCache(maxsize=2000, ttl=300)    # href -> CSS text or None
+
+dns_cache = TTLCache(maxsize=2000, ttl=300)           # getaddrinfo args -> addresses
+
+class HostHealth:
+    """Per-host circuit breaker shared by every network check.
+
+    After FAILURE_THRESHOLD consecutive connection failures a host's circuit
+    opens and allow() refuses its URLs at once, so callers report
+    HOST_UNREACHABLE instead of waiting out a timeout per URL. Once
+    retry_after seconds have passed, one caller is let through as a
+    half-open probe: success closes the circuit, failure re-opens it.
+    Any HTTP response, even an error status, counts as success. A probe
+    that ends with neither (cancelled, throttled, an error that says
+    nothing about the host) must call release() so another can be let
+    through; callers do so in a finally around every request.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, retry_after=RETRY_AFTER):
+        self.threshold = threshold
+        self.retry_after = retry_after
+        self.fast_failures = 0
+        self._hosts = {}    # host -> [consecutive failures, opened at or None, probing thread or 0]
+        self._lock = threading.Lock()
+
+    def allow(self, url):
+        """True if a request to url's host may go ahead."""
+        host = host_of(url)
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state[1] is None:
+                return True
+            if not state[2] and time.monotonic() - state[1] >= self.retry_after:
+                state[2] = threading.get_ident()
+                return True
+            self.fast_failures += 1
+            return False
+
+    def success(self, url):
+        with self._lock:
+            self._hosts.pop(host_of(url), None)
+
+    def failure(self, url):
+        with self._lock:
+            state = self._hosts.setdefault(host_of(url), [0, None, 0])
+            state[0] += 1
+            # A failed half-open probe re-opens the circuit for another retry_after
+            if state[0] >= self.threshold or state[2]:
+                state[1] = time.monotonic()
+            state[2] = 0
+
+    def release(self, url):
+        """End this thread's half-open probe of url's host if success()/failure() did not.
+
+        The circuit stays open, and the next caller after retry_after probes
+        again. A no-op for callers that were not the probe.
+        """
+        with self._lock:
+            state = self._hosts.get(host_of(url))
+            if state is not None and state[2] == threading.get_ident():
+                state[2] = 0
+
+    def state(self, url):
+        """'closed', 'open' or 'half_open' for url's host."""
+        with self._lock:
+            state = self._hosts.get(host_of(url))
+        if state is None or state[1] is None:
+            return 'closed'
+        return 'half_open' if state[2] else 'open'
+
+    def clear(self):
+        with self._lock:
+            self._hosts.clear()
+            self.fast_failures = 0
+
+    def __len__(self):
+        return len(self._hosts)
+
+    def stats(self):
+        with self._lock:
+            open_hosts = sum(1 for s in self._hosts.values() if s[1] is not None)
+        return {'size': len(self._hosts), 'open': open_hosts, 'fast_failures': self.fast_failures}
+
+host_health = HostHealth()
+
+class RateController:
+    """Per-host token bucket whose rate adapts to how the host responds (AIMD).
+
+    acquire() blocks until the host has a token. feedback() adds RATE_INCREASE
+    to the host's rate after each fast response and multiplies it by
+    RATE_DECREASE after a 429/503 or a response slower than SLOW_RESPONSE, at
+    most once per second so a burst of throttled replies counts once. A
+    Retry-After header holds every request to the host until it has passed.
+    """
+
+    def __init__(self, rate=INITIAL_RATE, burst=BURST, min_rate=MIN_RATE, max_rate=MAX_RATE):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.throttled = 0
+        self.waited = 0.0
+        self._hosts = {}    # host -> [rate, tokens, refilled at, blocked until, last decrease]
+        self._lock = threading.Lock()
+
+    def _state(self, host, now):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = [self.rate, float(self.burst), now, 0.0, 0.0]
+        return state
+
+    def acquire(self, url, max_wait=MAX_RETRY_WAIT):
+        """Wait for a token for url's host; False (without waiting) if that takes over max_wait."""
+        host = host_of(url)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                state = self._state(host, now)
+                state[1] = min(self.burst, state[1] + (now - state[2]) * state[0])
+                state[2] = now
+                wait = state[3] - now
+                if wait <= 0:
+                    if state[1] >= 1:
+                        state[1] -= 1
+                        self.waited += waited
+                        return True
+                    wait = (1 - state[1]) / state[0]
+                if waited + wait > max_wait:
+                    self.waited += waited
+                    return False
+            time.sleep(wait)
+            waited += wait
+
+    def feedback(self, url, status, elapsed, retry_after=None):
+        """Adjust url's host rate from one response (status None for no response)."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(host_of(url), now)
+            throttled = status in THROTTLE_STATUSES
+            if throttled:
+                self.throttled += 1
+                state[1] = 0.0
+                if retry_after:
+                    state[3] = max(state[3], now + retry_after)
+            if throttled or elapsed > SLOW_RESPONSE:
+                if now - state[4] >= 1.0:
+                    state[0] = max(self.min_rate, state[0] * RATE_DECREASE)
+                    state[4] = now
+            elif status is not None:
+                state[0] = min(self.max_rate, state[0] + RATE_INCREASE)
+
+    def host_rate(self, url):
+        with self._lock:
+            state = self._hosts.get(host_of(url))
+            return state[0] if state else self.rate
+
+    def clear(self):
+        with self._lock:
+            self._hosts.clear()
+            self.throttled = 0
+            self.waited = 0.0
+
+    def __len__(self):
+        return len(self._hosts)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._hosts), 'throttled': self.throttled,
+                    'waited': round(self.waited, 3)}
+
+rate_controller = RateController()
+
+CACHES = {
+    'links': link_cache,
+    'image_sizes': image_size_cache,
+    'stylesheets': stylesheet_cache,
+    'dns': dns_cache,
+    'hosts': host_health,
+    'rates': rate_controller,
+}
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+def connection_failed(exc):
+    """True if a requests exception means the host was not reached (refused, DNS, timeout)."""
+    import requests
+    return (isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+            and not isinstance(exc, requests.exceptions.SSLError))
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number attempt (0-based), or None to give up.
+
+    Full jitter: a random wait up to BACKOFF_BASE * 2**attempt, so requests
+    throttled together do not retry together. A Retry-After longer than
+    MAX_RETRY_WAIT is not worth waiting for.
+    """
+    if attempt >= MAX_RETRIES or (retry_after or 0) > MAX_RETRY_WAIT:
+        return None
+    return random.uniform(0, min(BACKOFF_BASE * 2 ** attempt, MAX_RETRY_WAIT))
+
+_getaddrinfo = socket.getaddrinfo
+_dns_installed = False
+
+def _cached_getaddrinfo(host, port, *args, **kwargs):
+    key = (host, port, args, tuple(sorted(kwargs.items())))
+    cached = dns_cache.get(key)
+    if cached is MISSING:
+        # Failures are not cached: one transient resolver error must not fail
+        # the host for the whole TTL (the circuit breaker covers dead hosts)
+        cached = _getaddrinfo(host, port, *args, **kwargs)
+        dns_cache.set(key, cached)
+    return list(cached)
+
+def install_dns_cache():
+    """Route socket.getaddrinfo through dns_cache (successful answers only), once per process.
+
+    requests and urllib both resolve through getaddrinfo, so every URL on a
+    host after the first skips the lookup.
+    """
+    global _dns_installed
+    if not _dns_installed:
+        socket.getaddrinfo = _cached_getaddrinfo
+        _dns_installed = True
+
+_local = threading.local()
+_ssl_context = None
+
+def get_session():
+    """Per-thread requests.Session so connection pools stay warm between pages."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        install_dns_cache()
+        import requests
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT})
+        _local.session = session
+    return session
+
+def get_ssl_context():
+    """Unverified SSL context for link checks, created on first use."""
+    global _ssl_context
+    if _ssl_context is None:
+        install_dns_cache()
+        import ssl
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        _ssl_context = ctx
+    return _ssl_context
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+def clear_caches():
+    for cache in CACHES.values():
+        cache.clear()
@@ -0,0 +1,105 @@
+import random
+import string
+
+DEFAULT_PARAMS = {
+    'elements': 200,        # wrapper <div>s (DOM size)
+    'depth': 4,             # nesting depth of wrapper groups
+    'images': 20,
+    'links': 40,
+    'css_rules': 100,
+    'text_nodes': 150,
+    'secret_density': 0.0,  # fraction of text nodes carrying a fake API key
+    'external_links': 0,    # links/images/stylesheets pointing at base_url
+    'external_images': 0,
+    'external_stylesheets': 0,
+}
+
+# Parameters that grow with the target page size; the rest stay fixed
+SCALED_PARAMS = ('elements', 'images', 'links', 'css_rules', 'text_nodes')
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+         "tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam").split()
+
+def _fake_secret(rng):
+    return 'AKIA' + ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(16))
+
+def _sentence(rng, n=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+def generate_page(base_url=None, seed=0, **params):
+    """Build a synthetic HTML page; see DEFAULT_PARAMS for the tunables.
+
+    base_url is where external links/images/stylesheets point (e.g. a
+    local_server.StandInServer); without it they are left out.
+    """
+    p = dict(DEFAULT_PARAMS)
+    p.update(params)
+    rng = random.Random(seed)
+
+    head = ['<!DOCTYPE html>', '<html lang="en">', '<head>',
+            f'<title>Synthetic Page {seed}</title>',
+            '<meta name="viewport" content="width=device-width, initial-scale=1">']
+    rules = []
+    for i in range(p['css_rules']):
+        kind = i % 3
+        sel = f'.c{i}' if kind == 0 else f'#d{i}' if kind == 1 else ('p', 'a', 'span')[i % 3]
+        rules.append(f'{sel} {{ color: #{rng.randrange(0x1000000):06x}; '
+                     f'background-color: #{rng.randrange(0x1000000):06x}; margin: {i % 10}px; }}')
+    head.append('<style>\n' + '\n'.join(rules) + '\n</style>')
+    if base_url:
+        for i in range(p['external_stylesheets']):
+            head.append(f'<link rel="stylesheet" href="{base_url}/css/{i}.css">')
+    head.append('</head>')
+
+    # Content items distributed across the wrapper elements
+    items = []
+    for i in range(p['images']):
+        alt = f' alt="image {i}"' if i % 3 else ''
+        img = f'<img src="/img/{i}.png"{alt} width="100" height="80">'
+        items.append(f'<a href="/page/{i}">{img}</a>' if i % 5 == 0 else img)
+    for i in range(p['links']):
+        if i % 7 == 0:
+            items.append(f'<a id="l{i}" class="c{i % 50}"></a>')
+        else:
+            items.append(f'<a href="/page/{i}" class="c{i % 50}">{rng.choice(WORDS)} link {i}</a>')
+    for i in range(p['text_nodes']):
+        text = _sentence(rng)
+        if p['secret_density'] and rng.random() < p['secret_density']:
+            text += f' api_key = "{_fake_secret(rng)}"'
+        items.append(f'<p class="c{i % 50}">{text}</p>')
+    if base_url:
+        for i in range(p['external_links']):
+            path = f'/status/404/l{i}' if i % 10 == 0 else f'/page/{i}'
+            items.append(f'<a href="{base_url}{path}">external {i}</a>')
+        for i in range(p['external_images']):
+            path = f'/size/{300 * 1024}/{i}.png' if i % 4 == 0 else f'/size/{20 * 1024}/{i}.png'
+            items.append(f'<img src="{base_url}{path}" alt="remote {i}">')
+    rng.shuffle(items)
+
+    body = ['<body>', '<main>']
+    n_elem = max(p['elements'], 1)
+    depth = max(p['depth'], 1)
+    per_elem = len(items) / n_elem
+    pos = 0.0
+    open_divs = 0
+    for i in range(n_elem):
+        body.append(f'<div id="d{i}" class="c{i % 50} section">')
+        open_divs += 1
+        start, pos = int(pos), pos + per_elem
+        body.extend(items[start:int(pos)])
+        if open_divs == depth or i == n_elem - 1:
+            body.append('</div>' * open_divs)
+            open_divs = 0
+    body.extend(items[int(pos):])
+    body += ['</main>', '</body>', '</html>']
+    return '\n'.join(head + body)
+
+def params_for_size(target_bytes, base_url=None, **overrides):
+    """Scale DEFAULT_PARAMS (plus overrides) so generate_page() is roughly target_bytes."""
+    p = dict(DEFAULT_PARAMS)
+    p.update(overrides)
+    probe = len(generate_page(base_url=base_url, **p).encode('utf-8'))
+    factor = target_bytes / probe
+    for key in SCALED_PARAMS:
+        p[key] = max(1, int(p[key] * factor))
+    return p
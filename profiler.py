@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+
+_hooks = []
+_lock = threading.Lock()
+# The profiler collecting for the current thread; threads doing work for a
+# page (e.g. check workers) call activate() with that page's profiler.
+_state = threading.local()
+
+def add_hook(callback):
+    """Subscribe callback(event, data) to 'section', 'request' and 'page' events."""
+    if callback not in _hooks:
+        _hooks.append(callback)
+    return callback
+
+def remove_hook(callback):
+    if callback in _hooks:
+        _hooks.remove(callback)
+
+def emit(event, data):
+    for hook in list(_hooks):
+        try:
+            hook(event, data)
+        except Exception:
+            # A broken subscriber must never break an audit
+            pass
+
+def active():
+    return getattr(_state, 'profiler', None)
+
+def activate(prof):
+    """Route this thread's record_request() calls to prof (None to detach)."""
+    _state.profiler = prof
+
+def record_request(url, status, nbytes=0, elapsed=0.0):
+    """Called by network-touching checks for every request they make."""
+    prof = active()
+    if prof is not None:
+        prof.add_request(url, status, nbytes, elapsed)
+    elif _hooks:
+        emit('request', {'url': url, 'status': status, 'bytes': nbytes, 'elapsed': elapsed})
+
+class Profiler:
+    """Per-page timings, network stats and (optionally) peak memory and cProfile stats.
+
+    Wall/CPU timings are always collected since they cost next to nothing;
+    tracemalloc only runs when detailed=True and cProfile when cprofile=True.
+    Set pstats_path before stop() to dump the cProfile stats to a file.
+    """
+
+    def __init__(self, detailed=False, cprofile=False):
+        self.detailed = detailed
+        self.cprofile = cprofile
+        self.pstats_path = None
+        self.stats = None
+        self.timings = {}
+        self.requests = []
+        self.peak_memory = None
+        self._cprofile = None
+        self._started_tracemalloc = False
+        self._wall_start = None
+
+    def start(self):
+        activate(self)
+        self._wall_start = time.perf_counter()
+        if self.detailed:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+        if self.cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        return self
+
+    def stop(self):
+        if self._cprofile is not None:
+            import pstats
+            self._cprofile.disable()
+            self.stats = pstats.Stats(self._cprofile)
+            self._cprofile = None
+            if self.pstats_path:
+                pstats_dir = os.path.dirname(self.pstats_path)
+                if pstats_dir:
+                    os.makedirs(pstats_dir, exist_ok=True)
+                self.stats.dump_stats(self.pstats_path)
+        if self.detailed:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        if active() is self:
+            activate(None)
+        emit('page', self.summary())
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def section(self, name):
+        return _Section(self, name)
+
+    def call(self, func, *args, **kwargs):
+        """Run func under a section named after it and return its result."""
+        with self.section(func.__name__):
+            return func(*args, **kwargs)
+
+    def add_timing(self, name, wall, cpu):
+        with _lock:
+            self.timings[name] = {'wall': wall, 'cpu': cpu}
+        emit('section', {'name': name, 'wall': wall, 'cpu': cpu})
+
+    def add_request(self, url, status, nbytes, elapsed):
+        entry = {'url': url, 'status': status, 'bytes': nbytes, 'elapsed': elapsed}
+        with _lock:
+            self.requests.append(entry)
+        emit('request', entry)
+
+    def summary(self):
+        latencies = sorted(r['elapsed'] for r in self.requests)
+        net = {
+            'count': len(latencies),
+            'bytes': sum(r['bytes'] for r in self.requests),
+            'total_latency': sum(latencies),
+            'max_latency': latencies[-1] if latencies else 0.0,
+            'median_latency': latencies[len(latencies) // 2] if latencies else 0.0,
+        }
+        total = time.perf_counter() - self._wall_start if self._wall_start else 0.0
+        return {
+            'timings': dict(self.timings),
+            'network': net,
+            'peak_memory': self.peak_memory,
+            'total_wall': total,
+        }
+
+    def format_table(self):
+        """Plain-text timing table, slowest first."""
+        lines = [f"{'Section':<32}{'Wall (ms)':>12}{'CPU (ms)':>12}"]
+        for name, t in sorted(self.timings.items(), key=lambda kv: -kv[1]['wall']):
+            lines.append(f"{name:<32}{t['wall']*1000:>12.1f}{t['cpu']*1000:>12.1f}")
+        s = self.summary()
+        net = s['network']
+        lines.append(f"Network: {net['count']} request(s), {net['bytes']/1024:.1f} KB, "
+                     f"median {net['median_latency']*1000:.0f} ms, max {net['max_latency']*1000:.0f} ms")
+        if s['peak_memory'] is not None:
+            lines.append(f"Peak memory: {s['peak_memory']/1024/1024:.1f} MB")
+        return '\n'.join(lines)
+
+class _Section:
+    __slots__ = ('prof', 'name', 'wall', 'cpu')
+
+    def __init__(self, prof, name):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.prof.add_timing(self.name, time.perf_counter() - self.wall, time.thread_time() - self.cpu)
+        return False
@@ -0,0 +1,458 @@
+import os
+import re
+import importlib.util
+from html import escape
+from issues import Issue, issue_text, issue_count
+
+# Optional PDF conversion; pdfkit itself is only imported when a PDF is requested
+PDF_EXPORT_AVAILABLE = importlib.util.find_spec('pdfkit') is not None
+
+def generate_report_filename(soup):
+    t = soup.find('title')
+    return report_filename_for_title(t.get_text() if t else None)
+
+def report_filename_for_title(title):
+    title = title.strip() if title is not None else "website_report"
+    safe_title = re.sub(r'\W+', '_', title)
+    return f"{safe_title}_report.html"
+
+def generate_explanations():
+    return {
+        'Exposed API Keys/JWTs': "Exposed keys/tokens let attackers access private resources.",
+        '508 Accessibility Issues': "Accessibility shortfalls affect disabled users.",
+        'Keyboard Accessibility Issues': "All features must be usable without a mouse.",
+        'Broken Links': "Dead links frustrate users and harm credibility.",
+        'Clickable Image Issues': "Images that appear clickable but do nothing confuse visitors.",
+        'Color Contrast Issues': "Low contrast text is hard to read.",
+        'Missing ARIA Labels': "Screen readers rely on ARIA for clarity.",
+        'Large Images (over 200KB)': "Huge images slow page loads.",
+        'HTTPS Compliance': "Insecure HTTP can expose user data.",
+        'Outdated HTML Tags': "Deprecated tags may break in modern browsers.",
+        'Missing Alt Text': "Alt text is crucial for accessibility.",
+        'Responsive Viewport': "Mobile usability requires a proper viewport tag.",
+        'Modern Doctype': "HTML5 doctype recommended for modern standards.",
+        'Layout Tables': "Tables for layout hamper responsiveness.",
+        'Page Performance (Web Vitals)': "Blocking resources, unsized and eagerly loaded images slow rendering and shift layout.",
+        'Unused CSS': "CSS rules nothing on the page uses still have to be downloaded and parsed.",
+        'Possible Misspellings': "Typos in visible text undermine credibility."
+    }
+
+def write_profile_table(f, profile):
+    """Append the per-check timing table recorded with --profile."""
+    f.write("""
+<h2>Performance Profile</h2>
+<table class="profile-table" id="profile-details">
+<tr><th>Section</th><th>Wall (ms)</th><th>CPU (ms)</th></tr>""")
+    timings = sorted(profile['timings'].items(), key=lambda kv: -kv[1]['wall'])
+    for name, t in timings:
+        f.write(f"<tr><td>{name}</td><td>{t['wall']*1000:.1f}</td><td>{t['cpu']*1000:.1f}</td></tr>")
+    f.write("</table>")
+    net = profile['network']
+    f.write(f"<p>Network: {net['count']} request(s), {net['bytes']/1024:.1f} KB, "
+            f"median latency {net['median_latency']*1000:.0f} ms, "
+            f"max {net['max_latency']*1000:.0f} ms.</p>")
+    if profile.get('peak_memory') is not None:
+        f.write(f"<p>Peak memory: {profile['peak_memory']/1024/1024:.1f} MB.</p>")
+
+def write_resource_table(f, resources):
+    """Append page weight, per-resource transfer/caching details and the load waterfall."""
+    f.write(f"""
+<h2>Page Weight &amp; Load Waterfall</h2>
+<p>{resources['transfer_bytes']/1024:.1f} KB transferred ({resources['decoded_bytes']/1024:.1f} KB
+uncompressed) in {resources['requests'] + 1} request(s); {resources['failed']} failed.</p>
+<table class="profile-table" id="resource-details">
+<tr><th>Type</th><th>Requests</th><th>Transferred (KB)</th><th>Uncompressed (KB)</th></tr>""")
+    for kind, t in sorted(resources['by_type'].items(), key=lambda kv: -kv[1]['transfer_bytes']):
+        f.write(f"<tr><td>{kind}</td><td>{t['count']}</td><td>{t['transfer_bytes']/1024:.1f}</td>"
+                f"<td>{t['decoded_bytes']/1024:.1f}</td></tr>")
+    f.write("</table>")
+    for issue in resources['issues']:
+        count = issue_count(issue)
+        f.write(f"<p class='description'>{escape(issue_text(issue))}{f' &times;{count}' if count > 1 else ''}</p>")
+    for name, w in resources['waterfall'].items():
+        load = w['load'] or 1
+        f.write(f"""
+<h3>{name} ({w['kbps']:g} kbps, {w['rtt']*1000:.0f} ms RTT): first render ~{w['first_render']:.2f}s,
+load ~{w['load']:.2f}s</h3>
+<table class="profile-table waterfall">""")
+        for url, start, end in w['timeline']:
+            left, width = start / load * 100, max((end - start) / load * 100, 0.5)
+            f.write(f"<tr><td class='url'>{url}</td><td style='width:60%'><div class='bar' "
+                    f"style='margin-left:{left:.1f}%;width:{width:.1f}%'></div></td>"
+                    f"<td>{start:.2f}&ndash;{end:.2f}s</td></tr>")
+        f.write("</table>")
+
+def write_image_table(f, images):
+    """Append intrinsic vs. rendered size and re-encoding estimates per image."""
+    f.write(f"""
+<h2>Image Decode Analysis</h2>
+<p>{len(images['images'])} image(s), {images['bytes']/1024:.1f} KB; about {images['savings']/1024:.1f} KB
+could be saved by serving them at their displayed size (allowing for 2x screens) in the smallest format.</p>
+<table class="profile-table" id="image-details">
+<tr><th>Image</th><th>Format</th><th>Intrinsic</th><th>Displayed</th><th>KB</th><th>Best (KB)</th><th>Saving (KB)</th></tr>""")
+    for row in images['images']:
+        size = f"{row['size'][0]}x{row['size'][1]}" if row['size'] else '?'
+        shown = f"{row['rendered'][0]}x{row['rendered'][1]} ({row['ratio']:.1f}x)" if row['rendered'] else '-'
+        best = (f"{row['encoded'][row['best_format']]/1024:.1f} as {row['best_format']}"
+                if row['best_format'] else '-')
+        f.write(f"<tr><td class='url'>{row['url']}</td><td>{row['format'] or row['status']}</td>"
+                f"<td>{size}</td><td>{shown}</td><td>{row['bytes']/1024:.1f}</td><td>{best}</td>"
+                f"<td>{row['savings']/1024:.1f}</td></tr>")
+    f.write("</table>")
+    for issue in images['issues']:
+        count = issue_count(issue)
+        f.write(f"<p class='description'>{escape(issue_text(issue))}{f' &times;{count}' if count > 1 else ''}</p>")
+
+def write_delta_section(f, delta):
+    """Append the score change and resolved findings of a delta report (audit_diff.py)."""
+    change = delta['new_score'] - delta['old_score']
+    f.write(f"""
+<section id="audit-delta" data-old-score="{delta['old_score']:g}" data-new-score="{delta['new_score']:g}"
+         data-added="{delta['added']}" data-unchanged="{delta['unchanged']}">
+<h2>Changes Since Previous Audit</h2>
+<p>Score {delta['old_score']:g} &rarr; {delta['new_score']:g} ({change:+g}): {delta['added']} finding(s)
+added, {len(delta['removed'])} resolved, {delta['unchanged']} unchanged. Only the added findings are
+listed below.</p>""")
+    if delta['removed']:
+        f.write("<h3>Resolved</h3><ul>")
+        for cat, text in delta['removed']:
+            f.write(f"<li data-category='{escape(cat)}'>{escape(text)}</li>")
+        f.write("</ul>")
+    f.write("</section>")
+
+def generate_site_report(report_filename, site_data, page_link=None):
+    """Aggregate report for a batch: every page's score plus site-wide findings.
+
+    page_link(page) gives the HTML naming a page wherever it is listed; by
+    default a link to its HTML report next to the site report.
+    """
+    pages = site_data['pages']
+    link = page_link or (lambda page: f"<a href='{page['report']}'>{page['title']}</a>")
+    with open(report_filename, 'w', encoding='utf-8') as f:
+        f.write(f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <title>Site Analysis Report</title>
+    <meta charset="UTF-8">
+    <style>
+    body {{
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+        background-color: #1e1e1e; color: #c7c7c7; margin: 0; padding: 0;
+    }}
+    h1, h2, h3 {{ color: #fff; }}
+    h1 {{ background-color: #252526; padding: 20px; margin: 0; text-align: center; }}
+    header, main, footer {{ margin: 0 auto; max-width: 900px; padding: 20px; }}
+    a {{ color: #4ea1d3; }}
+    .description {{ font-style: italic; color: #9b9b9b; margin-top: 10px; }}
+    .site-table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }}
+    .site-table th, .site-table td {{ padding: 4px 8px; text-align: left; border-bottom: 1px solid #3e3e42; }}
+    </style>
+</head>
+<body>
+<header>
+    <h1>Site Analysis Report</h1>
+</header>
+<main>
+<h2>Pages</h2>
+<p>{len(pages)} page(s) analyzed; average score {site_data['average_score']:.1f}/100.</p>
+<table class="site-table" id="site-pages">
+<tr><th>Page</th><th>URL</th><th>Score</th><th>Issues</th></tr>""")
+        for page in pages:
+            f.write(f"<tr><td>{link(page)}</td><td>{page['url']}</td>"
+                    f"<td>{page['score']}</td><td>{page['issues']}</td></tr>")
+        f.write("</table>")
+
+        duplicates = site_data.get('duplicates') or []
+        f.write("""
+<h2>Near-Duplicate Pages</h2>
+<p class="description">Pages whose visible text and tag structure are nearly identical (e.g. clones of
+one template) are grouped; their findings usually only need reviewing once.</p>""")
+        if duplicates:
+            f.write("""<table class="site-table" id="site-duplicates">
+<tr><th>Representative</th><th>Near duplicates</th><th>Similarity</th></tr>""")
+            for group in duplicates:
+                rep = group['representative']
+                others = ', '.join(link(p) for p in group['pages'][1:])
+                f.write(f"<tr><td>{link(rep)}</td><td>{others}</td>"
+                        f"<td>&ge; {group['similarity']:.0%}</td></tr>")
+            f.write("</table>")
+        else:
+            f.write("<p>No near-duplicate pages found.</p>")
+
+        internal = site_data.get('internal_links') or {'checked': 0, 'broken': [], 'uncaptured': []}
+        f.write(f"""
+<h2>Internal Links</h2>
+<p class="description">Links between the analyzed pages are checked offline against the pages
+themselves, including their #fragment targets. {internal['checked']} link(s) checked;
+{len(internal['uncaptured'])} point to pages outside this batch and were not checked.</p>""")
+        if internal['broken']:
+            f.write("""<table class="site-table" id="site-internal-links">
+<tr><th>Page</th><th>Link</th><th>Target page</th><th>Problem</th></tr>""")
+            for broken in internal['broken']:
+                page, target = broken['page'], broken['target']
+                f.write(f"<tr><td>{link(page)}</td>"
+                        f"<td>{broken['href']}</td><td>{target['title'] if target else '-'}</td>"
+                        f"<td>{broken['reason'].replace('_', ' ')}</td></tr>")
+            f.write("</table>")
+        else:
+            f.write("<p>No broken internal links found.</p>")
+
+        unused = site_data.get('unused_css') or []
+        f.write("""
+<h2>Unused CSS Across the Site</h2>
+<p class="description">A rule counts as unused only if no analyzed page that links the stylesheet uses it.</p>""")
+        if unused:
+            f.write("""<table class="site-table" id="site-unused-css">
+<tr><th>Stylesheet</th><th>Pages</th><th>Unused rules</th><th>Unused (KB)</th><th>Examples</th></tr>""")
+            for row in unused:
+                f.write(f"<tr><td>{row['source']}</td><td>{row['pages']}</td>"
+                        f"<td>{row['unused_rules']} of {row['rules']}</td>"
+                        f"<td>{row['unused_bytes']/1024:.1f} of {row['bytes']/1024:.1f}</td>"
+                        f"<td>{', '.join(row['samples'])}</td></tr>")
+            f.write("</table>")
+        else:
+            f.write("<p>No linked stylesheets were analyzed.</p>")
+        f.write("""
+</main>
+<footer><p>End of report.</p></footer>
+</body>
+</html>""")
+
+def generate_report(report_filename, report_data, generate_pdf=False):
+    """Create an HTML report; optionally convert to PDF if pdfkit is available."""
+    title = report_data['title']
+    url = report_data['url']
+    author = report_data.get('author_name', 'NOVAMKR, LLC')
+    score = report_data['score']
+    deductions = report_data.get('deductions', {})
+    issues_data = report_data['issues_data']
+    notes = report_data.get('notes', {})
+    profile = report_data.get('profile')
+    resources = report_data.get('resources')
+    images = report_data.get('images')
+    incomplete = report_data.get('incomplete', [])
+    skipped = report_data.get('skipped', [])
+    skip_reason = report_data.get('skip_reason') or "Some checks were not run"
+    delta = report_data.get('delta')
+    explanations = generate_explanations()
+
+    sev_levels = {
+        'Exposed API Keys/JWTs': 'high',
+        '508 Accessibility Issues': 'high',
+        'Keyboard Accessibility Issues': 'high',
+        'Broken Links': 'high',
+        'Clickable Image Issues': 'medium',
+        'Color Contrast Issues': 'medium',
+        'Missing ARIA Labels': 'medium',
+        'Large Images (over 200KB)': 'low',
+        'HTTPS Compliance': 'low',
+        'Outdated HTML Tags': 'low',
+        'Missing Alt Text': 'info',
+        'Responsive Viewport': 'low',
+        'Modern Doctype': 'low',
+        'Layout Tables': 'low',
+        'Page Performance (Web Vitals)': 'medium',
+        'Unused CSS': 'low',
+        'Possible Misspellings': 'info'
+    }
+    sev_colors = {
+        'high': '#c0392b',
+        'medium': '#b89a00',
+        'low': '#27ae60',
+        'info': '#2980b9',
+        'none': '#b0b0b0'
+    }
+
+    # Maintain a sorted category display
+    order = [
+        'Exposed API Keys/JWTs',
+        '508 Accessibility Issues',
+        'Keyboard Accessibility Issues',
+        'Broken Links',
+        'Clickable Image Issues',
+        'Color Contrast Issues',
+        'Missing ARIA Labels',
+        'Large Images (over 200KB)',
+        'HTTPS Compliance',
+        'Outdated HTML Tags',
+        'Missing Alt Text',
+        'Responsive Viewport',
+        'Modern Doctype',
+        'Layout Tables',
+        'Page Performance (Web Vitals)',
+        'Unused CSS',
+        'Possible Misspellings'
+    ]
+
+    with open(report_filename, 'w', encoding='utf-8') as f:
+        f.write(f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <title>Website Analysis Report</title>
+    <meta charset="UTF-8">
+    <style>
+    body {{
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+        background-color: #1e1e1e; color: #c7c7c7; margin: 0; padding: 0;
+    }}
+    h1, h2, h3 {{ color: #fff; }}
+    h1 {{ background-color: #252526; padding: 20px; margin: 0; text-align: center; }}
+    header, main, footer {{ margin: 0 auto; max-width: 800px; padding: 20px; }}
+    ul {{ list-style-type: none; padding: 0; }}
+    li {{ background-color: #2d2d2d; margin: 5px 0; padding: 10px; border-radius: 5px; }}
+    .description {{ font-style: italic; color: #9b9b9b; margin-top: 10px; }}
+    .health-bar-container {{
+        background-color: rgba(255,255,255,0.1);
+        border-radius: 5px; overflow: hidden; margin-top: 20px;
+        cursor: pointer; position: relative;
+    }}
+    .health-bar {{
+        height: 30px; width: {score}%;
+        background-color: {"#c0392b" if score < 50 else "#b89a00" if score < 80 else "#27ae60"};
+        transition: width 0.5s, background-color 0.5s; opacity: 0.8;
+    }}
+    .health-score-text {{
+        position: absolute; top: 0; left: 50%; transform: translateX(-50%);
+        line-height: 30px; color: #fff; font-weight: bold;
+    }}
+    .collapsible {{
+        background-color: #252526; color: #fff; cursor: pointer; padding: 10px;
+        width: 100%; border: none; text-align: left; outline: none; font-size: 15px;
+        margin-top: 10px; border-radius: 5px;
+    }}
+    .collapsible:hover {{ background-color: #313135; }}
+    .content {{
+        padding: 0 18px; max-height: 0; overflow: hidden;
+        transition: max-height 0.2s ease-out; background-color: #2d2d30; margin-bottom: 10px;
+    }}
+    .content ul {{ padding: 10px; }}
+    .section-title {{ padding: 10px; border-radius: 5px; margin-top: 10px; }}
+    .note {{ font-style: italic; color: #9b9b9b; display: block; margin-top: 5px; }}
+    .occurrences {{ color: #9b9b9b; font-size: 0.9em; }}
+    .incomplete {{ color: #e67e22; font-weight: bold; }}
+    .profile-table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }}
+    .waterfall .bar {{ background-color: #2980b9; height: 10px; }}
+    .waterfall .url {{ max-width: 260px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; }}
+    .profile-table th, .profile-table td {{ padding: 4px 8px; text-align: left; border-bottom: 1px solid #3e3e42; }}
+    </style>
+</head>
+<body>
+<header>
+    <h1>Website Analysis Report</h1>
+</header>
+<main>
+    <h2>Website Analyzed</h2>
+    <p>Title: {escape(title)}</p>
+    <p>URL: <a href="{escape(url)}" target="_blank" style="color: #c7c7c7;">{escape(url)}</a></p>
+    <p>Report generated by: {author}</p>
+    <h2>Summary of Issues Detected</h2>
+    <p>Breakdown of potential issues. Click categories for details.</p>
+    <h2>Website Health Score</h2>
+    <div class="health-bar-container" onclick="toggleScoreDetails()">
+        <div class="health-bar"></div>
+        <div class="health-score-text">{score}/100</div>
+    </div>
+    <div id="score-details" style="display:none; margin-top: 10px;">
+        <p>Score is based on critical vs minor issues. Deductions below:</p>
+        <ul>""")
+        for dtitle, points in deductions.items():
+            if points > 0:
+                f.write(f"<li>{escape(dtitle)}: {points} points</li>")
+        f.write("""</ul>
+    </div>
+    <p class="description">Click the bar above to view/hide deduction breakdown.</p>
+""")
+        if incomplete:
+            f.write(f"""<p class="incomplete">Some checks did not finish within the time budget
+and are not reflected in the score: {', '.join(incomplete)}.</p>
+""")
+        if skipped:
+            f.write(f"""<p class="incomplete">{skip_reason}: {', '.join(skipped)}.</p>
+""")
+        if delta:
+            write_delta_section(f, delta)
+
+        # Render each category in predefined order
+        for cat in order:
+            cat_issues = issues_data.get(cat, {}).get('issues', [])
+            count = len(cat_issues)
+            severity = sev_levels.get(cat, 'none')
+            color = sev_colors.get(severity, '#fff')
+
+            f.write(f"""
+<button type="button" class="collapsible section-title"
+        style="background-color:{color if count > 0 else '#555'};color:#fff;">
+    {escape(cat)} ({count}){' - incomplete' if cat in incomplete else ''}{' - not run' if cat in skipped else ''}
+</button>
+<div class="content">""")
+            if cat in incomplete:
+                f.write("<p class='incomplete'>This check ran out of time; results are incomplete.</p>")
+
+            if count > 0:
+                distinct = sum(1 for _ in cat_issues)
+                if distinct < count:
+                    f.write(f"<p>{count} issue(s) found ({distinct} distinct).</p><ul>")
+                else:
+                    f.write(f"<p>{count} issue(s) found.</p><ul>")
+                cat_expl_shown = False
+                short_expl = explanations.get(cat, '')
+                for issue in cat_issues:
+                    text = issue_text(issue)
+                    occurrences = issue_count(issue)
+                    # Findings quote markup ("<font>", "<style>"); unescaped it would become part of the page
+                    f.write(f"<li data-count='{occurrences}'>{escape(text)}")
+                    locations = issue.locations() if isinstance(issue, Issue) else ''
+                    if occurrences > 1 or locations:
+                        f.write(f"<span class='occurrences'> &times;{occurrences}"
+                                f"{' at ' + locations if locations else ''}</span>")
+                    if short_expl and not cat_expl_shown:
+                        f.write(f"<br><span class='note'>{short_expl}</span>")
+                        cat_expl_shown = True
+                    # If we track user notes
+                    if cat in notes and text in notes[cat]:
+                        f.write(f"<br><span class='note'>{escape(notes[cat][text])}</span>")
+                    f.write("</li>")
+                f.write("</ul>")
+            else:
+                f.write("<p>0 issues found.</p>")
+            f.write("""<p class="description">
+Please address these issues to improve security, compliance, and user experience.
+</p></div>""")
+
+        if resources:
+            write_resource_table(f, resources)
+        if images:
+            write_image_table(f, images)
+        if profile:
+            write_profile_table(f, profile)
+
+        f.write("""
+</main>
+<footer><p>End of report.</p></footer>
+<script>
+function toggleScoreDetails(){
+    var d = document.getElementById("score-details");
+    if(d.style.display===""||d.style.display==="none"){d.style.display="block";}
+    else{d.style.display="none";}
+}
+var coll = document.getElementsByClassName("collapsible");
+for(var i=0;i<coll.length;i++){
+    coll[i].addEventListener("click",function(){
+        this.classList.toggle("active");
+        var content=this.nextElementSibling;
+        if(content.style.maxHeight){
+            content.style.maxHeight=null;
+        } else{
+            content.style.maxHeight=content.scrollHeight+"px";
+        }
+    });
+}
+</script>
+</body>
+</html>""")
+
+    if generate_pdf and PDF_EXPORT_AVAILABLE:
+        import pdfkit
+        pdf_filename = os.path.splitext(report_filename)[0] + ".pdf"
+        pdfkit.from_file(report_filename, pdf_filename)
+        print(f"PDF generated: {pdf_filename}")
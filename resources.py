@@ -0,0 +1,417 @@
+import re
+import time
+import zlib
+import importlib.util
+from urllib.parse import urljoin, urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import net
+import profiler
+from dom_index import get_index
+from issues import IssueList, location_of
+from scheduler import checkpoint
+
+POOL_SIZE = 8
+# Enough for any real subresource; larger bodies are cut off and marked truncated
+MAX_RESOURCE_BYTES = 20 * 1024 * 1024
+# Cache lifetimes below this are reported as short
+MIN_CACHE_SECONDS = 7 * 24 * 3600
+# RTTs spent opening a connection: DNS + TCP, plus TLS for https
+SETUP_RTTS = {'http': 2, 'https': 3}
+
+# name -> downlink bandwidth (kbit/s) and round-trip time (seconds)
+NETWORK_PROFILES = {
+    'slow-3g': {'kbps': 400, 'rtt': 0.4},
+    '4g': {'kbps': 1600, 'rtt': 0.15},
+    'cable': {'kbps': 5000, 'rtt': 0.028},
+}
+DEFAULT_PROFILES = ('4g',)
+
+BROTLI_AVAILABLE = (importlib.util.find_spec('brotli') is not None
+                    or importlib.util.find_spec('brotlicffi') is not None)
+ACCEPT_ENCODING = 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate'
+COMPRESSIBLE_TYPES = ('text/', 'javascript', 'json', 'xml', 'svg', 'font/ttf', 'font/otf')
+
+FONT_FACE_RE = re.compile(r'@font-face\s*{([^}]*)}', re.I)
+CSS_URL_RE = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)')
+
+net.CACHES['resources'] = resource_cache = net.TTLCache(maxsize=5000, ttl=300)
+
+def parse_profile(spec):
+    """A NETWORK_PROFILES name, or a custom 'name=KBPS/RTT_MS' (e.g. 'dsl=2000/50')."""
+    if spec in NETWORK_PROFILES:
+        return spec, NETWORK_PROFILES[spec]
+    name, _, rest = spec.partition('=')
+    kbps, _, rtt_ms = rest.partition('/')
+    try:
+        kbps, rtt_ms = float(kbps), float(rtt_ms)
+    except ValueError:
+        kbps = rtt_ms = None
+    if not name or kbps is None or kbps <= 0 or rtt_ms < 0:
+        raise ValueError(f"unknown network profile {spec!r}; use one of "
+                         f"{', '.join(NETWORK_PROFILES)} or NAME=KBPS/RTT_MS")
+    return name, {'kbps': kbps, 'rtt': rtt_ms / 1000}
+
+def page_base(soup):
+    """Absolute URL relative references resolve against: <base href>, canonical or og:url."""
+    candidates = []
+    base = soup.find('base', href=True)
+    if base:
+        candidates.append(base['href'])
+    canonical = soup.find('link', rel='canonical')
+    if canonical:
+        candidates.append(canonical.get('href') or '')
+    og_url = soup.find('meta', attrs={'property': 'og:url'})
+    if og_url:
+        candidates.append(og_url.get('content') or '')
+    for url in candidates:
+        if url.startswith(('http://', 'https://')):
+            return url
+    return None
+
+def absolute_url(url, base):
+    """url made absolute against base; None for data: URLs and anything not http(s)."""
+    url = (url or '').strip()
+    if url.startswith('//'):
+        url = 'https:' + url
+    elif base and not url.startswith(('http://', 'https://', 'data:')):
+        url = urljoin(base, url)
+    return url if url.startswith(('http://', 'https://')) else None
+
+def collect_resources(soup, base=None):
+    """Subresources referenced by the page, in document order, deduplicated.
+
+    Each entry: {'url', 'type' (script/stylesheet/image/font), 'blocking', 'location'}.
+    Relative URLs are only fetchable when the page declares where it lives.
+    """
+    base = base or page_base(soup)
+    index = get_index(soup)
+    found = {}
+
+    def add(url, kind, tag, blocking=False):
+        url = absolute_url(url, base)
+        if url and url not in found:
+            found[url] = {'url': url, 'type': kind, 'blocking': blocking,
+                          'location': location_of(tag)}
+
+    for tag in soup.find_all(['script', 'link', 'img']):
+        if tag.name == 'script' and tag.get('src'):
+            blocking = (index.context(tag).in_head and tag.get('type') != 'module'
+                        and not (tag.has_attr('async') or tag.has_attr('defer')))
+            add(tag['src'], 'script', tag, blocking)
+        elif tag.name == 'link' and tag.get('href'):
+            rel = [r.lower() for r in tag.get('rel', [])]
+            if 'stylesheet' in rel and 'alternate' not in rel:
+                media = (tag.get('media') or '').strip().lower()
+                add(tag['href'], 'stylesheet', tag, media in ('', 'all', 'screen'))
+            elif 'preload' in rel and tag.get('as') in ('font', 'image', 'script', 'style'):
+                kind = {'style': 'stylesheet'}.get(tag['as'], tag['as'])
+                add(tag['href'], kind, tag)
+        elif tag.name == 'img' and tag.get('src'):
+            add(tag['src'], 'image', tag)
+    return list(found.values())
+
+def font_urls(css_text, css_url):
+    """First URL of every @font-face block: the format a browser would try first."""
+    urls = []
+    for block in FONT_FACE_RE.findall(css_text):
+        for src in re.findall(r'src\s*:([^;]*)', block, re.I):
+            match = CSS_URL_RE.search(src)
+            if match:
+                url = absolute_url(match.group(1), css_url)
+                if url:
+                    urls.append(url)
+                break
+    return urls
+
+def _decode(body, encoding):
+    """Decoded size of a response body, or None for an encoding we cannot undo."""
+    encoding = (encoding or '').lower().strip()
+    if encoding in ('', 'identity'):
+        return body
+    try:
+        if encoding in ('gzip', 'x-gzip'):
+            return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        if encoding == 'deflate':
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+        if encoding == 'br' and BROTLI_AVAILABLE:
+            try:
+                import brotli
+            except ImportError:
+                import brotlicffi as brotli
+            return brotli.decompress(body)
+    except Exception:
+        pass
+    return None
+
+def cache_lifetime(headers):
+    """(seconds, reason) the response may be cached for; seconds is None if uncacheable/unknown."""
+    from email.utils import parsedate_to_datetime
+    cache_control = (headers.get('Cache-Control') or '').lower()
+    directives = {}
+    for part in cache_control.split(','):
+        key, _, value = part.strip().partition('=')
+        if key:
+            directives[key] = value.strip('"')
+    if 'no-store' in directives or 'no-cache' in directives:
+        return None, 'no-store/no-cache'
+    for key in ('s-maxage', 'max-age'):
+        if directives.get(key, '').isdigit():
+            return int(directives[key]), f"{key}={directives[key]}"
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            remaining = parsedate_to_datetime(expires).timestamp() - time.time()
+            return max(0, int(remaining)), 'Expires'
+        except (TypeError, ValueError):
+            return 0, 'Expires'
+    return None, 'no Cache-Control or Expires'
+
+def fetch_resource(url):
+    """GET one subresource and measure it; results are cached per URL.
+
+    Returns {'url', 'status', 'content_type', 'encoding', 'transfer_bytes',
+    'decoded_bytes', 'gzip_bytes', 'cache_seconds', 'cache_reason', 'elapsed',
+    'body'} where body is the decoded text for stylesheets (for font discovery).
+    """
+    import requests
+    cached = resource_cache.get(url)
+    if cached is not net.MISSING:
+        return cached
+    started = time.perf_counter()
+    info = {'url': url, 'status': None, 'content_type': '', 'encoding': '', 'transfer_bytes': 0,
+            'decoded_bytes': 0, 'gzip_bytes': None, 'cache_seconds': None,
+            'cache_reason': '', 'elapsed': 0.0, 'truncated': False, 'body': None}
+    if not net.host_health.allow(url):
+        info['status'] = net.HOST_UNREACHABLE
+        return info
+    try:
+        if not net.rate_controller.acquire(url):
+            info['status'] = net.THROTTLED
+            return info
+        resp = net.get_session().get(url, timeout=15, stream=True,
+                                     headers={'Accept-Encoding': ACCEPT_ENCODING})
+        # Raw wire bytes: what actually crossed the network
+        raw = resp.raw.read(MAX_RESOURCE_BYTES + 1, decode_content=False)
+        resp.close()
+        net.host_health.success(url)
+    except requests.exceptions.RequestException as e:
+        info['elapsed'] = time.perf_counter() - started
+        profiler.record_request(url, None, 0, info['elapsed'])
+        net.rate_controller.feedback(url, None, info['elapsed'])
+        if net.connection_failed(e):
+            net.host_health.failure(url)
+            info['status'] = net.HOST_UNREACHABLE
+            return info
+        resource_cache.set(url, info)
+        return info
+    finally:
+        net.host_health.release(url)
+    info['elapsed'] = time.perf_counter() - started
+    info['truncated'] = len(raw) > MAX_RESOURCE_BYTES
+    raw = raw[:MAX_RESOURCE_BYTES]
+    info['status'] = resp.status_code
+    info['content_type'] = resp.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    info['encoding'] = resp.headers.get('Content-Encoding', '').lower()
+    info['transfer_bytes'] = len(raw)
+    decoded = _decode(raw, info['encoding'])
+    info['decoded_bytes'] = len(decoded) if decoded is not None else len(raw)
+    if decoded is not None and not info['encoding'] and any(
+            t in info['content_type'] for t in COMPRESSIBLE_TYPES):
+        info['gzip_bytes'] = len(zlib.compress(decoded, 6))
+    info['cache_seconds'], info['cache_reason'] = cache_lifetime(resp.headers)
+    if decoded is not None and 'css' in info['content_type']:
+        info['body'] = decoded.decode(resp.encoding or 'utf-8', errors='replace')
+    profiler.record_request(url, resp.status_code, len(raw), info['elapsed'])
+    net.rate_controller.feedback(url, resp.status_code, info['elapsed'],
+                                 net.parse_retry_after(resp.headers.get('Retry-After')))
+    if resp.status_code not in net.THROTTLE_STATUSES:
+        resource_cache.set(url, info)
+    return info
+
+def fetch_all(urls, pool_size=POOL_SIZE):
+    """fetch_resource for every URL on a bounded thread pool; returns {url: info}."""
+    prof = profiler.active()
+
+    def fetch(url):
+        profiler.activate(prof)
+        try:
+            return fetch_resource(url)
+        finally:
+            profiler.activate(None)
+
+    fetched = {}
+    if not urls:
+        return fetched
+    pool = ThreadPoolExecutor(max_workers=min(pool_size, len(urls)))
+    try:
+        futures = [pool.submit(fetch, url) for url in urls]
+        for future in as_completed(futures):
+            checkpoint()
+            info = future.result()
+            fetched[info['url']] = info
+    finally:
+        # Do not wait for stragglers when the check was cancelled
+        pool.shutdown(wait=False, cancel_futures=True)
+    return fetched
+
+def simulate_waterfall(entries, profile, html_bytes, page_origin=None, preconnects=()):
+    """Estimated load timeline of the page under one bandwidth/RTT profile.
+
+    The document downloads first; subresources are discovered when it
+    finishes, fonts when their stylesheet finishes. Each new origin pays
+    connection setup (SETUP_RTTS; preconnected origins start theirs at time
+    zero), every request one RTT to first byte, and all transfers in flight
+    share the bandwidth equally.
+    Returns {'first_render', 'load', 'timeline': [(url, start, end), ...]}.
+    """
+    bandwidth = profile['kbps'] * 1000 / 8
+    rtt = profile['rtt']
+    connections = {}
+    for origin in preconnects:
+        connections[origin] = SETUP_RTTS.get(origin.split(':')[0], 3) * rtt
+
+    def ready_at(url, discovered):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in connections:
+            connections[origin] = discovered + SETUP_RTTS.get(parts.scheme, 3) * rtt
+        return max(discovered, connections[origin]) + rtt
+
+    doc_url = page_origin or 'https://document.invalid'
+    pending = [(ready_at(doc_url, 0.0), doc_url, html_bytes, None)]
+    waiting = {}    # stylesheet url -> fonts it reveals
+    for entry in entries:
+        if entry.get('parent'):
+            waiting.setdefault(entry['parent'], []).append(entry)
+    by_url = {e['url']: e for e in entries}
+    timeline = []
+    active = {}     # url -> [remaining bytes, start]
+    now = 0.0
+    while pending or active:
+        pending.sort()
+        next_start = pending[0][0] if pending else None
+        if active:
+            rate = bandwidth / len(active)
+            url, (left, _) = min(active.items(), key=lambda kv: kv[1][0])
+            finish = now + left / rate
+        else:
+            finish = None
+        if finish is None or (next_start is not None and next_start < finish):
+            # Advance to the next request's first byte
+            start, url, size, _ = pending.pop(0)
+            start = max(start, now)
+            if active:
+                spent = (start - now) * bandwidth / len(active)
+                for item in active.values():
+                    item[0] -= spent
+            now = start
+            active[url] = [float(size), now]
+            continue
+        for item in active.values():
+            item[0] -= left
+        now = finish
+        _, begun = active.pop(url)
+        timeline.append((url, begun, now))
+        if url == doc_url:
+            for entry in entries:
+                if not entry.get('parent'):
+                    pending.append((ready_at(entry['url'], now), entry['url'],
+                                    entry['transfer_bytes'], None))
+        for font in waiting.get(url, ()):
+            pending.append((ready_at(font['url'], now), font['url'], font['transfer_bytes'], None))
+    ends = {url: end for url, _, end in timeline}
+    doc_end = ends.get(doc_url, 0.0)
+    blocking = [ends[url] for url in ends if url in by_url and by_url[url].get('blocking')]
+    return {
+        'first_render': max([doc_end] + blocking),
+        'load': max(ends.values()) if ends else 0.0,
+        'timeline': timeline,
+    }
+
+def analyze_resources(soup, html_bytes, profiles=DEFAULT_PROFILES, pool_size=POOL_SIZE):
+    """Fetch every subresource and summarize page weight, compression, caching and timing."""
+    base = page_base(soup)
+    entries = collect_resources(soup, base)
+    fetched = fetch_all([e['url'] for e in entries], pool_size)
+
+    # Fonts are only known once their stylesheets are in
+    seen = {e['url'] for e in entries}
+    fonts = []
+    for entry in entries:
+        info = fetched.get(entry['url'])
+        if entry['type'] == 'stylesheet' and info and info['body']:
+            for url in font_urls(info['body'], entry['url']):
+                if url not in seen:
+                    seen.add(url)
+                    fonts.append({'url': url, 'type': 'font', 'blocking': False,
+                                  'location': entry['location'], 'parent': entry['url']})
+    for style in soup.find_all('style'):
+        if style.string:
+            for url in font_urls(style.string, base):
+                if url not in seen:
+                    seen.add(url)
+                    fonts.append({'url': url, 'type': 'font', 'blocking': False,
+                                  'location': location_of(style)})
+    fetched.update(fetch_all([f['url'] for f in fonts], pool_size))
+    entries += fonts
+
+    issues = IssueList()
+    for entry in entries:
+        info = fetched.get(entry['url']) or {}
+        for key in ('status', 'content_type', 'encoding', 'transfer_bytes', 'decoded_bytes',
+                    'gzip_bytes', 'cache_seconds', 'cache_reason', 'elapsed', 'truncated'):
+            entry[key] = info.get(key)
+        entry['transfer_bytes'] = entry['transfer_bytes'] or 0
+        entry['decoded_bytes'] = entry['decoded_bytes'] or 0
+        if entry['status'] != 200:
+            continue
+        if entry['gzip_bytes'] is not None and entry['decoded_bytes'] - entry['gzip_bytes'] > 1024:
+            issues.add(f"Served without compression: {entry['url']} "
+                       f"({entry['decoded_bytes']/1024:.1f} KB, ~{entry['gzip_bytes']/1024:.1f} KB gzipped)",
+                       entry['location'])
+        seconds = entry['cache_seconds']
+        if seconds is None:
+            issues.add(f"Not cached ({entry['cache_reason']}): {entry['url']}", entry['location'])
+        elif seconds < MIN_CACHE_SECONDS:
+            issues.add(f"Short cache lifetime ({seconds}s): {entry['url']}", entry['location'])
+
+    page_origin = None
+    if base:
+        parts = urlsplit(base)
+        page_origin = f"{parts.scheme}://{parts.netloc}"
+    preconnects = set()
+    for link in soup.find_all('link', href=True):
+        if {'preconnect', 'dns-prefetch'} & {r.lower() for r in link.get('rel', [])}:
+            parts = urlsplit(absolute_url(link['href'], base) or '')
+            if parts.netloc:
+                preconnects.add(f"{parts.scheme}://{parts.netloc}")
+    ok = [e for e in entries if e['status'] == 200]
+    waterfall = {}
+    for spec in profiles:
+        name, profile = parse_profile(spec)
+        sim = simulate_waterfall(ok, profile, html_bytes, page_origin, preconnects)
+        waterfall[name] = {'kbps': profile['kbps'], 'rtt': profile['rtt'],
+                           'first_render': sim['first_render'], 'load': sim['load'],
+                           'timeline': sim['timeline']}
+
+    by_type = {}
+    for entry in ok:
+        t = by_type.setdefault(entry['type'], {'count': 0, 'transfer_bytes': 0, 'decoded_bytes': 0})
+        t['count'] += 1
+        t['transfer_bytes'] += entry['transfer_bytes']
+        t['decoded_bytes'] += entry['decoded_bytes']
+    return {
+        'resources': entries,
+        'requests': len(entries),
+        'failed': len(entries) - len(ok),
+        'html_bytes': html_bytes,
+        'transfer_bytes': html_bytes + sum(e['transfer_bytes'] for e in ok),
+        'decoded_bytes': html_bytes + sum(e['decoded_bytes'] for e in ok),
+        'by_type': by_type,
+        'issues': issues,
+        'waterfall': waterfall,
+    }
@@ -1,18 +1,17 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
-from bs4 import BeautifulSoup
 import re
 import os
+import sys
+import importlib.util
+from html import escape
 
-try:
-    import pdfkit
-    PDF_EXPORT_AVAILABLE = True
-except ImportError:
-    PDF_EXPORT_AVAILABLE = False
+# tkinter, bs4 and pdfkit are imported on first use so the parsing/scoring
+# functions below can be used headless (no display, no GUI stack).
+PDF_EXPORT_AVAILABLE = importlib.util.find_spec('pdfkit') is not None
 
 REPORT_FILE_PATH = 'Web_Pricer_report.html'
 
 def parse_report(file_path):
+    from bs4 import BeautifulSoup
     with open(file_path, 'r', encoding='utf-8') as file:
         soup = BeautifulSoup(file, 'html.parser')
 
@@ -44,14 +43,20 @@ def parse_report(file_path):
     issues_data = {}
     for button in issue_sections:
         issue_title = button.get_text().strip()
-        count_match = re.search(r'\((\d+)\)', issue_title)
-        count = int(count_match.group(1)) if count_match else 0
-        category = issue_title.split('(')[0].strip()
+        # "<category> (<count>)[ - incomplete]"; category names may contain parentheses
+        count_match = re.match(r'(.*)\((\d+)\)', issue_title)
+        count = int(count_match.group(2)) if count_match else 0
+        category = (count_match.group(1) if count_match else issue_title.split('(')[0]).strip()
 
         content_div = button.find_next_sibling('div', class_='content')
         issues = []
         if content_div:
             for li in content_div.find_all('li'):
+                # Collapsed duplicates carry their occurrence count and sample locations
+                occ_span = li.find('span', class_='occurrences')
+                occurrences = occ_span.get_text(strip=True) if occ_span else ''
+                if occ_span:
+                    occ_span.extract()
                 note_span = li.find('span', class_='note')
                 note_text = note_span.get_text(strip=True) if note_span else ''
                 full_issue_text = li.get_text(separator=' ', strip=True)
@@ -59,17 +64,35 @@ def parse_report(file_path):
                     issue_text = full_issue_text.replace(note_text, '').strip()
                 else:
                     issue_text = full_issue_text
-                issues.append({'issue': issue_text, 'note': note_text})
+                issue_count = int(li.get('data-count', 1))
+                issues.append({'issue': issue_text, 'note': note_text,
+                               'count': issue_count, 'occurrences': occurrences})
 
         issues_data[category] = {'count': count, 'issues': issues}
 
-    return {
+    report_data = {
         'title': title,
         'url': url,
         'score': score,
         'deductions': deductions,
         'issues_data': issues_data
     }
+    # Delta reports (audit_diff.py) list only added findings plus this summary
+    delta_section = soup.find(id='audit-delta')
+    if delta_section:
+        report_data['delta'] = {
+            'old_score': float(delta_section['data-old-score']),
+            'new_score': float(delta_section['data-new-score']),
+            'added': int(delta_section['data-added']),
+            'unchanged': int(delta_section['data-unchanged']),
+            'removed': [(li.get('data-category', ''), li.get_text(strip=True))
+                        for li in delta_section.find_all('li')],
+        }
+    return report_data
+
+def occurrence_count(issue_list):
+    """Total findings in a category, counting collapsed duplicates individually."""
+    return sum(i.get('count', 1) if isinstance(i, dict) else 1 for i in issue_list)
 
 def generate_report(report_filename, report_data):
     title = report_data['title']
@@ -95,7 +118,10 @@ def generate_report(report_filename, report_data):
         'Missing Alt Text': "Screen readers need alt text to understand images.",
         'Responsive Viewport': "Lack of a proper viewport meta can cause zoom/scale issues.",
         'Modern Doctype': "HTML5 doctype is recommended for modern browsers and best practices.",
-        'Layout Tables': "Using <table> for layout is considered outdated and hinders responsiveness."
+        'Layout Tables': "Using <table> for layout is considered outdated and hinders responsiveness.",
+        'Page Performance (Web Vitals)': "Render-blocking resources and unsized or eagerly loaded images hurt LCP and CLS.",
+        'Unused CSS': "Unused CSS rules add download and style-calculation cost for nothing.",
+        'Possible Misspellings': "Spelling mistakes in visible text make the site look careless."
     }
 
     severity_levels = {
@@ -112,7 +138,10 @@ def generate_report(report_filename, report_data):
         'Missing Alt Text': 'information',
         'Responsive Viewport': 'low',
         'Modern Doctype': 'low',
-        'Layout Tables': 'low'
+        'Layout Tables': 'low',
+        'Page Performance (Web Vitals)': 'medium',
+        'Unused CSS': 'low',
+        'Possible Misspellings': 'information'
     }
 
     severity_colors = {
@@ -137,7 +166,10 @@ def generate_report(report_filename, report_data):
         ('Missing Alt Text', issues_data.get('Missing Alt Text', {}).get('issues', [])),
         ('Responsive Viewport', issues_data.get('Responsive Viewport', {}).get('issues', [])),
         ('Modern Doctype', issues_data.get('Modern Doctype', {}).get('issues', [])),
-        ('Layout Tables', issues_data.get('Layout Tables', {}).get('issues', []))
+        ('Layout Tables', issues_data.get('Layout Tables', {}).get('issues', [])),
+        ('Page Performance (Web Vitals)', issues_data.get('Page Performance (Web Vitals)', {}).get('issues', [])),
+        ('Unused CSS', issues_data.get('Unused CSS', {}).get('issues', [])),
+        ('Possible Misspellings', issues_data.get('Possible Misspellings', {}).get('issues', []))
     ]
 
     with open(report_filename, 'w', encoding='utf-8') as file:
@@ -265,8 +297,8 @@ def generate_report(report_filename, report_data):
             <main>
 
                 <h2>Website Analyzed</h2>
-                <p>Title: {title}</p>
-                <p>URL: <a href="{url}" target="_blank">{url}</a></p>
+                <p>Title: {escape(title)}</p>
+                <p>URL: <a href="{escape(url)}" target="_blank">{escape(url)}</a></p>
 
                 <p>Report generated by: {author_name}</p>
 
@@ -284,23 +316,26 @@ def generate_report(report_filename, report_data):
         """)
         for deduction_title, points in deductions.items():
             if points > 0:
-                file.write(f"<li>{deduction_title}: {points} points</li>")
+                file.write(f"<li>{escape(deduction_title)}: {points} points</li>")
         file.write("""
                     </ul>
                 </div>
                 <p class="description">Click the bar above to see how the score was calculated.</p>
         """)
+        if report_data.get('delta'):
+            from report import write_delta_section
+            write_delta_section(file, report_data['delta'])
 
         for issue_title, issue_list in issues_order:
             severity = severity_levels.get(issue_title, 'none')
             color = severity_colors.get(severity, '#ffffff')
-            count = len(issue_list)
+            count = occurrence_count(issue_list)
 
             file.write(f"""
                 <button type="button" class="collapsible section-title"
                         style="background-color: {color if count > 0 else '#ffffff'};
                                color: {'#ffffff' if count > 0 and color != '#ffffff' else '#000000'};">
-                    {issue_title} ({count})
+                    {escape(issue_title)} ({count})
                 </button>
                 <div class="content">
             """)
@@ -312,7 +347,9 @@ def generate_report(report_filename, report_data):
                 for issue_dict in issue_list:
                     issue_text = issue_dict['issue']
                     note_text = issue_dict.get('note', '')
-                    file.write(f"<li>{issue_text}")
+                    file.write(f"<li data-count='{issue_dict.get('count', 1)}'>{escape(issue_text)}")
+                    if issue_dict.get('occurrences'):
+                        file.write(f"<span class='occurrences'> {issue_dict['occurrences']}</span>")
 
                     short_expl = explanations.get(issue_title, "")
                     if short_expl and not cat_explanation_shown:
@@ -320,7 +357,7 @@ def generate_report(report_filename, report_data):
                         cat_explanation_shown = True
 
                     if note_text:
-                        file.write(f"<br><span class='note'>{note_text}</span>")
+                        file.write(f"<br><span class='note'>{escape(note_text)}</span>")
                     file.write("</li>")
                 file.write("</ul>")
             else:
@@ -365,6 +402,7 @@ def generate_report(report_filename, report_data):
         """)
 
     if PDF_EXPORT_AVAILABLE:
+        import pdfkit
         pdf_filename = os.path.splitext(report_filename)[0] + ".pdf"
         try:
             pdfkit.from_file(report_filename, pdf_filename)
@@ -375,20 +413,21 @@ def recalculate_score(issues_data):
     score = 100
 
     cat_counts = {
-        'Exposed API Keys/JWTs': len(issues_data.get('Exposed API Keys/JWTs', {}).get('issues', [])),
-        'Broken Links': len(issues_data.get('Broken Links', {}).get('issues', [])),
-        '508 Accessibility Issues': len(issues_data.get('508 Accessibility Issues', {}).get('issues', [])),
-        'Keyboard Accessibility Issues': len(issues_data.get('Keyboard Accessibility Issues', {}).get('issues', [])),
-        'Clickable Image Issues': len(issues_data.get('Clickable Image Issues', {}).get('issues', [])),
-        'Missing ARIA Labels': len(issues_data.get('Missing ARIA Labels', {}).get('issues', [])),
-        'Missing Alt Text': len(issues_data.get('Missing Alt Text', {}).get('issues', [])),
-        'HTTPS Compliance': len(issues_data.get('HTTPS Compliance', {}).get('issues', [])),
-        'Outdated HTML Tags': len(issues_data.get('Outdated HTML Tags', {}).get('issues', [])),
-        'Color Contrast Issues': len(issues_data.get('Color Contrast Issues', {}).get('issues', [])),
-        'Large Images (over 200KB)': len(issues_data.get('Large Images (over 200KB)', {}).get('issues', [])),
-        'Responsive Viewport': len(issues_data.get('Responsive Viewport', {}).get('issues', [])),
-        'Modern Doctype': len(issues_data.get('Modern Doctype', {}).get('issues', [])),
-        'Layout Tables': len(issues_data.get('Layout Tables', {}).get('issues', []))
+        'Exposed API Keys/JWTs': occurrence_count(issues_data.get('Exposed API Keys/JWTs', {}).get('issues', [])),
+        'Broken Links': occurrence_count(issues_data.get('Broken Links', {}).get('issues', [])),
+        '508 Accessibility Issues': occurrence_count(issues_data.get('508 Accessibility Issues', {}).get('issues', [])),
+        'Keyboard Accessibility Issues': occurrence_count(issues_data.get('Keyboard Accessibility Issues', {}).get('issues', [])),
+        'Clickable Image Issues': occurrence_count(issues_data.get('Clickable Image Issues', {}).get('issues', [])),
+        'Missing ARIA Labels': occurrence_count(issues_data.get('Missing ARIA Labels', {}).get('issues', [])),
+        'Missing Alt Text': occurrence_count(issues_data.get('Missing Alt Text', {}).get('issues', [])),
+        'HTTPS Compliance': occurrence_count(issues_data.get('HTTPS Compliance', {}).get('issues', [])),
+        'Outdated HTML Tags': occurrence_count(issues_data.get('Outdated HTML Tags', {}).get('issues', [])),
+        'Color Contrast Issues': occurrence_count(issues_data.get('Color Contrast Issues', {}).get('issues', [])),
+        'Large Images (over 200KB)': occurrence_count(issues_data.get('Large Images (over 200KB)', {}).get('issues', [])),
+        'Responsive Viewport': occurrence_count(issues_data.get('Responsive Viewport', {}).get('issues', [])),
+        'Modern Doctype': occurrence_count(issues_data.get('Modern Doctype', {}).get('issues', [])),
+        'Layout Tables': occurrence_count(issues_data.get('Layout Tables', {}).get('issues', [])),
+        'Page Performance (Web Vitals)': occurrence_count(issues_data.get('Page Performance (Web Vitals)', {}).get('issues', []))
     }
 
     # Major
@@ -419,25 +458,27 @@ def recalculate_score(issues_data):
         score -= 5
     if cat_counts['Layout Tables'] > 0:
         score -= 5
+    score -= min(cat_counts['Page Performance (Web Vitals)'] * 2, 10)
 
     return max(min(score, 100), 0)
 
 def calculate_deductions(issues_data):
     cat_counts = {
-        'Exposed API Keys/JWTs': len(issues_data.get('Exposed API Keys/JWTs', {}).get('issues', [])),
-        'Broken Links': len(issues_data.get('Broken Links', {}).get('issues', [])),
-        '508 Accessibility Issues': len(issues_data.get('508 Accessibility Issues', {}).get('issues', [])),
-        'Keyboard Accessibility Issues': len(issues_data.get('Keyboard Accessibility Issues', {}).get('issues', [])),
-        'Clickable Image Issues': len(issues_data.get('Clickable Image Issues', {}).get('issues', [])),
-        'Missing ARIA Labels': len(issues_data.get('Missing ARIA Labels', {}).get('issues', [])),
-        'Missing Alt Text': len(issues_data.get('Missing Alt Text', {}).get('issues', [])),
-        'HTTPS Compliance': len(issues_data.get('HTTPS Compliance', {}).get('issues', [])),
-        'Outdated HTML Tags': len(issues_data.get('Outdated HTML Tags', {}).get('issues', [])),
-        'Color Contrast Issues': len(issues_data.get('Color Contrast Issues', {}).get('issues', [])),
-        'Large Images (over 200KB)': len(issues_data.get('Large Images (over 200KB)', {}).get('issues', [])),
-        'Responsive Viewport': len(issues_data.get('Responsive Viewport', {}).get('issues', [])),
-        'Modern Doctype': len(issues_data.get('Modern Doctype', {}).get('issues', [])),
-        'Layout Tables': len(issues_data.get('Layout Tables', {}).get('issues', []))
+        'Exposed API Keys/JWTs': occurrence_count(issues_data.get('Exposed API Keys/JWTs', {}).get('issues', [])),
+        'Broken Links': occurrence_count(issues_data.get('Broken Links', {}).get('issues', [])),
+        '508 Accessibility Issues': occurrence_count(issues_data.get('508 Accessibility Issues', {}).get('issues', [])),
+        'Keyboard Accessibility Issues': occurrence_count(issues_data.get('Keyboard Accessibility Issues', {}).get('issues', [])),
+        'Clickable Image Issues': occurrence_count(issues_data.get('Clickable Image Issues', {}).get('issues', [])),
+        'Missing ARIA Labels': occurrence_count(issues_data.get('Missing ARIA Labels', {}).get('issues', [])),
+        'Missing Alt Text': occurrence_count(issues_data.get('Missing Alt Text', {}).get('issues', [])),
+        'HTTPS Compliance': occurrence_count(issues_data.get('HTTPS Compliance', {}).get('issues', [])),
+        'Outdated HTML Tags': occurrence_count(issues_data.get('Outdated HTML Tags', {}).get('issues', [])),
+        'Color Contrast Issues': occurrence_count(issues_data.get('Color Contrast Issues', {}).get('issues', [])),
+        'Large Images (over 200KB)': occurrence_count(issues_data.get('Large Images (over 200KB)', {}).get('issues', [])),
+        'Responsive Viewport': occurrence_count(issues_data.get('Responsive Viewport', {}).get('issues', [])),
+        'Modern Doctype': occurrence_count(issues_data.get('Modern Doctype', {}).get('issues', [])),
+        'Layout Tables': occurrence_count(issues_data.get('Layout Tables', {}).get('issues', [])),
+        'Page Performance (Web Vitals)': occurrence_count(issues_data.get('Page Performance (Web Vitals)', {}).get('issues', []))
     }
 
     deductions = {}
@@ -459,155 +500,176 @@ def calculate_deductions(issues_data):
     deductions['Responsive Viewport Deducted'] = 5 if cat_counts['Responsive Viewport'] > 0 else 0
     deductions['Modern Doctype Deducted'] = 5 if cat_counts['Modern Doctype'] > 0 else 0
     deductions['Layout Tables Deducted'] = 5 if cat_counts['Layout Tables'] > 0 else 0
+    deductions['Page Performance Deducted'] = min(cat_counts['Page Performance (Web Vitals)'] * 2, 10)
 
     return deductions
 
 def regenerate_report(report_data, report_filename):
     generate_report(report_filename, report_data)
 
-def update_report(to_remove, notes, issues_data, report_data, root):
+def update_report(to_remove, notes, issues_data, report_data, root, report_path=REPORT_FILE_PATH):
+    from tkinter import messagebox
     for category, issues_to_remove in to_remove.items():
         issues_data[category]['issues'] = [
             i for i in issues_data[category]['issues'] if i['issue'] not in issues_to_remove
         ]
-        issues_data[category]['count'] = len(issues_data[category]['issues'])
+        issues_data[category]['count'] = occurrence_count(issues_data[category]['issues'])
 
     if notes:
         report_data['notes'] = notes
 
-    new_score = recalculate_score(issues_data)
-    report_data['score'] = new_score
     report_data['issues_data'] = issues_data
-    report_data['deductions'] = calculate_deductions(issues_data)
+    delta = report_data.get('delta')
+    if delta:
+        # A delta lists only the added findings; the score covers the whole audit
+        new_score = report_data['score']
+        from issues import finding_count
+        delta['added'] = finding_count(issues_data)
+    else:
+        new_score = recalculate_score(issues_data)
+        report_data['score'] = new_score
+        report_data['deductions'] = calculate_deductions(issues_data)
 
     response = messagebox.askyesno("Save Report", "Do you want to overwrite the existing report?")
     if response:
-        report_filename = REPORT_FILE_PATH
+        report_filename = report_path
     else:
-        base, ext = os.path.splitext(REPORT_FILE_PATH)
+        base, ext = os.path.splitext(report_path)
         report_filename = f"{base}_final{ext}"
 
     regenerate_report(report_data, report_filename)
     messagebox.showinfo("Report Updated", f"The report has been updated. New score: {new_score}/100")
     root.destroy()
 
-report_data = parse_report(REPORT_FILE_PATH)
-issues_data = report_data.get('issues_data', {})
-
-root = tk.Tk()
-root.title("Review Report Issues")
-root.configure(bg='#1e1e1e')
-
-style = ttk.Style()
-style.theme_use('clam')
-style.configure('TNotebook', background='#1e1e1e')
-style.configure('TNotebook.Tab', background='#2d2d30', foreground='#c7c7c7')
-style.map('TNotebook.Tab', background=[('selected', '#252526')])
-style.configure('TFrame', background='#1e1e1e')
-style.configure('TLabel', background='#1e1e1e', foreground='#c7c7c7')
-style.configure('TCheckbutton', background='#1e1e1e', foreground='#c7c7c7')
-style.configure('TButton', background='#252526', foreground='#c7c7c7')
-style.map('TButton', background=[('active', '#313135')])
-style.configure('Horizontal.TScrollbar', background='#2d2d30')
-style.configure('Vertical.TScrollbar', background='#2d2d30')
-
-notebook = ttk.Notebook(root)
-notebook.pack(fill='both', expand=True)
-
-selected_issues = {}
-select_all_vars = {}
-
-for category, data in issues_data.items():
-    frame = tk.Frame(notebook, bg='#1e1e1e')
-    notebook.add(frame, text=f"{category} ({data['count']})")
-
-    canvas = tk.Canvas(frame, bg='#1e1e1e', highlightthickness=0)
-    scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-    canvas.configure(yscrollcommand=scrollbar.set)
-
-    scrollable_frame = tk.Frame(canvas, bg='#1e1e1e')
-    scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-
-    canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-    canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    select_all_var = tk.BooleanVar()
-    select_all_vars[category] = select_all_var
-    selected_issues[category] = []
-
-    def select_all(var, cat):
-        for issue_tuple in selected_issues[cat]:
-            issue_tuple[1].set(var.get())
-
-    chk_all = tk.Checkbutton(scrollable_frame, text="Select All",
-                             variable=select_all_var, bg='#1e1e1e', fg='#c7c7c7',
-                             activebackground='#1e1e1e', activeforeground='#c7c7c7',
-                             selectcolor='#2d2d2d',
-                             command=lambda v=select_all_var, c=category: select_all(v, c))
-    chk_all.pack(anchor='w')
-
-    for issue_dict in data['issues']:
-        issue = issue_dict['issue']
-        existing_note = issue_dict.get('note', '')
-        var = tk.BooleanVar()
-        note_var = tk.StringVar(value=existing_note)
-
-        frame_issue = tk.Frame(scrollable_frame, bg='#2d2d2d')
-        chk = tk.Checkbutton(frame_issue, text=issue, variable=var,
-                             bg='#2d2d2d', fg='#c7c7c7',
-                             activebackground='#2d2d2d',
-                             activeforeground='#c7c7c7',
-                             selectcolor='#3e3e42')
-        chk.pack(anchor='w')
-
-        note_entry = tk.Entry(frame_issue, textvariable=note_var, width=70,
-                              bg='#3e3e42', fg='#c7c7c7', insertbackground='#c7c7c7')
-        note_entry.pack(anchor='w', padx=20, pady=(2, 5))
-
-        frame_issue.pack(anchor='w', pady=2, fill='x')
-        selected_issues[category].append((issue, var, note_var, frame_issue))
-
-def on_delete():
-    to_remove = {}
-    for category, issues in selected_issues.items():
-        removed = [issue_text for (issue_text, var, note_var, frm) in issues if var.get()]
-        if removed:
-            to_remove[category] = removed
-            for t in issues:
-                if t[1].get():
-                    t[3].destroy()
-            selected_issues[category] = [x for x in issues if not x[1].get()]
-            for idx in range(notebook.index("end")):
-                if notebook.tab(idx, "text").startswith(category):
-                    new_count = len(selected_issues[category])
-                    notebook.tab(idx, text=f"{category} ({new_count})")
-                    break
-
-    update_report(to_remove, {}, issues_data, report_data, root)
-
-def on_update():
-    notes = {}
-    for category, issues in selected_issues.items():
-        for (issue_text, var, note_var, frm) in issues:
-            note_text = note_var.get()
-            for i_dict in issues_data[category]['issues']:
-                if i_dict['issue'] == issue_text:
-                    i_dict['note'] = note_text
-            if note_text:
-                if category not in notes:
-                    notes[category] = {}
-                notes[category][issue_text] = note_text
-
-    update_report({}, notes, issues_data, report_data, root)
-
-buttons_frame = tk.Frame(root, bg='#1e1e1e')
-buttons_frame.pack(pady=10)
-
-delete_button = ttk.Button(buttons_frame, text="Delete Selected", command=on_delete)
-delete_button.pack(side='left', padx=5)
-
-update_button = ttk.Button(buttons_frame, text="Save & Close", command=on_update)
-update_button.pack(side='left', padx=5)
-
-root.mainloop()
+def main(report_path=REPORT_FILE_PATH):
+    """Build the review GUI for report_path (a full or delta report) and run it."""
+    import tkinter as tk
+    from tkinter import ttk
+
+    report_data = parse_report(report_path)
+    issues_data = report_data.get('issues_data', {})
+
+    root = tk.Tk()
+    root.title("Review Report Issues")
+    root.configure(bg='#1e1e1e')
+
+    style = ttk.Style()
+    style.theme_use('clam')
+    style.configure('TNotebook', background='#1e1e1e')
+    style.configure('TNotebook.Tab', background='#2d2d30', foreground='#c7c7c7')
+    style.map('TNotebook.Tab', background=[('selected', '#252526')])
+    style.configure('TFrame', background='#1e1e1e')
+    style.configure('TLabel', background='#1e1e1e', foreground='#c7c7c7')
+    style.configure('TCheckbutton', background='#1e1e1e', foreground='#c7c7c7')
+    style.configure('TButton', background='#252526', foreground='#c7c7c7')
+    style.map('TButton', background=[('active', '#313135')])
+    style.configure('Horizontal.TScrollbar', background='#2d2d30')
+    style.configure('Vertical.TScrollbar', background='#2d2d30')
+
+    notebook = ttk.Notebook(root)
+    notebook.pack(fill='both', expand=True)
+
+    selected_issues = {}
+    select_all_vars = {}
+
+    for category, data in issues_data.items():
+        frame = tk.Frame(notebook, bg='#1e1e1e')
+        notebook.add(frame, text=f"{category} ({data['count']})")
+
+        canvas = tk.Canvas(frame, bg='#1e1e1e', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
+        canvas.configure(yscrollcommand=scrollbar.set)
+
+        scrollable_frame = tk.Frame(canvas, bg='#1e1e1e')
+        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+
+        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        select_all_var = tk.BooleanVar()
+        select_all_vars[category] = select_all_var
+        selected_issues[category] = []
+
+        def select_all(var, cat):
+            for issue_tuple in selected_issues[cat]:
+                issue_tuple[1].set(var.get())
+
+        chk_all = tk.Checkbutton(scrollable_frame, text="Select All",
+                                 variable=select_all_var, bg='#1e1e1e', fg='#c7c7c7',
+                                 activebackground='#1e1e1e', activeforeground='#c7c7c7',
+                                 selectcolor='#2d2d2d',
+                                 command=lambda v=select_all_var, c=category: select_all(v, c))
+        chk_all.pack(anchor='w')
+
+        for issue_dict in data['issues']:
+            issue = issue_dict['issue']
+            existing_note = issue_dict.get('note', '')
+            var = tk.BooleanVar()
+            note_var = tk.StringVar(value=existing_note)
+            label = issue
+            if issue_dict.get('count', 1) > 1:
+                label = f"{issue} (\u00d7{issue_dict['count']})"
+
+            frame_issue = tk.Frame(scrollable_frame, bg='#2d2d2d')
+            chk = tk.Checkbutton(frame_issue, text=label, variable=var,
+                                 bg='#2d2d2d', fg='#c7c7c7',
+                                 activebackground='#2d2d2d',
+                                 activeforeground='#c7c7c7',
+                                 selectcolor='#3e3e42')
+            chk.pack(anchor='w')
+
+            note_entry = tk.Entry(frame_issue, textvariable=note_var, width=70,
+                                  bg='#3e3e42', fg='#c7c7c7', insertbackground='#c7c7c7')
+            note_entry.pack(anchor='w', padx=20, pady=(2, 5))
+
+            frame_issue.pack(anchor='w', pady=2, fill='x')
+            selected_issues[category].append((issue, var, note_var, frame_issue))
+
+    def on_delete():
+        to_remove = {}
+        for category, issues in selected_issues.items():
+            removed = [issue_text for (issue_text, var, note_var, frm) in issues if var.get()]
+            if removed:
+                to_remove[category] = removed
+                for t in issues:
+                    if t[1].get():
+                        t[3].destroy()
+                selected_issues[category] = [x for x in issues if not x[1].get()]
+                for idx in range(notebook.index("end")):
+                    if notebook.tab(idx, "text").startswith(category):
+                        new_count = occurrence_count(
+                            [i for i in issues_data[category]['issues'] if i['issue'] not in removed])
+                        notebook.tab(idx, text=f"{category} ({new_count})")
+                        break
+
+        update_report(to_remove, {}, issues_data, report_data, root, report_path)
+
+    def on_update():
+        notes = {}
+        for category, issues in selected_issues.items():
+            for (issue_text, var, note_var, frm) in issues:
+                note_text = note_var.get()
+                for i_dict in issues_data[category]['issues']:
+                    if i_dict['issue'] == issue_text:
+                        i_dict['note'] = note_text
+                if note_text:
+                    if category not in notes:
+                        notes[category] = {}
+                    notes[category][issue_text] = note_text
+
+        update_report({}, notes, issues_data, report_data, root, report_path)
+
+    buttons_frame = tk.Frame(root, bg='#1e1e1e')
+    buttons_frame.pack(pady=10)
+
+    delete_button = ttk.Button(buttons_frame, text="Delete Selected", command=on_delete)
+    delete_button.pack(side='left', padx=5)
+
+    update_button = ttk.Button(buttons_frame, text="Save & Close", command=on_update)
+    update_button.pack(side='left', padx=5)
+
+    root.mainloop()
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else REPORT_FILE_PATH)
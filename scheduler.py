@@ -0,0 +1,134 @@
+import time
+import threading
+
+import profiler
+
+class CheckCancelled(Exception):
+    """Raised inside a check when its deadline passed or it was cancelled."""
+
+_state = threading.local()
+
+def checkpoint():
+    """Cancellation point for long-running checks; call once per URL/element.
+
+    A no-op outside the scheduler, so checks stay callable on their own.
+    """
+    token = getattr(_state, 'token', None)
+    if token is not None and token.expired():
+        raise CheckCancelled(token.name)
+
+class CancelToken:
+    __slots__ = ('name', 'deadline', '_event')
+
+    def __init__(self, name, deadline=None):
+        self.name = name
+        self.deadline = deadline
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def expired(self):
+        if self._event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+class Job:
+    """One check to run: results[key] = func(*args).
+
+    args may also be a callable returning the arguments; it is called when
+    the job starts, so inputs built on demand count against its deadline.
+    """
+    __slots__ = ('key', 'func', 'args', 'expensive')
+
+    def __init__(self, key, func, args, expensive=False):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.expensive = expensive
+
+class Scheduler:
+    """Run checks under a global time budget and per-check deadlines.
+
+    Cheap local checks run first, one after another; expensive (network or
+    CSS-heavy) checks then run concurrently on daemon threads. A check that
+    misses its deadline is cancelled at its next checkpoint() and reported
+    as incomplete instead of holding up the rest of the analysis.
+    """
+
+    def __init__(self, budget=None, check_timeout=None, deadlines=None, prof=None):
+        self.budget = budget
+        self.check_timeout = check_timeout
+        self.deadlines = deadlines or {}
+        self.prof = prof or profiler.Profiler()
+
+    def _deadline(self, job, budget_end):
+        timeout = self.deadlines.get(job.key, self.deadlines.get(job.func.__name__, self.check_timeout))
+        ends = [d for d in (budget_end, time.monotonic() + timeout if timeout else None) if d]
+        return min(ends) if ends else None
+
+    def _run_job(self, job, token, box):
+        _state.token = token
+        try:
+            args = job.args() if callable(job.args) else job.args
+            box['result'] = self.prof.call(job.func, *args)
+        except CheckCancelled:
+            pass
+        finally:
+            _state.token = None
+
+    def run(self, jobs):
+        """Return (results, incomplete_keys); incomplete checks have no entry in results."""
+        budget_end = time.monotonic() + self.budget if self.budget else None
+        results = {}
+        incomplete = []
+
+        # 1) Cheap local checks, in order
+        for job in (j for j in jobs if not j.expensive):
+            token = CancelToken(job.key, self._deadline(job, budget_end))
+            if token.expired():
+                incomplete.append(job.key)
+                continue
+            box = {}
+            self._run_job(job, token, box)
+            if 'result' in box:
+                results[job.key] = box['result']
+            else:
+                incomplete.append(job.key)
+
+        # 2) Expensive checks concurrently
+        running = []
+        for job in (j for j in jobs if j.expensive):
+            token = CancelToken(job.key, self._deadline(job, budget_end))
+            box = {}
+            thread = threading.Thread(target=self._worker, args=(job, token, box),
+                                      name=f"check-{job.key}", daemon=True)
+            thread.start()
+            running.append((job, token, box, thread))
+        for job, token, box, thread in running:
+            thread.join(token.remaining())
+            if thread.is_alive():
+                # Abandon it: the thread stops at its next checkpoint()
+                token.cancel()
+            elif 'error' in box:
+                raise box['error']
+            if 'result' in box and not thread.is_alive():
+                results[job.key] = box['result']
+            else:
+                incomplete.append(job.key)
+        return results, incomplete
+
+    def _worker(self, job, token, box):
+        profiler.activate(self.prof)
+        try:
+            self._run_job(job, token, box)
+        except Exception as e:
+            # Re-raised in the scheduling thread, as if the check ran there
+            box['error'] = e
+        finally:
+            profiler.activate(None)
@@ -0,0 +1,79 @@
+# Report category -> key of the matching list in the results dict
+RESULT_CATEGORIES = [
+    ('Exposed API Keys/JWTs', 'exposed_keys'),
+    ('508 Accessibility Issues', 'accessibility'),
+    ('Keyboard Accessibility Issues', 'keyboard_accessibility'),
+    ('Broken Links', 'broken_links'),
+    ('Clickable Image Issues', 'clickable_images'),
+    ('Color Contrast Issues', 'color_contrast'),
+    ('Missing ARIA Labels', 'missing_aria'),
+    ('Large Images (over 200KB)', 'large_images'),
+    ('HTTPS Compliance', 'https'),
+    ('Outdated HTML Tags', 'outdated_html'),
+    ('Missing Alt Text', 'missing_alt'),
+    ('Responsive Viewport', 'responsive_viewport'),
+    ('Modern Doctype', 'modern_doctype'),
+    ('Layout Tables', 'layout_tables'),
+    ('Page Performance (Web Vitals)', 'web_vitals'),
+    ('Unused CSS', 'unused_css_js'),
+    ('Possible Misspellings', 'grammar'),
+]
+
+def calculate_score(results):
+    """Generate overall site score (100 max)."""
+    score = 100
+    exposed = len(results['exposed_keys'])
+    broken_404 = len([b for b in results['broken_links'] if b[1] == '404'])
+    a11y = len(results['accessibility'])
+    kb_a11y = len(results['keyboard_accessibility'])
+    clickable_imgs = len(results['clickable_images'])
+    vitals = len(results['web_vitals'])
+
+    # Major
+    score -= min(exposed * 17, 35)
+    score -= min(broken_404 * 5, 25)
+    score -= min(a11y * 10, 20)
+    score -= min(kb_a11y * 10, 20)
+    score -= min(clickable_imgs * 5, 10)
+
+    # Minor
+    if results['missing_aria']:   score -= 5
+    if results['missing_alt']:    score -= 5
+    if results['https']:          score -= 5
+    if results['outdated_html']:  score -= 5
+    if results['large_images']:   score -= 5
+    if results['color_contrast']: score -= 5
+    if results['responsive_viewport']: score -= 5
+    if results['modern_doctype']:     score -= 5
+    if results['layout_tables']:      score -= 5
+    score -= min(vitals * 2, 10)
+
+    return max(min(score, 100), 0)
+
+def calculate_deductions(results):
+    d = {}
+    exposed = len(results['exposed_keys'])
+    broken_404 = len([b for b in results['broken_links'] if b[1] == '404'])
+    a11y = len(results['accessibility'])
+    kb_a11y = len(results['keyboard_accessibility'])
+    clickable_imgs = len(results['clickable_images'])
+    vitals = len(results['web_vitals'])
+
+    d['Exposed API Keys/JWTs Deducted']        = min(exposed * 17, 35)
+    d['Broken Links Deducted']                 = min(broken_404 * 5, 25)
+    d['508 Accessibility Issues Deducted']     = min(a11y * 10, 20)
+    d['Keyboard Accessibility Issues Deducted']= min(kb_a11y * 10, 20)
+    d['Clickable Image Issues Deducted']       = min(clickable_imgs * 5, 10)
+
+    d['Missing ARIA Labels Deducted']         = 5 if results['missing_aria'] else 0
+    d['Missing Alt Text Deducted']            = 5 if results['missing_alt'] else 0
+    d['HTTPS Compliance Issues Deducted']      = 5 if results['https'] else 0
+    d['Outdated HTML Tags Deducted']           = 5 if results['outdated_html'] else 0
+    d['Large Images Deducted']                 = 5 if results['large_images'] else 0
+    d['Color Contrast Issues Deducted']        = 5 if results['color_contrast'] else 0
+    d['Responsive Viewport Deducted']          = 5 if results['responsive_viewport'] else 0
+    d['Modern Doctype Deducted']               = 5 if results['modern_doctype'] else 0
+    d['Layout Tables Deducted']                = 5 if results['layout_tables'] else 0
+    d['Page Performance Deducted']             = min(vitals * 2, 10)
+
+    return d
@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import socketserver
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import net
+import profiler
+from metrics import Metrics, PROMETHEUS_CONTENT_TYPE, OPENMETRICS_CONTENT_TYPE
+from issues import json_default
+import website_checker
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+class Overloaded(Exception):
+    """Raised when the service is at capacity; mapped to HTTP 503."""
+
+def request_args(payload):
+    """AnalysisService.analyze arguments from a decoded POST /analyze body; ValueError if malformed."""
+    if not isinstance(payload, dict):
+        raise ValueError("request body must be a JSON object")
+    for key in ('html', 'path', 'profile'):
+        if payload.get(key) is not None and not isinstance(payload[key], str):
+            raise ValueError(f"'{key}' must be a string")
+    budget = payload.get('budget')
+    if budget is not None:
+        try:
+            budget = float(budget)
+        except (TypeError, ValueError):
+            budget = 0
+        if not budget > 0:
+            raise ValueError("'budget' must be a positive number of seconds")
+    profiles = payload.get('network_profiles')
+    if profiles is not None:
+        if not isinstance(profiles, list) or not all(isinstance(p, str) for p in profiles):
+            raise ValueError("'network_profiles' must be a list of profile names")
+        import resources
+        for spec in profiles:
+            resources.parse_profile(spec)
+    return (payload.get('html'), payload.get('path'), bool(payload.get('report')), budget,
+            profiles, bool(payload.get('images')), payload.get('profile') or 'full')
+
+class AnalysisService:
+    """Runs analyses for the HTTP front end with bounded concurrency.
+
+    At most max_concurrent analyses run at once; up to max_queue more may wait
+    (for at most queue_timeout seconds) before new requests are rejected.
+    Network, stylesheet and parsed-CSS caches live in `net` and are shared by
+    every request for the life of the process. metrics collects what
+    GET /metrics exports.
+    """
+
+    def __init__(self, max_concurrent=4, max_queue=16, queue_timeout=30.0, budget=None,
+                 check_timeout=None):
+        self.budget = budget
+        self.check_timeout = check_timeout
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.started = time.time()
+        self.completed = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self.metrics = Metrics().install()
+
+    def warm_up(self):
+        """Import parsers and build SSL/CSS machinery before the first request."""
+        from PIL import ImageColor
+        website_checker.parse_html('<html><body><p>warm</p></body></html>')
+        website_checker.parse_styles_map('p { color: #000; }')
+        ImageColor.getcolor('#fff', 'RGB')
+        net.get_ssl_context()
+        net.get_session()
+
+    def _acquire(self):
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("queue full")
+            self._waiting += 1
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                with self._lock:
+                    self.rejected += 1
+                raise Overloaded("timed out waiting for a worker")
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        with self._lock:
+            self._running += 1
+
+    def _release(self):
+        with self._lock:
+            self._running -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def analyze(self, html_content=None, path=None, write_report=False, budget=None,
+                network_profiles=None, images=False, run_profile='full'):
+        """Analyze HTML text (or a file path) and return JSON-ready results.
+
+        budget overrides the service-wide time budget for this request;
+        network_profiles switches on the resource waterfall stage and
+        images the image decode analysis. run_profile picks the checks run
+        (see website_checker.PROFILES).
+        """
+        if run_profile not in website_checker.PROFILES:
+            raise ValueError(f"unknown profile {run_profile!r}")
+        if html_content is None:
+            if not path:
+                raise ValueError("either 'html' or 'path' is required")
+            with open(path, 'r', encoding='utf-8') as f:
+                html_content = f.read()
+        self._acquire()
+        try:
+            prof = profiler.Profiler()
+            prof.start()
+            try:
+                with prof.section('parse'):
+                    soup = website_checker.parse_html(html_content)
+                options = {}
+                if network_profiles:
+                    options['network_profiles'] = network_profiles
+                if images:
+                    options['image_workers'] = 0
+                results = website_checker.run_checks(soup, html_content, prof,
+                                                     budget or self.budget, self.check_timeout,
+                                                     options=options, run_profile=run_profile)
+            finally:
+                prof.stop()
+            results['timings'] = prof.summary()
+            report_data = website_checker.build_report_data(soup, results)
+            self.metrics.observe_audit(report_data)
+            if write_report:
+                filename = website_checker.generate_report_filename(soup)
+                website_checker.generate_report(filename, report_data)
+                report_data['report_file'] = os.path.abspath(filename)
+            return report_data
+        except Exception:
+            self.metrics.observe_failure()
+            raise
+        finally:
+            self._release()
+
+    def status(self):
+        with self._lock:
+            return {
+                'status': 'ok',
+                'uptime': time.time() - self.started,
+                'running': self._running,
+                'waiting': self._waiting,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'caches': net.cache_stats(),
+            }
+
+    def metric_families(self):
+        """Service gauges and counters in Metrics.families() format."""
+        with self._lock:
+            return [
+                ('service_running', 'gauge', "Analyses running now.", [('', (), self._running)]),
+                ('service_waiting', 'gauge', "Analyses waiting for a worker.", [('', (), self._waiting)]),
+                ('service_completed', 'counter', "Analyses completed.", [('_total', (), self.completed)]),
+                ('service_rejected', 'counter', "Requests rejected as overloaded.",
+                 [('_total', (), self.rejected)]),
+            ]
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload, default=json_default).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_metrics(self):
+            openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+            body = service.metrics.render(openmetrics, service.metric_families()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type',
+                             OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, service.status())
+            elif self.path == '/metrics':
+                self._send_metrics()
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path.split('?')[0] != '/analyze':
+                self._send_json(404, {'error': 'not found'})
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY_BYTES:
+                self._send_json(413, {'error': 'request body too large'})
+                return
+            raw = self.rfile.read(length)
+            ctype = self.headers.get('Content-Type', '')
+            try:
+                if ctype.startswith('application/json'):
+                    payload = json.loads(raw or b'{}')
+                else:
+                    # Raw HTML body
+                    payload = {'html': raw.decode('utf-8', errors='replace')}
+                result = service.analyze(*request_args(payload))
+            except Overloaded as e:
+                self._send_json(503, {'error': f'overloaded: {e}'}, {'Retry-After': '1'})
+            except (ValueError, OSError) as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                self._send_json(500, {'error': f'{type(e).__name__}: {e}'})
+            else:
+                self._send_json(200, result)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ('local', 0)
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT, unix_socket=None):
+    handler = make_handler(service)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve website analyses over a local HTTP API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH', help="Listen on a Unix socket instead of TCP.")
+    parser.add_argument('--workers', type=int, default=4, help="Analyses allowed to run at once.")
+    parser.add_argument('--queue', type=int, default=16,
+                        help="Requests allowed to wait for a worker before returning 503.")
+    parser.add_argument('--queue-timeout', type=float, default=30.0,
+                        help="Seconds a queued request waits before returning 503.")
+    parser.add_argument('--budget', type=float, metavar='SECONDS',
+                        help="Default time budget per analysis (JSON requests may pass 'budget').")
+    parser.add_argument('--check-timeout', type=float, metavar='SECONDS',
+                        help="Default deadline for each individual check.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = AnalysisService(args.workers, args.queue, args.queue_timeout, args.budget,
+                              args.check_timeout)
+    service.warm_up()
+    server = make_server(service, args.host, args.port, args.unix)
+    where = args.unix or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Analysis service listening on {where} (POST /analyze, GET /health, GET /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
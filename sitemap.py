@@ -0,0 +1,329 @@
+import io
+import gzip
+import time
+import queue
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+import net
+import profiler
+
+# Sitemaps (and nested indexes) parsed at once
+FETCH_POOL_SIZE = 4
+# Pages fetched ahead of the one being analyzed
+PREFETCH = 4
+# Entries parsed ahead of the consumer; parser threads wait beyond this
+QUEUE_SIZE = 1000
+# The sitemap protocol caps a sitemap at 50 MB uncompressed
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+MAX_PAGE_BYTES = 16 * 1024 * 1024
+# How long a blocked parser waits between checks that the reader was not abandoned
+PUT_POLL = 0.1
+
+def parse_lastmod(value):
+    """Epoch seconds of a W3C datetime ('2024-05-01', '2024-05-01T10:00:00+02:00'), or None."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _local_path(source):
+    """Filesystem path of a plain path or file: URL, or None for http(s) sources."""
+    parts = urlsplit(source)
+    if parts.scheme == 'file':
+        return url2pathname(parts.path)
+    if parts.scheme in ('http', 'https'):
+        return None
+    return source
+
+def allowed_loc(source, loc):
+    """True if a <loc> read from the sitemap at source may be followed.
+
+    A local sitemap may list paths and file: URLs, so captured sites can be
+    audited offline; one fetched over HTTP may only list http(s) URLs on its
+    own host, so a remote sitemap can never make the audit read local files.
+    """
+    if _local_path(source) is not None:
+        return True
+    return urlsplit(loc).scheme in ('http', 'https') and net.host_of(loc) == net.host_of(source)
+
+class _Limited(io.RawIOBase):
+    """Reads at most limit bytes from stream, so a gzip bomb cannot fill memory.
+
+    Closing it closes stream and the raw file or response underneath.
+    """
+
+    def __init__(self, stream, limit, raw):
+        self.stream = stream
+        self.left = limit
+        self.raw = raw
+
+    def close(self):
+        if not self.closed:
+            self.stream.close()
+            self.raw.close()
+        super().close()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        if self.left <= 0:
+            raise ValueError(f"sitemap larger than {MAX_SITEMAP_BYTES} bytes")
+        data = self.stream.read(min(len(buf), self.left))
+        self.left -= len(data)
+        buf[:len(data)] = data
+        return len(data)
+
+def open_sitemap(source):
+    """Binary stream of a sitemap's XML from a path, file: or http(s) URL, gunzipped if needed.
+
+    Compression is detected from the content, not the name, since servers
+    send .xml.gz both with and without Content-Encoding. The caller closes
+    the returned stream.
+    """
+    path = _local_path(source)
+    if path is not None:
+        raw = open(path, 'rb')
+    else:
+        import requests
+        if not net.host_health.allow(source):
+            raise OSError(f"{source}: host unreachable")
+        try:
+            if not net.rate_controller.acquire(source):
+                raise OSError(f"{source}: throttled")
+            started = time.perf_counter()
+            try:
+                resp = net.get_session().get(source, timeout=30, stream=True)
+            except requests.exceptions.RequestException as e:
+                net.rate_controller.feedback(source, None, time.perf_counter() - started)
+                if net.connection_failed(e):
+                    net.host_health.failure(source)
+                raise OSError(f"{source}: {e}") from e
+            net.host_health.success(source)
+        finally:
+            # A throttled or failed half-open probe must not keep the circuit shut
+            net.host_health.release(source)
+        net.rate_controller.feedback(source, resp.status_code, time.perf_counter() - started,
+                                     net.parse_retry_after(resp.headers.get('Retry-After')))
+        profiler.record_request(source, resp.status_code,
+                                int(resp.headers.get('Content-Length') or 0),
+                                time.perf_counter() - started)
+        if resp.status_code != 200:
+            resp.close()
+            raise OSError(f"{source}: HTTP {resp.status_code}")
+        resp.raw.decode_content = True
+        # Otherwise urllib3 closes the response at the end of the body, and
+        # the buffered readers on top refuse the final (EOF) read
+        resp.raw.auto_close = False
+        raw = resp.raw
+    stream = io.BufferedReader(raw) if not hasattr(raw, 'peek') else raw
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.BufferedReader(_Limited(stream, MAX_SITEMAP_BYTES, raw))
+
+def iter_entries(stream):
+    """(kind, loc, lastmod) for each <url> ('url') or <sitemap> ('sitemap') entry, in order.
+
+    Parsed incrementally; finished entries are cleared from the tree as
+    they are read, so memory stays flat however long the sitemap is.
+    Namespaces are ignored, since not every generator declares the
+    sitemap one.
+    """
+    import xml.etree.ElementTree as ET
+    root = None
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if tag in ('url', 'sitemap') and elem is not root:
+            loc = lastmod = None
+            for child in elem:
+                name = child.tag.rsplit('}', 1)[-1]
+                if name == 'loc':
+                    loc = (child.text or '').strip()
+                elif name == 'lastmod':
+                    lastmod = parse_lastmod(child.text)
+            # Every child of root so far is finished: drop them all
+            root.clear()
+            if loc:
+                yield tag, loc, lastmod
+
+class SitemapReader:
+    """Page URLs from sitemaps and sitemap indexes, yielded lazily as they are parsed.
+
+    Each sitemap is parsed on a worker thread; nested sitemaps found in an
+    index are queued on the same pool, so a large index is read
+    concurrently. Entries pass through a bounded queue, so parsing never
+    runs far ahead of the consumer. URLs are deduplicated across every
+    sitemap, and skip(url, lastmod) may drop URLs that have not changed
+    (it returns the reason, counted per reason in skipped_by).
+    Entries allowed_loc() refuses are counted as rejected and listed in
+    errors. Counters (urls, duplicates, skipped, rejected) and errors are
+    kept for the caller.
+    """
+
+    def __init__(self, sources, skip=None, workers=FETCH_POOL_SIZE):
+        self.sources = list(sources)
+        self.skip = skip
+        self.workers = workers
+        self.urls = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.skipped_by = {}    # skip() reason -> count
+        self.sitemaps = 0
+        self.rejected = 0
+        self.errors = []    # (source, message)
+
+    def _parse(self, source, out, stop):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=PUT_POLL)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            with open_sitemap(source) as stream:
+                for entry in iter_entries(stream):
+                    if not allowed_loc(source, entry[1]):
+                        entry = ('rejected', entry[1], source)
+                    if not put(entry):
+                        return
+        except Exception as e:
+            put(('error', source, f"{type(e).__name__}: {e}"))
+        finally:
+            put(('done', source, None))
+
+    def __iter__(self):
+        """(url, lastmod) for each page to audit."""
+        out = queue.Queue(maxsize=QUEUE_SIZE)
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        seen_maps, seen = set(), set()
+        pending = 0
+        try:
+            for source in self.sources:
+                if source not in seen_maps:
+                    seen_maps.add(source)
+                    pool.submit(self._parse, source, out, stop)
+                    pending += 1
+            while pending:
+                kind, loc, lastmod = out.get()
+                if kind == 'done':
+                    pending -= 1
+                    self.sitemaps += 1
+                elif kind == 'error':
+                    self.errors.append((loc, lastmod))
+                elif kind == 'rejected':
+                    # lastmod holds the sitemap that listed it
+                    self.rejected += 1
+                    self.errors.append((lastmod, f"ignored {loc}: not an http(s) URL on the sitemap's host"))
+                elif kind == 'sitemap':
+                    if loc not in seen_maps:
+                        seen_maps.add(loc)
+                        pool.submit(self._parse, loc, out, stop)
+                        pending += 1
+                elif loc in seen:
+                    self.duplicates += 1
+                else:
+                    seen.add(loc)
+                    reason = self.skip(loc, lastmod) if self.skip is not None else None
+                    if reason:
+                        self.skipped += 1
+                        self.skipped_by[reason] = self.skipped_by.get(reason, 0) + 1
+                        continue
+                    self.urls += 1
+                    yield loc, lastmod
+        finally:
+            # Abandoned part way: let blocked parsers give up
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+def fetch_page(url):
+    """(status, html) of one page to audit; html is None unless it was fetched.
+
+    file: URLs and plain paths are read from disk, so fixture sitemaps can
+    point at captured pages.
+    """
+    import requests
+    path = _local_path(url)
+    if path is not None:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return 200, f.read()
+    if not net.host_health.allow(url):
+        return net.HOST_UNREACHABLE, None
+    try:
+        if not net.rate_controller.acquire(url):
+            return net.THROTTLED, None
+        started = time.perf_counter()
+        resp = net.get_session().get(url, timeout=30, stream=True)
+        body = resp.raw.read(MAX_PAGE_BYTES, decode_content=True)
+        resp.close()
+        net.host_health.success(url)
+    except requests.exceptions.RequestException as e:
+        net.rate_controller.feedback(url, None, time.perf_counter() - started)
+        if net.connection_failed(e):
+            net.host_health.failure(url)
+            return net.HOST_UNREACHABLE, None
+        return None, None
+    finally:
+        net.host_health.release(url)
+    elapsed = time.perf_counter() - started
+    net.rate_controller.feedback(url, resp.status_code, elapsed,
+                                 net.parse_retry_after(resp.headers.get('Retry-After')))
+    profiler.record_request(url, resp.status_code, len(body), elapsed)
+    if resp.status_code != 200:
+        return resp.status_code, None
+    return 200, body.decode(resp.encoding or 'utf-8', errors='replace')
+
+def prefetch(entries, fetch=fetch_page, ahead=PREFETCH):
+    """(url, lastmod, status, html) for each (url, lastmod), in order, fetching up to ahead pages early.
+
+    Pages download while the caller analyzes earlier ones; at most ahead
+    are held in memory.
+    """
+    pending = []
+    with ThreadPoolExecutor(max_workers=ahead) as pool:
+        for url, lastmod in entries:
+            pending.append((url, lastmod, pool.submit(fetch, url)))
+            if len(pending) >= ahead:
+                url0, lastmod0, future = pending.pop(0)
+                yield (url0, lastmod0) + future.result()
+        for url, lastmod, future in pending:
+            yield (url, lastmod) + future.result()
+
+def lastmod_skipper(since=None, history=None):
+    """skip(url, lastmod) for SitemapReader, or None if nothing would be skipped.
+
+    A URL is skipped ('since') when its lastmod is before since (epoch
+    seconds), or ('unchanged') when it is not after its latest audit in
+    history (a history.History); skip() returns that reason, else None.
+    URLs without a lastmod are always audited.
+    """
+    if since is None and history is None:
+        return None
+
+    def skip(url, lastmod):
+        if lastmod is None:
+            return None
+        if since is not None and lastmod < since:
+            return 'since'
+        audited = history.last_audited(url) if history is not None else None
+        if audited is not None and lastmod <= audited:
+            return 'unchanged'
+        return None
+    return skip
@@ -0,0 +1,279 @@
+import os
+import re
+import sys
+import mmap
+import struct
+import bisect
+import argparse
+import threading
+
+import net
+from issues import IssueList
+
+# Compiled dictionary used when WEBSITE_CHECKER_DICT is not set
+DEFAULT_DICT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spelling.dict')
+DICT_ENV = 'WEBSITE_CHECKER_DICT'
+
+MAGIC = b'WCSPELL1'
+HEADER = struct.Struct('<8sII')     # magic, word count, delete-key count
+ENTRY = struct.Struct('<III')       # string offset, string length, value
+
+MIN_WORD_LEN = 3
+MAX_WORD_LEN = 30
+# Suggestions are looked up within this edit distance (the delete index is built for it)
+MAX_EDIT_DISTANCE = 1
+
+WORD = r"[^\W\d_]+(?:['’\-][^\W\d_]+)*"
+# Words in running text: letters with inner apostrophes/hyphens, set off by
+# whitespace and surrounding punctuation only (so URLs, emails, file names,
+# version numbers and identifiers never match)
+WORD_RE = re.compile(r"(?<!\S)[\"'(\[“‘]*(" + WORD + r")[\"')\]”’.,;:!?]*(?!\S)")
+DICT_WORD_RE = re.compile(WORD)
+
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+_lookup_cache = net.TTLCache(maxsize=200000)    # word -> (frequency, suggestion or None)
+net.CACHES['spelling'] = _lookup_cache
+
+def deletes(word, distance=MAX_EDIT_DISTANCE):
+    """Every string obtained by deleting up to distance characters from word."""
+    found, frontier = set(), {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+def edit_distance(a, b, limit=MAX_EDIT_DISTANCE):
+    """Optimal string alignment distance, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+class _Table:
+    """Sorted (key bytes, value) entries in a buffer, searchable with bisect."""
+
+    def __init__(self, buf, entries_at, count, strings_at):
+        self.buf = buf
+        self.entries_at = entries_at
+        self.count = count
+        self.strings_at = strings_at
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        offset, length, _ = ENTRY.unpack_from(self.buf, self.entries_at + i * ENTRY.size)
+        start = self.strings_at + offset
+        return self.buf[start:start + length]
+
+    def value(self, i):
+        return ENTRY.unpack_from(self.buf, self.entries_at + i * ENTRY.size)[2]
+
+    def find(self, key):
+        """Index of the first entry with this key, or -1."""
+        i = bisect.bisect_left(self, key)
+        return i if i < self.count and self[i] == key else -1
+
+    def values(self, key):
+        i = self.find(key)
+        while 0 <= i < self.count and self[i] == key:
+            yield self.value(i)
+            i += 1
+
+class Dictionary:
+    """Word frequencies plus a symmetric-delete index, read from a compiled file.
+
+    The file (see build_dictionary) is memory-mapped, so opening it costs
+    nothing and the OS shares its pages between processes. Lookups are
+    binary searches over fixed-size entries.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_words, n_deletes = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled spelling dictionary")
+        # Layout: header, word entries, delete entries, word strings, delete strings
+        words_at = HEADER.size
+        deletes_at = words_at + n_words * ENTRY.size
+        word_strings = deletes_at + n_deletes * ENTRY.size
+        word_bytes = self._strings_size(words_at, n_words)
+        self.words = _Table(self.buf, words_at, n_words, word_strings)
+        self.deletes = _Table(self.buf, deletes_at, n_deletes, word_strings + word_bytes)
+
+    def _strings_size(self, entries_at, count):
+        if not count:
+            return 0
+        offset, length, _ = ENTRY.unpack_from(self.buf, entries_at + (count - 1) * ENTRY.size)
+        return offset + length
+
+    def __len__(self):
+        return len(self.words)
+
+    def frequency(self, word):
+        """Corpus count of word (lower case), 0 if unknown."""
+        i = self.words.find(word.encode('utf-8'))
+        return self.words.value(i) if i >= 0 else 0
+
+    def suggest(self, word):
+        """Most frequent dictionary word within MAX_EDIT_DISTANCE of word, or None."""
+        candidates = set()
+        for key in deletes(word) | {word}:
+            key_bytes = key.encode('utf-8')
+            # word has extra letters: key itself is a dictionary word
+            if key != word:
+                i = self.words.find(key_bytes)
+                if i >= 0:
+                    candidates.add(i)
+            # word is missing letters, or differs in one place: shared delete
+            candidates.update(self.deletes.values(key_bytes))
+        best = None
+        for i in candidates:
+            candidate = self.words[i].decode('utf-8')
+            if edit_distance(word, candidate) <= MAX_EDIT_DISTANCE:
+                rank = (-self.words.value(i), candidate)
+                if best is None or rank < best:
+                    best = rank
+        return best[1] if best else None
+
+def _normalize(word):
+    return word.replace('’', "'").lower()
+
+def read_word_list(path):
+    """{word: count} from a plain list: one word per line, optionally followed by a count.
+
+    Frequency lists ("the 23135851162") and hunspell .dic files ("word/FLAGS")
+    both work; words without a count get 1.
+    """
+    words = {}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            word = _normalize(parts[0].split('/')[0])
+            if not word or len(word) > MAX_WORD_LEN or not DICT_WORD_RE.fullmatch(word):
+                continue
+            count = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+            words[word] = words.get(word, 0) + count
+    return words
+
+def build_dictionary(words, out_path):
+    """Compile {word: count} into the memory-mappable format Dictionary reads."""
+    word_list = sorted(w.encode('utf-8') for w in words)
+    index = {w: i for i, w in enumerate(word_list)}
+    delete_pairs = sorted((d.encode('utf-8'), index[w])
+                          for w in word_list if len(w) > 1
+                          for d in deletes(w.decode('utf-8')))
+
+    def pack(items, value):
+        entries, strings, offset = bytearray(), bytearray(), 0
+        for key in items:
+            entries += ENTRY.pack(offset, len(key[0]), value(key))
+            strings += key[0]
+            offset += len(key[0])
+        return entries, strings
+
+    word_entries, word_strings = pack([(w,) for w in word_list],
+                                      lambda k: min(words[k[0].decode('utf-8')], 0xFFFFFFFF))
+    delete_entries, delete_strings = pack(delete_pairs, lambda k: k[1])
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(word_list), len(delete_pairs)))
+        f.write(word_entries)
+        f.write(delete_entries)
+        f.write(word_strings)
+        f.write(delete_strings)
+    os.replace(tmp_path, out_path)
+    return len(word_list), len(delete_pairs)
+
+def get_dictionary():
+    """The process-wide Dictionary, opened on first use; None if no dictionary file exists."""
+    global _dictionary
+    if _dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                path = os.environ.get(DICT_ENV) or DEFAULT_DICT_PATH
+                _dictionary = Dictionary(path) if os.path.exists(path) else False
+    return _dictionary or None
+
+def lookup(dictionary, word):
+    """(frequency, suggestion) for a lower-case word; cached across pages."""
+    result = _lookup_cache.get(word)
+    if result is net.MISSING:
+        freq = dictionary.frequency(word)
+        if not freq and "'" in word:
+            # possessives and contractions the list does not carry: "site's", "vendors'"
+            freq = dictionary.frequency(word.split("'")[0])
+        result = (freq, None if freq else dictionary.suggest(word))
+        _lookup_cache.set(word, result)
+    return result
+
+def is_checked_lang(lang):
+    return not lang or lang.lower().split('-')[0] == 'en'
+
+class SpellChecker:
+    """Collects words from visible text, then looks each distinct word up once.
+
+    Fed one text node at a time by the DocumentIndex walk or the streaming
+    tokenizer. Only all-lower-case words are checked: capitalized words are
+    usually names, and all-caps or mixed-case tokens acronyms or code.
+    """
+
+    def __init__(self):
+        self.words = {}     # word -> [count, first location]
+
+    def feed(self, text, location=None):
+        words = self.words
+        for token in WORD_RE.findall(text):
+            for word in token.split('-'):
+                if MIN_WORD_LEN <= len(word) <= MAX_WORD_LEN and word.islower():
+                    entry = words.get(word)
+                    if entry is None:
+                        words[word] = [1, location]
+                    else:
+                        entry[0] += 1
+
+    def issues(self, dictionary=None):
+        dictionary = dictionary or get_dictionary()
+        found = IssueList()
+        if dictionary is None:
+            return found
+        for word, (count, location) in self.words.items():
+            freq, suggestion = lookup(dictionary, _normalize(word))
+            if freq:
+                continue
+            text = f"Possible misspelling: '{word}'"
+            if suggestion:
+                text += f" (did you mean '{suggestion}'?)"
+            found.add(text, location, count)
+        return found
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a word list into a spelling dictionary.")
+    parser.add_argument('word_list', help="One word per line, optionally followed by a count.")
+    parser.add_argument('-o', '--out', default=DEFAULT_DICT_PATH, help="Compiled dictionary path.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    n_words, n_deletes = build_dictionary(read_word_list(args.word_list), args.out)
+    print(f"Wrote {args.out}: {n_words} words, {n_deletes} delete keys")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+import re
+from html.parser import HTMLParser
+
+import link_graph
+import profiler
+from dom_index import ROOT_CONTEXT
+from issues import IssueList
+from scheduler import Job, Scheduler
+from spelling import SpellChecker, get_dictionary, is_checked_lang
+from web_vitals import VitalsCollector
+import website_checker as wc
+
+CHUNK_SIZE = 64 * 1024
+# Deeper (usually unclosed) tags are still checked but not kept on the stack
+MAX_DEPTH = 512
+MAX_TITLE_CHARS = 2048
+
+# Same empty elements bs4's html.parser builder treats as self-closing
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+             'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+             'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'}
+DEPRECATED_TAGS = ('font', 'center', 'marquee', 'blink')
+INTERACTIVE_TAGS = ('a', 'button', 'input', 'textarea', 'select')
+
+# Checks answered while the document streams by
+STREAMED_CHECKS = ('accessibility', 'keyboard_accessibility', 'missing_alt', 'exposed_keys',
+                   'https', 'outdated_html', 'clickable_images', 'responsive_viewport',
+                   'modern_doctype', 'layout_tables', 'web_vitals', 'grammar')
+# Checks that need the parsed tree (or its full text); skipped unless asked for
+TREE_CHECKS = ('color_contrast', 'missing_aria', 'unused_css_js')
+
+class _StreamTag:
+    """Just enough of a bs4 Tag (name, get, has_attr, source position) for the checks."""
+    __slots__ = ('name', 'attrs', 'sourceline', 'sourcepos')
+
+    def __init__(self, name, attrs, loc):
+        self.name = name
+        self.attrs = attrs
+        self.sourceline, self.sourcepos = loc
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def has_attr(self, key):
+        return key in self.attrs
+
+class KeyScanner:
+    """check_exposed_keys over text that arrives in chunks.
+
+    Each pattern resumes where its last match ended; matches that start in
+    the trailing overlap, or run into the end of the buffer, wait for the
+    next chunk so nothing is cut in half. Only the unscanned tail is kept.
+    """
+    OVERLAP = 8 * 1024
+    MAX_BUFFER = 1024 * 1024
+
+    def __init__(self, patterns=None):
+        patterns = patterns or wc.KEY_PATTERNS
+        self.patterns = [(key_type, re.compile(p)) for key_type, p in patterns.items()]
+        self.found = IssueList()
+        self._per_pattern = [IssueList() for _ in self.patterns]
+        self._buf = ''
+        self._line = 1          # line number at the start of _buf
+        self._resume = [0] * len(self.patterns)   # offsets into _buf
+
+    def feed(self, chunk):
+        self._buf += chunk
+        self._scan(final=len(self._buf) > self.MAX_BUFFER)
+
+    def close(self):
+        self._scan(final=True)
+        # Same order as check_exposed_keys: pattern by pattern
+        for issues in self._per_pattern:
+            self.found.merge(issues)
+        return self.found
+
+    def _scan(self, final):
+        buf = self._buf
+        cutoff = len(buf) if final else max(0, len(buf) - self.OVERLAP)
+        for i, (key_type, regex) in enumerate(self.patterns):
+            line, pos = self._line, 0
+            resume = self._resume[i]
+            for match in regex.finditer(buf, resume):
+                if not final and (match.start() >= cutoff or match.end() >= len(buf)):
+                    resume = match.start()
+                    break
+                line += buf.count('\n', pos, match.start())
+                pos = match.start()
+                self._per_pattern[i].add(f"Exposed {key_type}: {match.group(0)}", line)
+                resume = match.end()
+            else:
+                resume = max(resume, cutoff)
+            self._resume[i] = resume
+        # Drop what every pattern has finished with
+        keep = min(self._resume)
+        if keep:
+            self._line += buf.count('\n', 0, keep)
+            self._buf = buf[keep:]
+            self._resume = [r - keep for r in self._resume]
+
+class StreamingChecker(HTMLParser):
+    """Tag-local checks run from tokenizer callbacks, without building a tree.
+
+    Only a stack of open elements (name, inherited NodeContext, location) and
+    the text since the last tag are kept, so memory stays bounded by nesting
+    depth rather than page size. Nesting
+    follows bs4's html.parser builder: empty elements never open, and an end
+    tag closes the most recent open element of that name.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.head = ''
+        self.keys = KeyScanner()
+        self.missing_alt = IssueList()
+        self.clickable_images = IssueList()
+        self.keyboard = IssueList()
+        self.outdated = IssueList()
+        self.insecure = set()
+        self.tables = 0
+        self.html_lang = None       # lang of the first <html>, '' if missing
+        self.has_main = False
+        self.viewport = None        # content of the first viewport meta
+        self.title = None
+        self.canonical = None
+        self.og_url = None
+        self.first_href = None
+        self.base_href = None       # href of the first <base>
+        self.anchors = []           # <a>/<area> tags with an href, reduced to it
+        self.targets = set()        # fragment targets: ids and <a name>s
+        self.images = {}            # http(s) image srcs, in order, deduplicated
+        self.vitals = VitalsCollector()
+        self.spelling = SpellChecker() if get_dictionary() is not None else None
+        self._title_parts = None
+        self._cdata_tag = None      # open <script>/<style>, for inline byte counts
+        self._text = []             # prose since the last tag (html.parser splits it at chunk ends)
+
+    def feed_chunk(self, chunk):
+        if len(self.head) < 300:
+            self.head += chunk[:300 - len(self.head)]
+        self.keys.feed(chunk)
+        self.feed(chunk)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        self.keys.close()
+
+    def _flush_text(self):
+        if self._text:
+            self.spelling.feed(''.join(self._text), self.stack[-1][2] if self.stack else None)
+            self._text = []
+
+    def handle_starttag(self, name, attrs):
+        self._start(name, attrs, push=name not in VOID_TAGS)
+
+    def handle_startendtag(self, name, attrs):
+        self._start(name, attrs, push=False)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def handle_endtag(self, name):
+        self._flush_text()
+        if name == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts)[:MAX_TITLE_CHARS]
+            self._title_parts = None
+        if self._cdata_tag is not None and name == self._cdata_tag.name:
+            self._cdata_tag = None
+        stack = self.stack
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == name:
+                del stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self._cdata_tag is not None:
+            self.vitals.inline(self._cdata_tag, len(data.encode('utf-8')))
+        ctx = self.stack[-1][1] if self.stack else ROOT_CONTEXT
+        if self.spelling is not None and not ctx.verbatim and is_checked_lang(ctx.lang):
+            self._text.append(data)
+        if self._title_parts is not None and sum(map(len, self._title_parts)) < MAX_TITLE_CHARS:
+            self._title_parts.append(data)
+
+    def _start(self, name, attrs, push):
+        self._flush_text()
+        # html.parser reports valueless attributes as None; bs4 stores ''
+        attrs = {k: '' if v is None else v for k, v in attrs}
+        loc = self.getpos()
+        tag = _StreamTag(name, attrs, loc)
+        parent = self.stack[-1][1] if self.stack else ROOT_CONTEXT
+        ctx = parent.derive(tag)
+        self.vitals.visit(tag, ctx)
+        if name in ('script', 'style') and push:
+            self._cdata_tag = tag
+        if ctx.in_main:
+            self.has_main = True
+
+        e_id = attrs.get('id', '').strip()
+        if e_id:
+            self.targets.add(e_id)
+        if name in ('a', 'area') and 'href' in attrs:
+            self.anchors.append(_StreamTag(name, {'href': attrs['href']}, loc))
+
+        if name == 'img':
+            src = attrs.get('src')
+            if not attrs.get('alt') and not ctx.hidden and attrs.get('role') != 'presentation':
+                self.missing_alt.add(f"Image missing alt text: {src}", loc)
+            if attrs.get('onclick') or parent.anchor:
+                if parent.anchor and not parent.anchor.get('href'):
+                    self.clickable_images.add(f"Clickable image without real link: {src}", loc)
+                elif not parent.anchor:
+                    self.clickable_images.add(f"Image onclick without anchor/href: {src}", loc)
+            if src is not None and src.startswith('http'):
+                self.images[src] = None
+        elif name == 'a':
+            href = attrs.get('href')
+            if href is not None:
+                if self.first_href is None:
+                    self.first_href = href
+            if attrs.get('name', '').strip():
+                self.targets.add(attrs['name'].strip())
+        elif name == 'table':
+            self.tables += 1
+        elif name == 'html':
+            if self.html_lang is None:
+                self.html_lang = attrs.get('lang') or ''
+        elif name == 'meta':
+            if self.viewport is None and attrs.get('name') == 'viewport':
+                self.viewport = attrs.get('content', '')
+            if self.og_url is None and attrs.get('property') == 'og:url':
+                self.og_url = attrs.get('content', 'URL not found')
+        elif name == 'base':
+            if self.base_href is None and 'href' in attrs:
+                self.base_href = attrs['href']
+        elif name == 'link':
+            if self.canonical is None and 'canonical' in attrs.get('rel', '').split():
+                self.canonical = attrs.get('href', 'URL not found')
+        elif name == 'title':
+            if self.title is None and self._title_parts is None:
+                self._title_parts = []
+        elif name in DEPRECATED_TAGS:
+            self.outdated.add(f"Deprecated tag <{name}> found.", loc)
+
+        if 'onclick' in attrs and name not in INTERACTIVE_TAGS and 'tabindex' not in attrs:
+            self.keyboard.add(f"Possible keyboard trap: <{name}> has onclick, no tabIndex.", loc)
+        if name in ('a', 'img', 'link', 'script'):
+            url = attrs.get('href') or attrs.get('src')
+            if url and url.startswith('http://'):
+                self.insecure.add(url)
+
+        if push and len(self.stack) < MAX_DEPTH:
+            self.stack.append((name, ctx, loc))
+
+    def results(self):
+        """Results dict entries for every key in STREAMED_CHECKS."""
+        return {
+            'accessibility': wc.accessibility_issues(self.html_lang, self.has_main),
+            'keyboard_accessibility': self.keyboard,
+            'missing_alt': self.missing_alt,
+            'exposed_keys': self.keys.found,
+            'https': list(self.insecure),
+            'outdated_html': self.outdated,
+            'clickable_images': self.clickable_images,
+            'responsive_viewport': wc.viewport_issues(self.viewport),
+            'modern_doctype': wc.check_modern_doctype(self.head),
+            'layout_tables': wc.layout_table_issues(self.tables),
+            'web_vitals': self.vitals.issues(),
+            'grammar': self.spelling.issues() if self.spelling is not None else IssueList(),
+        }
+
+    def link_args(self):
+        """wc.page_link_issues arguments for the streamed page, keyed as link_graph.page_key would."""
+        base = next((url for url in (self.base_href, self.canonical, self.og_url)
+                     if url and url.startswith(('http://', 'https://'))), None)
+        key = link_graph.normalize(base)[0] if base else None
+        return link_graph.link_entries(self.anchors, key), self.targets, key
+
+    def title_and_url(self):
+        return wc.pick_title_and_url(self.title, self.canonical, self.og_url, self.first_href)
+
+def stream_file(file_path, chunk_size=CHUNK_SIZE):
+    """Run the streamed checks over file_path and return the finished StreamingChecker."""
+    checker = StreamingChecker()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            checker.feed_chunk(chunk)
+    checker.close()
+    return checker
+
+def run_streaming(file_path, prof=None, budget=None, check_timeout=None, deadlines=None,
+                  tree_checks=False, options=None, run_profile='full', only=None):
+    """Analyze file_path in streaming mode; returns (results, StreamingChecker).
+
+    Link and image probes run on the URLs collected while streaming, and
+    #fragment links are checked against the ids and names seen. The
+    tree is only built when tree_checks is set; otherwise TREE_CHECKS are
+    not run. Optional checks (options, see run_checks) need the tree as
+    well. run_profile and only narrow down the checks as in run_checks;
+    every check not run gets an empty result and is listed under
+    results['skipped'].
+    """
+    prof = prof or profiler.Profiler()
+    kinds = wc.PROFILES[run_profile][0]
+    with prof.section('stream'):
+        checker = stream_file(file_path)
+    results = {key: issues for key, issues in checker.results().items()
+               if only is None or key in only}
+
+    jobs = []
+    if 'network' in kinds:
+        jobs += [Job('broken_links', wc.page_link_issues, checker.link_args, True),
+                 Job('large_images', wc.find_large_images, (list(checker.images),), True)]
+        jobs = [job for job in jobs if only is None or job.key in only]
+    if tree_checks:
+        with prof.section('parse'):
+            soup, html_content = wc.load_html_file(file_path)
+        optional = tuple(key for key, _, _, _ in wc.OPTIONAL_CHECKS)
+        wanted = [key for key in TREE_CHECKS + optional if only is None or key in only]
+        jobs += wc.check_jobs(soup, html_content, prof, wanted, options, run_profile)
+
+    done, incomplete = Scheduler(budget, check_timeout, deadlines, prof).run(jobs)
+    for job in jobs:
+        results[job.key] = done.get(job.key, [])
+    results['incomplete'] = incomplete
+    reasons = [] if tree_checks else ["not run without the document tree in streaming mode"]
+    if run_profile != 'full':
+        reasons.append(f"not run in the {run_profile} profile")
+    return wc.fill_skipped(results, only, reasons), checker
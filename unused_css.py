@@ -0,0 +1,212 @@
+import re
+import hashlib
+
+import net
+
+# Stylesheets with less unused CSS than this are not worth reporting
+UNUSED_MIN_BYTES = 10 * 1024
+SAMPLE_SELECTORS = 3
+
+# At-rules whose blocks hold ordinary style rules
+GROUPING_AT_RULES = ('media', 'supports', 'layer', 'container', 'document', '-moz-document')
+
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+# Pseudo-classes/elements, including one level of nested parentheses: :not(.a:hover)
+PSEUDO_RE = re.compile(r'(?<!\\)::?[-\w]+(?:\((?:[^()]|\([^()]*\))*\))?')
+ATTR_RE = re.compile(r'\[\s*([-\w:|]+)[^\]]*\]')
+NAME = r'((?:\\.|[-\w])+)'
+CLASS_RE = re.compile(r'\.' + NAME)
+ID_RE = re.compile(r'#' + NAME)
+TAG_RE = re.compile(r'(?:^|(?<=[\s>+~]))([a-zA-Z][-\w]*)')
+ESCAPE_RE = re.compile(r'\\(.)')
+NAMESPACE_RE = re.compile(r'(?:[-\w]+|\*)?\|(?=[-\w*])')
+
+_rules_cache = net.TTLCache(maxsize=256)
+net.CACHES['css_rules'] = _rules_cache
+
+class DomFeatures:
+    """Tag names, classes, ids and attribute names present in one or more pages."""
+    __slots__ = ('tags', 'classes', 'ids', 'attrs')
+
+    def __init__(self):
+        self.tags = set()
+        self.classes = set()
+        self.ids = set()
+        self.attrs = set()
+
+    def add_tag(self, tag):
+        self.tags.add(tag.name)
+        attrs = tag.attrs
+        if attrs:
+            self.attrs.update(attrs)
+            classes = attrs.get('class')
+            if classes:
+                self.classes.update(classes if isinstance(classes, list) else classes.split())
+            e_id = attrs.get('id')
+            if e_id:
+                self.ids.add(e_id)
+
+    def update(self, other):
+        self.tags |= other.tags
+        self.classes |= other.classes
+        self.ids |= other.ids
+        self.attrs |= other.attrs
+
+    def matches(self, requirement):
+        """True if every tag, class, id and attribute the selector names exists somewhere."""
+        tags, classes, ids, attrs = requirement
+        return (tags <= self.tags and classes <= self.classes and ids <= self.ids
+                and attrs <= self.attrs)
+
+def _split_top_level(text, sep=','):
+    """Split on sep outside (), [] and quotes."""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote and text[i - 1] != '\\':
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+def selector_requirement(selector):
+    """(tags, classes, ids, attrs) a selector needs to exist in the DOM to ever match.
+
+    Pseudo-classes (including :not/:is/:where/:has and their arguments) are
+    dropped, so the test errs on the side of calling a rule used.
+    """
+    s = PSEUDO_RE.sub('', selector)
+    attrs = {a.lower().split('|')[-1] for a in ATTR_RE.findall(s)}
+    s = NAMESPACE_RE.sub('', ATTR_RE.sub('', s))
+    classes = {ESCAPE_RE.sub(r'\1', c) for c in CLASS_RE.findall(s)}
+    ids = {ESCAPE_RE.sub(r'\1', i) for i in ID_RE.findall(s)}
+    # Class/id names can look like tags (.nav-a, #b2); drop them before matching tags
+    tags = {t.lower() for t in TAG_RE.findall(CLASS_RE.sub(' ', ID_RE.sub(' ', s)).strip())}
+    return (frozenset(tags), frozenset(classes), frozenset(ids), frozenset(attrs))
+
+def _block_end(css, i):
+    """Index just past the '}' closing the block whose '{' is at css[i]."""
+    depth, quote = 0, None
+    n = len(css)
+    while i < n:
+        ch = css[i]
+        if quote:
+            if ch == quote and css[i - 1] != '\\':
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+def split_rules(css, start=0, end=None):
+    """Yield (selector_text, nbytes) for every style rule, descending into @media etc.
+
+    css must already have its comments blanked out (offsets are kept).
+    Other at-rules (@font-face, @keyframes, @import, ...) are skipped: they
+    are never "unused" in the selector sense.
+    """
+    end = len(css) if end is None else end
+    i = start
+    while i < end:
+        brace = css.find('{', i, end)
+        semi = css.find(';', i, end)
+        if brace < 0:
+            return
+        if 0 <= semi < brace and css[i:semi].lstrip().startswith('@'):
+            # @import/@charset/@layer a, b; statements
+            i = semi + 1
+            continue
+        prelude = css[i:brace].strip()
+        close = _block_end(css, brace)
+        if prelude.startswith('@'):
+            name = prelude[1:].split(None, 1)[0].lower() if len(prelude) > 1 else ''
+            if name in GROUPING_AT_RULES:
+                yield from split_rules(css, brace + 1, close - 1)
+        elif prelude:
+            rule_start = i + (len(css[i:brace]) - len(css[i:brace].lstrip()))
+            yield prelude, len(css[rule_start:close].encode('utf-8'))
+        i = close
+
+def parse_rules(css_text):
+    """[(selector_text, nbytes, [requirement per selector]), ...]; cached per CSS text."""
+    key = hashlib.sha1(css_text.encode('utf-8')).hexdigest()
+    rules = _rules_cache.get(key)
+    if rules is not net.MISSING:
+        return rules
+    css = COMMENT_RE.sub(lambda m: ' ' * len(m.group(0)), css_text)
+    rules = []
+    for selector_text, nbytes in split_rules(css):
+        reqs = [selector_requirement(sel) for sel in _split_top_level(selector_text) if sel.strip()]
+        rules.append((selector_text, nbytes, reqs))
+    _rules_cache.set(key, rules)
+    return rules
+
+def stylesheet_usage(source, css_text, features):
+    """Rule and byte counts for one stylesheet against the given DomFeatures."""
+    rules = parse_rules(css_text)
+    unused, unused_bytes, samples = 0, 0, []
+    for selector_text, nbytes, reqs in rules:
+        if not any(features.matches(req) for req in reqs):
+            unused += 1
+            unused_bytes += nbytes
+            if len(samples) < SAMPLE_SELECTORS:
+                samples.append(selector_text)
+    return {
+        'source': source,
+        'rules': len(rules),
+        'unused_rules': unused,
+        'bytes': sum(nbytes for _, nbytes, _ in rules),
+        'unused_bytes': unused_bytes,
+        'samples': samples,
+    }
+
+def usage_text(usage):
+    return (f"Unused CSS in {usage['source']}: {usage['unused_rules']} of {usage['rules']} rules, "
+            f"{usage['unused_bytes']/1024:.1f} KB of {usage['bytes']/1024:.1f} KB "
+            f"(e.g. {', '.join(usage['samples'])})")
+
+class SiteUsage:
+    """Unused CSS across a batch of pages.
+
+    A linked stylesheet's rule is unused only if no page that links the
+    stylesheet has the elements it selects. Per stylesheet only its text and
+    the merged features of the linking pages are kept, never the trees.
+    """
+
+    def __init__(self):
+        self.sheets = {}      # href -> (CSS text, DomFeatures of every page linking it)
+        self.pages = {}       # href -> number of pages linking it
+
+    def add_page(self, features, linked):
+        """linked: (href, css_text) for every stylesheet the page links."""
+        for href, css_text in linked:
+            entry = self.sheets.get(href)
+            if entry is None:
+                entry = self.sheets[href] = (css_text, DomFeatures())
+                self.pages[href] = 0
+            entry[1].update(features)
+            self.pages[href] += 1
+
+    def summary(self):
+        """stylesheet_usage per linked stylesheet, plus the number of pages linking it."""
+        rows = []
+        for href, (css_text, features) in self.sheets.items():
+            usage = stylesheet_usage(href, css_text, features)
+            usage['pages'] = self.pages[href]
+            rows.append(usage)
+        rows.sort(key=lambda u: -u['unused_bytes'])
+        return rows
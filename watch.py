@@ -0,0 +1,217 @@
+import os
+import time
+import difflib
+from collections import Counter
+
+import profiler
+import website_checker as wc
+from dom_index import VERBATIM_TAGS
+from issues import IssueList
+from report import generate_report
+
+# Seconds between os.stat() polls of the watched file
+POLL_INTERVAL = 0.2
+# Characters check_modern_doctype looks at
+DOCTYPE_CHARS = 300
+
+# What each check reads, as tokens: a tag name, '@attribute', '#text' for
+# text content, '!doctype'. A check re-runs only when a token it lists is
+# among the changed ones; checks not listed (or '*') re-run on any change.
+CHECK_SCOPES = {
+    'grammar': {'#text', '@lang'} | VERBATIM_TAGS,
+    'accessibility': {'html', 'main', '@role'},
+    'keyboard_accessibility': {'@onclick', '@tabindex'},
+    'color_contrast': {'#text', '@style', '@class', '@id', '@role', 'style', 'link', 'main', 'body'},
+    'missing_aria': {'button', 'a', 'input', 'select', 'textarea', 'label', 'img', '#text',
+                     '@aria-label', '@aria-labelledby', '@aria-hidden', '@id', '@for', '@alt',
+                     '@title', '@value', '@placeholder', '@type', '@href', '@role'},
+    'missing_alt': {'img', '@aria-hidden'},
+    'exposed_keys': '*',
+    'https': {'a', 'img', 'link', 'script'},
+    'broken_links': {'a', 'area', 'base', 'link', 'meta', '@id', '@name'},
+    'large_images': {'img'},
+    'outdated_html': {'font', 'center', 'marquee', 'blink'},
+    'clickable_images': {'img', 'a'},
+    'responsive_viewport': {'meta'},
+    'modern_doctype': {'!doctype'},
+    'layout_tables': {'table'},
+}
+
+def tag_signatures(soup):
+    """Counter of one hashable signature per tag: name, attributes, own text and child tag names.
+
+    Two trees with the same signatures differ only in where tags sit, not
+    in what they are; a tag whose content, attributes or children changed
+    has a different signature.
+    """
+    from bs4 import Comment, NavigableString, Tag
+    sigs = Counter()
+    for tag in soup.find_all(True):
+        attrs = tuple(sorted((k, ' '.join(v) if isinstance(v, list) else v)
+                             for k, v in tag.attrs.items()))
+        text, children = [], []
+        for child in tag.children:
+            if isinstance(child, Tag):
+                children.append(child.name)
+            elif (isinstance(child, NavigableString) and not isinstance(child, Comment)
+                  and not child.isspace()):
+                text.append(child.strip())
+        sigs[(tag.name, attrs, ' '.join(text), tuple(children))] += 1
+    return sigs
+
+def changed_tokens(old_sigs, new_sigs, old_html, new_html):
+    """Scope tokens touched by the difference between two versions of a page."""
+    tokens = set()
+    for name, attrs, text, _ in (old_sigs - new_sigs) + (new_sigs - old_sigs):
+        tokens.add(name)
+        tokens.update('@' + k for k, _ in attrs)
+        if text:
+            tokens.add('#text')
+    if old_html[:DOCTYPE_CHARS] != new_html[:DOCTYPE_CHARS]:
+        tokens.add('!doctype')
+    return tokens
+
+def affected_checks(keys, tokens):
+    return [key for key in keys
+            if CHECK_SCOPES.get(key, '*') == '*' or CHECK_SCOPES[key] & tokens]
+
+def line_map(old_html, new_html):
+    """{old line: new line} for every line left unchanged between two versions (1-based)."""
+    matcher = difflib.SequenceMatcher(None, old_html.splitlines(), new_html.splitlines(),
+                                      autojunk=False)
+    mapping = {}
+    for a, b, size in matcher.get_matching_blocks():
+        for i in range(size):
+            mapping[a + i + 1] = b + i + 1
+    return mapping
+
+def _moved(loc, lines):
+    if isinstance(loc, tuple):
+        line = lines.get(loc[0])
+        return (line, loc[1]) if line is not None else None
+    return lines.get(loc)
+
+def remap_result(result, lines):
+    """result with its issue locations moved to the new line numbers, or None if it cannot be reused."""
+    if isinstance(result, list):
+        return list(result)
+    if not isinstance(result, IssueList):
+        return None
+    moved = IssueList()
+    for rec in result:
+        samples = [_moved(loc, lines) for loc in rec.samples or ()]
+        if any(loc is None for loc in samples):
+            return None
+        moved.add(rec.text, samples[0] if samples else None, rec.count)
+        for loc in samples[1:]:
+            moved.add(rec.text, loc, 0)
+    return moved
+
+def write_report_atomic(filename, report_data):
+    """Write the report beside filename and move it into place, so a viewer never sees half a file."""
+    tmp = filename + '.tmp'
+    generate_report(tmp, report_data, generate_pdf=False)
+    os.replace(tmp, filename)
+
+class WatchSession:
+    """Re-analyzes one page in a warm process, re-running only the checks its changes affect.
+
+    The previous version's tag signatures, text and results are kept;
+    checks outside the changed scope reuse their old results with issue
+    locations moved to the new line numbers. run_profile and only narrow
+    down the checks as in run_checks.
+    """
+
+    def __init__(self, budget=None, check_timeout=None, deadlines=None, options=None,
+                 run_profile='full', only=None):
+        self.budget = budget
+        self.check_timeout = check_timeout
+        self.deadlines = deadlines
+        self.options = options or {}
+        self.run_profile = run_profile
+        self.only = only
+        self.html = None
+        self.sigs = None
+        self.results = None
+
+    def update(self, path):
+        """Analyze the current file and rewrite its report.
+
+        Returns (report filename, score, checks re-run, checks in total), or
+        None if the file's content did not change.
+        """
+        prof = profiler.Profiler()
+        prof.start()
+        try:
+            with prof.section('parse'):
+                soup, html = wc.load_html_file(path)
+            if html == self.html:
+                return None
+            keys = [job.key for job in wc.check_jobs(soup, html, prof, self.only, self.options,
+                                                     self.run_profile)]
+            sigs = tag_signatures(soup)
+            reused = {}
+            if self.results is not None:
+                tokens = changed_tokens(self.sigs, sigs, self.html, html)
+                lines = line_map(self.html, html)
+                stale = set(affected_checks(keys, tokens)) | set(self.results['incomplete'])
+                for key in keys:
+                    if key not in stale and key in self.results:
+                        result = remap_result(self.results[key], lines)
+                        if result is not None:
+                            reused[key] = result
+            rerun = [key for key in keys if key not in reused]
+            results = wc.run_checks(soup, html, prof, self.budget, self.check_timeout,
+                                    self.deadlines, only=rerun, options=self.options,
+                                    run_profile=self.run_profile)
+            # run_checks counts the reused checks as not selected: list only the real skips
+            for key in results.pop('skipped', []):
+                if key not in reused:
+                    del results[key]
+            results.pop('skip_reason', None)
+            results.update(reused)
+            wc.fill_skipped(results, self.only, [f"not run in the {self.run_profile} profile"])
+        finally:
+            prof.stop()
+        self.html, self.sigs, self.results = html, sigs, results
+        filename = wc.generate_report_filename(soup)
+        report_data = wc.build_report_data(soup, results)
+        write_report_atomic(filename, report_data)
+        return filename, report_data['score'], len(rerun), len(keys)
+
+def file_state(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+def watch(path, interval=POLL_INTERVAL, budget=None, check_timeout=None, deadlines=None,
+          options=None, run_profile='full', only=None):
+    """Analyze path, then re-analyze it whenever it changes until interrupted.
+
+    Changes are detected by polling os.stat() every interval seconds; a
+    change is analyzed once the file has stayed the same for one interval,
+    so a save still being written is not picked up half way.
+    """
+    session = WatchSession(budget, check_timeout, deadlines, options, run_profile, only)
+    seen = None
+    print(f"Watching {path} (Ctrl+C to stop)")
+    try:
+        while True:
+            state = file_state(path)
+            if state is not None and state != seen:
+                time.sleep(interval)
+                if file_state(path) != state:
+                    continue
+                seen = state
+                started = time.perf_counter()
+                outcome = session.update(path)
+                if outcome:
+                    filename, score, rerun, total = outcome
+                    print(f"{time.strftime('%H:%M:%S')} Report: {filename}, Score: {score}/100 "
+                          f"({rerun} of {total} checks re-run, "
+                          f"{(time.perf_counter() - started) * 1000:.0f} ms)")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
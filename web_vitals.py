@@ -0,0 +1,154 @@
+from urllib.parse import urlsplit
+
+from issues import IssueList, location_of
+
+# Images before this many (in document order) are assumed to be above the fold
+ABOVE_FOLD_IMAGES = 3
+# Declared width or height below this rules an image out as the LCP element
+LCP_MIN_SIZE = 100
+INLINE_SCRIPT_BUDGET_KB = 30
+INLINE_STYLE_BUDGET_KB = 15
+
+JS_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+BLOCKING_MEDIA = ('', 'all', 'screen')
+WATCHED_TAGS = {'script', 'link', 'img', 'meta', 'base'}
+
+def _tokens(tag, name):
+    value = tag.get(name) or ''
+    if isinstance(value, list):
+        value = ' '.join(value)
+    return value.lower().split()
+
+def _value(tag, name):
+    value = tag.get(name)
+    if isinstance(value, list):
+        value = ' '.join(value)
+    return value.strip().lower() if value else ''
+
+def _origin(url):
+    """scheme://host of an absolute or protocol-relative URL, else None (same page)."""
+    if url.startswith('//'):
+        url = 'https:' + url
+    if not url.startswith(('http://', 'https://')):
+        return None
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+def _dimension(tag, name):
+    value = _value(tag, name).rstrip('px')
+    return int(value) if value.isdigit() else None
+
+def is_javascript(tag):
+    return _value(tag, 'type') in JS_TYPES
+
+class VitalsCollector:
+    """Static LCP/CLS/render-blocking heuristics fed one tag at a time.
+
+    Built into the DocumentIndex walk (and the streaming tokenizer), so the
+    web-vitals checks never traverse the page on their own. Tags are passed
+    in document order with their NodeContext; findings that depend on the
+    whole page (preloads, preconnects, inline byte totals) are settled in
+    issues().
+    """
+
+    def __init__(self):
+        self.found = IssueList()
+        self.images_seen = 0
+        self.lcp = None             # first large, visible image
+        self.lcp_origin = None
+        self.preloads = set()
+        self.preconnects = set()
+        self.page_origin = None
+        self.critical_origins = {}  # origin -> location of its first render-critical use
+        self.inline_bytes = {'script': 0, 'style': 0}
+        self._issues = None
+
+    def visit(self, tag, ctx):
+        name = tag.name
+        if name not in WATCHED_TAGS:
+            return
+        if name == 'script':
+            src = tag.get('src')
+            if src and ctx.in_head and is_javascript(tag):
+                if _value(tag, 'type') != 'module' and not (tag.has_attr('async') or tag.has_attr('defer')):
+                    self.found.add(f"Render-blocking script in <head> (no async/defer): {src}",
+                                   location_of(tag))
+                self._critical(src, tag)
+        elif name == 'link':
+            rel = _tokens(tag, 'rel')
+            href = tag.get('href') or ''
+            if 'stylesheet' in rel and 'alternate' not in rel and href:
+                if _value(tag, 'media') in BLOCKING_MEDIA and not tag.has_attr('disabled'):
+                    self.found.add(f"Render-blocking stylesheet: {href}", location_of(tag))
+                self._critical(href, tag)
+            elif 'preload' in rel and _value(tag, 'as') == 'image':
+                self.preloads.add(href)
+                self.preloads.update(c.split()[0] for c in (tag.get('imagesrcset') or '').split(',')
+                                     if c.strip())
+            elif 'preconnect' in rel or 'dns-prefetch' in rel:
+                origin = _origin(href)
+                if origin:
+                    self.preconnects.add(origin)
+            elif 'canonical' in rel and self.page_origin is None:
+                self.page_origin = _origin(href)
+        elif name == 'img':
+            self._image(tag, ctx)
+        elif name == 'meta':
+            if self.page_origin is None and tag.get('property') == 'og:url':
+                self.page_origin = _origin(tag.get('content') or '')
+        elif name == 'base':
+            if self.page_origin is None:
+                self.page_origin = _origin(tag.get('href') or '')
+
+    def _critical(self, url, tag):
+        origin = _origin(url)
+        if origin and origin not in self.critical_origins:
+            self.critical_origins[origin] = location_of(tag)
+
+    def _image(self, tag, ctx):
+        src = tag.get('src')
+        style = _value(tag, 'style')
+        if not (tag.has_attr('width') and tag.has_attr('height')):
+            if 'aspect-ratio' not in style and not ('width' in style and 'height' in style):
+                self.found.add(f"Image without width/height (layout shift risk): {src}",
+                               location_of(tag))
+        if ctx.hidden or ctx.in_head or not src:
+            return
+        lazy = _value(tag, 'loading') == 'lazy'
+        if self.lcp is None:
+            width, height = _dimension(tag, 'width'), _dimension(tag, 'height')
+            if not ((width is not None and width < LCP_MIN_SIZE)
+                    or (height is not None and height < LCP_MIN_SIZE)):
+                self.lcp = (src, _value(tag, 'fetchpriority') == 'high', lazy, location_of(tag))
+                self._critical(src, tag)
+                self.images_seen += 1
+                return
+        if self.images_seen >= ABOVE_FOLD_IMAGES and not lazy:
+            self.found.add(f"Below-the-fold image not lazy-loaded: {src}", location_of(tag))
+        self.images_seen += 1
+
+    def inline(self, tag, nbytes):
+        """Count the bytes of an inline <script> or <style> block."""
+        if tag.name == 'style' or (tag.name == 'script' and not tag.get('src') and is_javascript(tag)):
+            self.inline_bytes[tag.name] += nbytes
+
+    def issues(self):
+        """All findings; computed once, after the last tag was visited."""
+        if self._issues is not None:
+            return self._issues
+        found = self.found
+        if self.lcp is not None:
+            src, high_priority, lazy, loc = self.lcp
+            if lazy:
+                found.add(f"Likely LCP image is lazy-loaded: {src}", loc)
+            elif not high_priority and src not in self.preloads:
+                found.add(f"Likely LCP image has no preload or fetchpriority=high: {src}", loc)
+        for origin, loc in self.critical_origins.items():
+            if origin != self.page_origin and origin not in self.preconnects:
+                found.add(f"No preconnect for third-party origin: {origin}", loc)
+        for kind, budget in (('script', INLINE_SCRIPT_BUDGET_KB), ('style', INLINE_STYLE_BUDGET_KB)):
+            kb = self.inline_bytes[kind] / 1024
+            if kb > budget:
+                found.add(f"Inline {kind} blocks total {kb:.1f} KB (budget {budget} KB)")
+        self._issues = found
+        return found
@@ -1,33 +1,48 @@
 import os
 import re
-import ssl
+import time
+import hashlib
 import logging
-import urllib.request
-import requests
-import cssutils
-from bs4 import BeautifulSoup
-from PIL import ImageColor
-
-# Optional PDF conversion
-try:
-    import pdfkit
-    PDF_EXPORT_AVAILABLE = True
-except ImportError:
-    PDF_EXPORT_AVAILABLE = False
-
-# Suppress cssutils warnings/errors to handle modern CSS (var, calc, etc.)
-cssutils.log.setLevel(logging.CRITICAL)
+import threading
+import argparse
+import net
+import profiler
+import link_graph
+from dom_index import get_index
+from issues import IssueList, location_of
+from net import get_ssl_context
+from scheduler import Job, Scheduler, checkpoint
+from scoring import RESULT_CATEGORIES, calculate_score, calculate_deductions
+from report import (PDF_EXPORT_AVAILABLE, generate_report, generate_report_filename,
+                    report_filename_for_title)
+
+# requests, cssutils, PIL and bs4 are imported on first use so that importing
+# this module (or running checks that never touch them) stays cheap.
 
 HTML_FILE_PATH = 'website_content.txt'
+# Links probed at once; per-host pacing is left to net.rate_controller
+LINK_POOL_SIZE = 8
 
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
+_cssutils = None
+
+def get_cssutils():
+    """Import cssutils on first use with its noisy logging silenced."""
+    global _cssutils
+    if _cssutils is None:
+        import cssutils
+        # Suppress cssutils warnings/errors to handle modern CSS (var, calc, etc.)
+        cssutils.log.setLevel(logging.CRITICAL)
+        _cssutils = cssutils
+    return _cssutils
+
+def parse_html(html_content):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html_content, 'html.parser')
 
 def load_html_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         html_content = file.read()
-    return BeautifulSoup(html_content, 'html.parser'), html_content
+    return parse_html(html_content), html_content
 
 def get_report_author():
     """Return a fixed brand/author."""
@@ -36,18 +51,25 @@ def get_report_author():
 def get_title_and_url(soup):
     """Extract <title> and best guess at canonical or representative URL."""
     title_tag = soup.find('title')
-    title = title_tag.get_text().strip() if title_tag else "Untitled Website"
-
     canonical_url_tag = soup.find('link', rel='canonical')
-    if canonical_url_tag:
-        url = canonical_url_tag.get('href', 'URL not found')
+    base_url_tag = soup.find('meta', attrs={'property': 'og:url'})
+    first_link = soup.find('a', href=True)
+    return pick_title_and_url(
+        title_tag.get_text() if title_tag else None,
+        canonical_url_tag.get('href', 'URL not found') if canonical_url_tag else None,
+        base_url_tag.get('content', 'URL not found') if base_url_tag else None,
+        first_link['href'] if first_link else None,
+    )
+
+def pick_title_and_url(title, canonical=None, og_url=None, first_href=None):
+    """Title and representative URL from what the page declares, best source first."""
+    title = title.strip() if title is not None else "Untitled Website"
+    if canonical is not None:
+        url = canonical
+    elif og_url is not None:
+        url = og_url
     else:
-        base_url_tag = soup.find('meta', attrs={'property': 'og:url'})
-        if base_url_tag:
-            url = base_url_tag.get('content', 'URL not found')
-        else:
-            first_link = soup.find('a', href=True)
-            url = first_link['href'] if first_link else 'URL not found'
+        url = first_href if first_href is not None else 'URL not found'
 
     # Basic check for a valid https TLD; fallback otherwise
     if not re.match(r'^https:\/\/.*\.(com|org|gov|edu|net)(\/.*)?$', url):
@@ -56,34 +78,41 @@ def get_title_and_url(soup):
     return title, url
 
 def check_missing_alt(soup):
-    issues = []
+    issues = IssueList()
+    index = get_index(soup)
     for img in soup.find_all('img'):
         alt_text = img.get('alt')
-        aria_hidden = img.get('aria-hidden') == 'true'
+        # Hidden by itself or by any ancestor
+        aria_hidden = index.context(img).hidden
         role_presentation = img.get('role') == 'presentation'
         if not alt_text and not aria_hidden and not role_presentation:
-            issues.append(f"Image missing alt text: {img.get('src')}")
+            issues.add(f"Image missing alt text: {img.get('src')}", location_of(img))
     return issues
 
 def check_clickable_images(soup):
     """Images that appear clickable but aren't properly linked."""
-    issues = []
+    issues = IssueList()
+    index = get_index(soup)
     for img in soup.find_all('img'):
-        if img.get('onclick') or img.find_parent('a'):
-            parent_a = img.find_parent('a')
+        parent_a = index.parent_context(img).anchor
+        if img.get('onclick') or parent_a:
             if parent_a and not parent_a.get('href'):
-                issues.append(f"Clickable image without real link: {img.get('src')}")
+                issues.add(f"Clickable image without real link: {img.get('src')}", location_of(img))
             elif not parent_a:
-                issues.append(f"Image onclick without anchor/href: {img.get('src')}")
+                issues.add(f"Image onclick without anchor/href: {img.get('src')}", location_of(img))
     return issues
 
 def check_responsive_viewport(soup):
-    issues = []
     mv = soup.find('meta', attrs={'name': 'viewport'})
-    if not mv:
+    return viewport_issues(mv.get('content', '') if mv else None)
+
+def viewport_issues(content):
+    """content of the first viewport meta tag, or None if there is none."""
+    issues = []
+    if content is None:
         issues.append("No responsive 'viewport' meta tag.")
     else:
-        content = mv.get('content', '').lower()
+        content = content.lower()
         if "width=device-width" not in content:
             issues.append(f"Viewport meta tag present but possibly misconfigured: '{content}'")
     return issues
@@ -98,26 +127,31 @@ def check_modern_doctype(html_text):
 
 def check_layout_tables(soup):
     """Detect multiple <table> usage indicating old layout techniques."""
+    return layout_table_issues(len(soup.find_all('table')))
+
+def layout_table_issues(table_count):
     issues = []
-    tables = soup.find_all('table')
-    if len(tables) > 5:
+    if table_count > 5:
         issues.append("Excessive <table> usage; possible legacy layout approach.")
     return issues
 
+KEY_PATTERNS = {
+    'AWS Access Key': r'AKIA[0-9A-Z]{16}',
+    'JWT': r'eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+',
+    'Google API Key': r'AIza[0-9A-Za-z-_]{35}',
+    'Generic API Key': r'api_key\s*=\s*[\'"][A-Za-z0-9-_]{16,}[\'"]',
+    'Slack Token': r'xox[baprs]-[A-Za-z0-9-]{10,48}'
+}
+
 def check_exposed_keys(html_content):
     """Look for common API key/JWT patterns in text."""
-    patterns = {
-        'AWS Access Key': r'AKIA[0-9A-Z]{16}',
-        'JWT': r'eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+',
-        'Google API Key': r'AIza[0-9A-Za-z-_]{35}',
-        'Generic API Key': r'api_key\s*=\s*[\'"][A-Za-z0-9-_]{16,}[\'"]',
-        'Slack Token': r'xox[baprs]-[A-Za-z0-9-]{10,48}'
-    }
-    found = []
-    for key_type, pattern in patterns.items():
-        matches = re.findall(pattern, html_content)
-        for match in matches:
-            found.append(f"Exposed {key_type}: {match}")
+    found = IssueList()
+    for key_type, pattern in KEY_PATTERNS.items():
+        line, pos = 1, 0
+        for match in re.finditer(pattern, html_content):
+            line += html_content.count('\n', pos, match.start())
+            pos = match.start()
+            found.add(f"Exposed {key_type}: {match.group(0)}", line)
     return found
 
 def check_https(soup):
@@ -129,126 +163,341 @@ def check_https(soup):
             insecure_links.add(url)
     return list(insecure_links)
 
-def check_broken_links(soup):
-    """Attempt HEAD requests for found links to see if 404 or other error."""
+def check_link(href):
+    """HEAD-style probe of one URL; returns a broken reason string or None if fine.
+
+    URLs on a host whose circuit is open (see net.HostHealth) fail at once
+    with net.HOST_UNREACHABLE. Requests are paced by net.rate_controller; a
+    429/503 is retried with jittered backoff (honoring Retry-After) and, if
+    the host still throttles, reported as net.THROTTLED rather than broken.
+    """
+    if not net.host_health.allow(href):
+        return net.HOST_UNREACHABLE
+    try:
+        return _check_link_attempts(href)
+    finally:
+        # A cancelled or throttled half-open probe must not keep the circuit shut
+        net.host_health.release(href)
+
+def _check_link_attempts(href):
+    """check_link's request/retry loop, once the host is allowed."""
+    attempt = 0
+    while True:
+        if not net.rate_controller.acquire(href):
+            return net.THROTTLED
+        checkpoint()
+        started = time.perf_counter()
+        status, reason, unreachable, retry_after = _probe_link(href)
+        elapsed = time.perf_counter() - started
+        if unreachable:
+            net.host_health.failure(href)
+        else:
+            net.host_health.success(href)
+        net.rate_controller.feedback(href, status, elapsed, retry_after)
+        profiler.record_request(href, status, 0, elapsed)
+        if status not in net.THROTTLE_STATUSES:
+            return reason
+        delay = net.retry_delay(attempt, retry_after)
+        if delay is None:
+            return net.THROTTLED
+        time.sleep(delay)
+        attempt += 1
+
+def _probe_link(href):
+    """One request to href: (status, reason, unreachable, retry_after seconds)."""
+    import ssl
+    import urllib.request
+    status = None
+    reason = None
+    unreachable = False
+    retry_after = None
+    try:
+        req = urllib.request.Request(href, headers={'User-Agent': 'Mozilla/5.0'})
+        response = urllib.request.urlopen(req, context=get_ssl_context(), timeout=5)
+        status = response.status
+        if not (200 <= response.status < 300):
+            reason = str(response.status)
+    except urllib.error.HTTPError as e:
+        status = e.code
+        retry_after = net.parse_retry_after(e.headers.get('Retry-After'))
+        if 400 <= e.code < 600:
+            reason = str(e.code)
+    except urllib.error.URLError as e:
+        if "SSL" in str(e.reason):
+            reason = "security"
+        else:
+            unreachable = True
+            reason = "timeout" if isinstance(e.reason, TimeoutError) else net.HOST_UNREACHABLE
+    except ssl.SSLError:
+        reason = "security"
+    except TimeoutError:
+        unreachable = True
+        reason = "timeout"
+    except Exception:
+        reason = "unexpected_error"
+    return status, reason, unreachable, retry_after
+
+def check_broken_links(soup, site_links=None):
+    """Verify #fragment links on the page offline; probe the truly external http(s) links.
+
+    Links to other pages on the page's own site are never probed: in a
+    batch, site_links (a link_graph.SiteLinks holding the rest of it)
+    verifies them against the captured pages; a single page cannot verify
+    them offline and leaves them out.
+    """
+    key = link_graph.page_key(soup)
+    return page_link_issues(link_graph.collect_links(soup, key), link_graph.link_targets(soup), key)
+
+def page_link_issues(links, targets, key=None):
+    """check_broken_links on a page's collected links (link_graph entries) and fragment targets."""
+    broken = link_graph.fragment_issues(links, targets)
+    external = [link['url'] for link in links
+                if not link['local'] and link['url'].startswith(('http://', 'https://'))
+                and not (key is not None and link_graph.same_site(link['url'], key))]
+    return find_broken_links(external) + broken
+
+def find_broken_links(hrefs, pool_size=LINK_POOL_SIZE):
+    """(href, reason) for each broken http(s) URL in hrefs; probes are cached per URL.
+
+    Uncached links are probed on pool_size threads; net.rate_controller keeps
+    each host to a rate it can take. Throttled links are left out, since a
+    429/503 says nothing about whether the link works.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
     broken = set()
-    links = soup.find_all('a', href=True)
-    for link in links:
-        href = link['href']
-        if href.startswith('http'):
-            try:
-                req = urllib.request.Request(href, headers={'User-Agent': 'Mozilla/5.0'})
-                response = urllib.request.urlopen(req, context=ssl_context, timeout=5)
-                if not (200 <= response.status < 300):
-                    broken.add((href, str(response.status)))
-            except urllib.error.HTTPError as e:
-                if 400 <= e.code < 600:
-                    broken.add((href, str(e.code)))
-            except urllib.error.URLError as e:
-                if "SSL" in str(e.reason):
-                    broken.add((href, "security"))
-            except ssl.SSLError:
-                broken.add((href, "security"))
-            except TimeoutError:
-                broken.add((href, "timeout"))
-            except Exception:
-                broken.add((href, "unexpected_error"))
+    pending = []
+    for href in dict.fromkeys(href for href in hrefs if href.startswith('http')):
+        reason = net.link_cache.get(href)
+        if reason is net.MISSING:
+            pending.append(href)
+        elif reason:
+            broken.add((href, reason))
+    if not pending:
+        return list(broken)
+
+    prof = profiler.active()
+
+    def probe(href):
+        profiler.activate(prof)
+        try:
+            return href, check_link(href)
+        finally:
+            profiler.activate(None)
+
+    threads = ThreadPoolExecutor(max_workers=min(pool_size, len(pending)))
+    try:
+        for future in as_completed([threads.submit(probe, href) for href in pending]):
+            checkpoint()
+            href, reason = future.result()
+            if reason not in (net.HOST_UNREACHABLE, net.THROTTLED):
+                net.link_cache.set(href, reason)
+            if reason and reason != net.THROTTLED:
+                broken.add((href, reason))
+    finally:
+        # Do not wait for stragglers when the check was cancelled
+        threads.shutdown(wait=False, cancel_futures=True)
     return list(broken)
 
+def head_image(src):
+    """HEAD one image URL; returns (status, content_length) with None for unknowns.
+
+    status is net.HOST_UNREACHABLE while the image host's circuit is open and
+    net.THROTTLED if it still answers 429/503 after retries (see check_link).
+    """
+    if not net.host_health.allow(src):
+        return net.HOST_UNREACHABLE, None
+    try:
+        return _head_image_attempts(src)
+    finally:
+        net.host_health.release(src)
+
+def _head_image_attempts(src):
+    """head_image's request/retry loop, once the host is allowed."""
+    import requests
+    attempt = 0
+    while True:
+        if not net.rate_controller.acquire(src):
+            return net.THROTTLED, None
+        checkpoint()
+        started = time.perf_counter()
+        try:
+            r = net.get_session().head(src, allow_redirects=True, timeout=10)
+        except requests.exceptions.RequestException as e:
+            elapsed = time.perf_counter() - started
+            net.rate_controller.feedback(src, None, elapsed)
+            if net.connection_failed(e):
+                net.host_health.failure(src)
+                return net.HOST_UNREACHABLE, None
+            profiler.record_request(src, None, 0, elapsed)
+            return None, None
+        elapsed = time.perf_counter() - started
+        net.host_health.success(src)
+        retry_after = net.parse_retry_after(r.headers.get('Retry-After'))
+        net.rate_controller.feedback(src, r.status_code, elapsed, retry_after)
+        profiler.record_request(src, r.status_code, 0, elapsed)
+        if r.status_code not in net.THROTTLE_STATUSES:
+            length = r.headers.get('Content-Length')
+            return r.status_code, int(length) if length and length.isdigit() else None
+        delay = net.retry_delay(attempt, retry_after)
+        if delay is None:
+            return net.THROTTLED, None
+        time.sleep(delay)
+        attempt += 1
+
 def check_image_sizes(soup):
     """Flag images over ~200KB."""
+    return find_large_images(img['src'] for img in soup.find_all('img', src=True))
+
+def find_large_images(srcs):
+    """(src, kb) for each http(s) image whose Content-Length is over ~200KB."""
     large = []
-    session = requests.Session()
-    session.headers.update({'User-Agent': 'WebsiteChecker/1.0'})
-    for img in soup.find_all('img', src=True):
-        src = img['src']
-        if src.startswith('http'):
-            try:
-                r = session.head(src, allow_redirects=True, timeout=10)
-                if r.status_code == 200 and 'Content-Length' in r.headers:
-                    kb = int(r.headers['Content-Length'])/1024
-                    if kb > 200:
-                        large.append((src, kb))
-            except requests.exceptions.RequestException:
-                pass
+    srcs = [src for src in srcs if src.startswith('http')]
+    for src in srcs:
+        checkpoint()
+        head = net.image_size_cache.get(src)
+        if head is net.MISSING:
+            head = head_image(src)
+            if head[0] not in (net.HOST_UNREACHABLE, net.THROTTLED):
+                net.image_size_cache.set(src, head)
+        status, length = head
+        if status == 200 and length is not None:
+            kb = length/1024
+            if kb > 200:
+                large.append((src, kb))
     return large
 
 def check_accessibility(soup):
     """Basic checks: <html lang>, main content."""
-    issues = []
     html_tag = soup.find('html')
-    if html_tag and not html_tag.get('lang'):
+    return accessibility_issues(html_tag.get('lang', '') if html_tag else None,
+                                get_index(soup).main is not None)
+
+def accessibility_issues(html_lang, has_main):
+    """html_lang is None when the page has no <html> tag at all."""
+    issues = []
+    if html_lang is not None and not html_lang:
         issues.append("Missing 'lang' attribute in <html>.")
-    main_area = soup.find('main') or soup.find(attrs={"role": "main"})
-    if not main_area:
+    if not has_main:
         issues.append("Missing <main> or role='main' for primary content.")
     return issues
 
 def check_missing_aria(soup):
-    """Check interactive elements lacking aria-label/title/inner text."""
-    issues = []
+    """Check interactive elements lacking an accessible name.
+
+    Names come from aria-label, a resolvable aria-labelledby, <label for>/a
+    wrapping <label>, alt/title/value/placeholder or the element's content;
+    see dom_index.DocumentIndex.has_accessible_name.
+    """
+    issues = IssueList()
+    index = get_index(soup)
     interactive = soup.find_all(['button','a','input','select','textarea'])
     for elem in interactive:
-        if elem.name == 'a' and not elem.get('href'):
+        # Elements inside aria-hidden are not exposed to assistive technology
+        if not index.needs_name(elem) or index.context(elem).hidden:
             continue
-        accessible_name = (
-            elem.get('aria-label') or
-            elem.get('aria-labelledby') or
-            elem.get('alt') or
-            elem.get('title') or
-            elem.get_text(strip=True)
-        )
-        if not accessible_name:
+        if not index.has_accessible_name(elem):
             e_id = elem.get('id','')
             e_cls = ' '.join(elem.get('class',[]))
-            issues.append(f"Missing accessible name: <{elem.name} id='{e_id}' class='{e_cls}'>")
+            issues.add(f"Missing accessible name: <{elem.name} id='{e_id}' class='{e_cls}'>",
+                       location_of(elem))
     return issues
 
+def check_web_vitals(soup):
+    """Static LCP/CLS/render-blocking heuristics; see web_vitals.VitalsCollector."""
+    return get_index(soup).vitals.issues()
+
 def check_keyboard_accessibility(soup):
     """Elements with onclick but no tabIndex might not be keyboard-accessible."""
-    issues = []
+    issues = IssueList()
     clickable_elems = soup.find_all(attrs={'onclick': True})
     for elem in clickable_elems:
         # If not a default interactive tag:
         if elem.name not in ['a','button','input','textarea','select'] and not elem.has_attr('tabindex'):
-            issues.append(f"Possible keyboard trap: <{elem.name}> has onclick, no tabIndex.")
+            issues.add(f"Possible keyboard trap: <{elem.name}> has onclick, no tabIndex.",
+                       location_of(elem))
     return issues
 
 def check_outdated_html(soup):
     """Look for deprecated tags."""
-    issues = []
+    issues = IssueList()
     for tag in ['font','center','marquee','blink']:
         found = soup.find_all(tag)
         for f in found:
-            issues.append(f"Deprecated tag <{tag}> found.")
+            issues.add(f"Deprecated tag <{tag}> found.", location_of(f))
     return issues
 
-def check_color_contrast(soup, html_content):
-    """Use cssutils to parse color rules and measure contrast where possible."""
-    issues = []
+def fetch_stylesheet(href):
+    """GET one linked stylesheet; returns its text or None."""
+    import requests
+    css = net.stylesheet_cache.get(href)
+    if css is not net.MISSING:
+        return css
+    if not net.host_health.allow(href):
+        return None
+    css = None
+    try:
+        if not net.rate_controller.acquire(href):
+            return None
+        started = time.perf_counter()
+        resp = net.get_session().get(href, timeout=10)
+        elapsed = time.perf_counter() - started
+        net.host_health.success(href)
+        net.rate_controller.feedback(href, resp.status_code, elapsed,
+                                     net.parse_retry_after(resp.headers.get('Retry-After')))
+        profiler.record_request(href, resp.status_code, len(resp.content), elapsed)
+        if resp.status_code in net.THROTTLE_STATUSES:
+            return None
+        if resp.status_code == 200:
+            css = resp.text
+    except requests.exceptions.RequestException as e:
+        profiler.record_request(href, None, 0, time.perf_counter() - started)
+        net.rate_controller.feedback(href, None, time.perf_counter() - started)
+        if net.connection_failed(e):
+            net.host_health.failure(href)
+            return None
+    finally:
+        net.host_health.release(href)
+    net.stylesheet_cache.set(href, css)
+    return css
+
+def collect_stylesheets(soup):
+    """Inline <style> blocks followed by linked (http) stylesheets, as CSS text."""
+    return [css for _, _, css in collect_stylesheet_sources(soup)]
+
+def collect_stylesheet_sources(soup, fetch=True):
+    """(source, tag, css_text) per stylesheet: inline <style> blocks, then linked ones.
+
+    source is the href of a linked stylesheet or "inline style #N".
+    fetch=False leaves out linked stylesheets, so nothing goes to the network.
+    """
     style_sheets = []
 
     # 1) Inline <style> blocks
-    for st in soup.find_all('style'):
+    for n, st in enumerate(soup.find_all('style'), 1):
         if st.string:
-            style_sheets.append(st.string)
+            style_sheets.append((f"inline style #{n}", st, st.string))
 
     # 2) Linked stylesheets
-    session = requests.Session()
-    session.headers.update({'User-Agent': 'WebsiteChecker/1.0'})
-    for lk in soup.find_all('link', rel='stylesheet'):
+    for lk in soup.find_all('link', rel='stylesheet') if fetch else ():
         href = lk.get('href')
         if href and href.startswith('http'):
-            try:
-                resp = session.get(href, timeout=10)
-                if resp.status_code == 200:
-                    style_sheets.append(resp.text)
-            except requests.exceptions.RequestException:
-                pass
-
-    # Parse combined CSS text
+            checkpoint()
+            css = fetch_stylesheet(href)
+            if css is not None:
+                style_sheets.append((href, lk, css))
+    return style_sheets
+
+_styles_map_cache = net.TTLCache(maxsize=64)
+net.CACHES['parsed_css'] = _styles_map_cache
+
+def parse_styles_map(combined_css):
+    """Map selectorText -> declarations for every style rule; cached per CSS text."""
+    key = hashlib.sha1(combined_css.encode('utf-8')).hexdigest()
+    styles_map = _styles_map_cache.get(key)
+    if styles_map is not net.MISSING:
+        return styles_map
+    cssutils = get_cssutils()
     parser = cssutils.CSSParser(raiseExceptions=False, validate=False)
-    combined_css = '\n'.join(style_sheets)
     stylesheet = parser.parseString(combined_css)
 
     # Store selectors -> style
@@ -258,9 +507,22 @@ def check_color_contrast(soup, html_content):
             sel = rule.selectorText
             style = rule.style.cssText
             styles_map[sel] = style
+    _styles_map_cache.set(key, styles_map)
+    return styles_map
+
+def check_color_contrast(soup, styles_map):
+    """Use cssutils to parse color rules and measure contrast where possible."""
+    from PIL import ImageColor
+    cssutils = get_cssutils()
+    issues = IssueList()
+    index = get_index(soup)
 
     def get_computed_style(element):
         s_list = []
+        # Inline style of the nearest styled ancestor, overridden by anything below
+        styled = index.parent_context(element).styled
+        if styled is not None:
+            s_list.append(styled['style'])
         if element.has_attr('style'):
             s_list.append(element['style'])
         e_id = element.get('id')
@@ -279,12 +541,13 @@ def check_color_contrast(soup, html_content):
         return ';'.join(s_list)
 
     # Analyze text contrast in main or body
-    container = soup.find('main') or soup.find(attrs={"role": "main"}) or soup.body
+    container = index.main or soup.body
     if not container:
         return issues
 
     text_elems = container.find_all(string=True)
     for txt in text_elems:
+        checkpoint()
         if txt.strip():
             par = txt.parent
             if par.name not in ['style','script','head','title','meta','[document]']:
@@ -314,336 +577,73 @@ def check_color_contrast(soup, html_content):
                     ratio = (max(l1,l2)+0.05)/(min(l1,l2)+0.05)
                     if ratio < 4.5:
                         snippet = txt.strip()[:30]
-                        issues.append(f"Low contrast ratio ({ratio:.2f}) for text: '{snippet}'")
+                        issues.add(f"Low contrast ratio ({ratio:.2f}) for text: '{snippet}'",
+                                   location_of(par))
     return issues
 
-def check_unused_css_js(soup):
-    """Placeholder for advanced usage if needed."""
-    return []
-
-def check_grammar(text_content):
-    """Placeholder for grammar checks, if needed."""
-    return []
-
-def calculate_score(results):
-    """Generate overall site score (100 max)."""
-    score = 100
-    exposed = len(results['exposed_keys'])
-    broken_404 = len([b for b in results['broken_links'] if b[1] == '404'])
-    a11y = len(results['accessibility'])
-    kb_a11y = len(results['keyboard_accessibility'])
-    clickable_imgs = len(results['clickable_images'])
-
-    # Major
-    score -= min(exposed * 17, 35)
-    score -= min(broken_404 * 5, 25)
-    score -= min(a11y * 10, 20)
-    score -= min(kb_a11y * 10, 20)
-    score -= min(clickable_imgs * 5, 10)
-
-    # Minor
-    if results['missing_aria']:   score -= 5
-    if results['missing_alt']:    score -= 5
-    if results['https']:          score -= 5
-    if results['outdated_html']:  score -= 5
-    if results['large_images']:   score -= 5
-    if results['color_contrast']: score -= 5
-    if results['responsive_viewport']: score -= 5
-    if results['modern_doctype']:     score -= 5
-    if results['layout_tables']:      score -= 5
-
-    return max(min(score, 100), 0)
-
-def calculate_deductions(results):
-    d = {}
-    exposed = len(results['exposed_keys'])
-    broken_404 = len([b for b in results['broken_links'] if b[1] == '404'])
-    a11y = len(results['accessibility'])
-    kb_a11y = len(results['keyboard_accessibility'])
-    clickable_imgs = len(results['clickable_images'])
-
-    d['Exposed API Keys/JWTs Deducted']        = min(exposed * 17, 35)
-    d['Broken Links Deducted']                 = min(broken_404 * 5, 25)
-    d['508 Accessibility Issues Deducted']     = min(a11y * 10, 20)
-    d['Keyboard Accessibility Issues Deducted']= min(kb_a11y * 10, 20)
-    d['Clickable Image Issues Deducted']       = min(clickable_imgs * 5, 10)
-
-    d['Missing ARIA Labels Deducted']         = 5 if results['missing_aria'] else 0
-    d['Missing Alt Text Deducted']            = 5 if results['missing_alt'] else 0
-    d['HTTPS Compliance Issues Deducted']      = 5 if results['https'] else 0
-    d['Outdated HTML Tags Deducted']           = 5 if results['outdated_html'] else 0
-    d['Large Images Deducted']                 = 5 if results['large_images'] else 0
-    d['Color Contrast Issues Deducted']        = 5 if results['color_contrast'] else 0
-    d['Responsive Viewport Deducted']          = 5 if results['responsive_viewport'] else 0
-    d['Modern Doctype Deducted']               = 5 if results['modern_doctype'] else 0
-    d['Layout Tables Deducted']                = 5 if results['layout_tables'] else 0
-
-    return d
-
-def generate_report_filename(soup):
-    t = soup.find('title')
-    title = t.get_text().strip() if t else "website_report"
-    safe_title = re.sub(r'\W+', '_', title)
-    return f"{safe_title}_report.html"
-
-def generate_explanations():
-    return {
-        'Exposed API Keys/JWTs': "Exposed keys/tokens let attackers access private resources.",
-        '508 Accessibility Issues': "Accessibility shortfalls affect disabled users.",
-        'Keyboard Accessibility Issues': "All features must be usable without a mouse.",
-        'Broken Links': "Dead links frustrate users and harm credibility.",
-        'Clickable Image Issues': "Images that appear clickable but do nothing confuse visitors.",
-        'Color Contrast Issues': "Low contrast text is hard to read.",
-        'Missing ARIA Labels': "Screen readers rely on ARIA for clarity.",
-        'Large Images (over 200KB)': "Huge images slow page loads.",
-        'HTTPS Compliance': "Insecure HTTP can expose user data.",
-        'Outdated HTML Tags': "Deprecated tags may break in modern browsers.",
-        'Missing Alt Text': "Alt text is crucial for accessibility.",
-        'Responsive Viewport': "Mobile usability requires a proper viewport tag.",
-        'Modern Doctype': "HTML5 doctype recommended for modern standards.",
-        'Layout Tables': "Tables for layout hamper responsiveness."
-    }
-
-def generate_report(report_filename, report_data, generate_pdf=False):
-    """Create an HTML report; optionally convert to PDF if pdfkit is available."""
-    title = report_data['title']
-    url = report_data['url']
-    author = report_data.get('author_name', 'NOVAMKR, LLC')
-    score = report_data['score']
-    deductions = report_data.get('deductions', {})
-    issues_data = report_data['issues_data']
-    notes = report_data.get('notes', {})
-    explanations = generate_explanations()
-
-    sev_levels = {
-        'Exposed API Keys/JWTs': 'high',
-        '508 Accessibility Issues': 'high',
-        'Keyboard Accessibility Issues': 'high',
-        'Broken Links': 'high',
-        'Clickable Image Issues': 'medium',
-        'Color Contrast Issues': 'medium',
-        'Missing ARIA Labels': 'medium',
-        'Large Images (over 200KB)': 'low',
-        'HTTPS Compliance': 'low',
-        'Outdated HTML Tags': 'low',
-        'Missing Alt Text': 'info',
-        'Responsive Viewport': 'low',
-        'Modern Doctype': 'low',
-        'Layout Tables': 'low'
-    }
-    sev_colors = {
-        'high': '#c0392b',
-        'medium': '#b89a00',
-        'low': '#27ae60',
-        'info': '#2980b9',
-        'none': '#b0b0b0'
-    }
-
-    # Maintain a sorted category display
-    order = [
-        'Exposed API Keys/JWTs',
-        '508 Accessibility Issues',
-        'Keyboard Accessibility Issues',
-        'Broken Links',
-        'Clickable Image Issues',
-        'Color Contrast Issues',
-        'Missing ARIA Labels',
-        'Large Images (over 200KB)',
-        'HTTPS Compliance',
-        'Outdated HTML Tags',
-        'Missing Alt Text',
-        'Responsive Viewport',
-        'Modern Doctype',
-        'Layout Tables'
-    ]
-
-    with open(report_filename, 'w', encoding='utf-8') as f:
-        f.write(f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <title>Website Analysis Report</title>
-    <meta charset="UTF-8">
-    <style>
-    body {{
-        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-        background-color: #1e1e1e; color: #c7c7c7; margin: 0; padding: 0;
-    }}
-    h1, h2, h3 {{ color: #fff; }}
-    h1 {{ background-color: #252526; padding: 20px; margin: 0; text-align: center; }}
-    header, main, footer {{ margin: 0 auto; max-width: 800px; padding: 20px; }}
-    ul {{ list-style-type: none; padding: 0; }}
-    li {{ background-color: #2d2d2d; margin: 5px 0; padding: 10px; border-radius: 5px; }}
-    .description {{ font-style: italic; color: #9b9b9b; margin-top: 10px; }}
-    .health-bar-container {{
-        background-color: rgba(255,255,255,0.1);
-        border-radius: 5px; overflow: hidden; margin-top: 20px;
-        cursor: pointer; position: relative;
-    }}
-    .health-bar {{
-        height: 30px; width: {score}%;
-        background-color: {"#c0392b" if score < 50 else "#b89a00" if score < 80 else "#27ae60"};
-        transition: width 0.5s, background-color 0.5s; opacity: 0.8;
-    }}
-    .health-score-text {{
-        position: absolute; top: 0; left: 50%; transform: translateX(-50%);
-        line-height: 30px; color: #fff; font-weight: bold;
-    }}
-    .collapsible {{
-        background-color: #252526; color: #fff; cursor: pointer; padding: 10px;
-        width: 100%; border: none; text-align: left; outline: none; font-size: 15px;
-        margin-top: 10px; border-radius: 5px;
-    }}
-    .collapsible:hover {{ background-color: #313135; }}
-    .content {{
-        padding: 0 18px; max-height: 0; overflow: hidden;
-        transition: max-height 0.2s ease-out; background-color: #2d2d30; margin-bottom: 10px;
-    }}
-    .content ul {{ padding: 10px; }}
-    .section-title {{ padding: 10px; border-radius: 5px; margin-top: 10px; }}
-    .note {{ font-style: italic; color: #9b9b9b; display: block; margin-top: 5px; }}
-    </style>
-</head>
-<body>
-<header>
-    <h1>Website Analysis Report</h1>
-</header>
-<main>
-    <h2>Website Analyzed</h2>
-    <p>Title: {title}</p>
-    <p>URL: <a href="{url}" target="_blank" style="color: #c7c7c7;">{url}</a></p>
-    <p>Report generated by: {author}</p>
-    <h2>Summary of Issues Detected</h2>
-    <p>Breakdown of potential issues. Click categories for details.</p>
-    <h2>Website Health Score</h2>
-    <div class="health-bar-container" onclick="toggleScoreDetails()">
-        <div class="health-bar"></div>
-        <div class="health-score-text">{score}/100</div>
-    </div>
-    <div id="score-details" style="display:none; margin-top: 10px;">
-        <p>Score is based on critical vs minor issues. Deductions below:</p>
-        <ul>""")
-        for dtitle, points in deductions.items():
-            if points > 0:
-                f.write(f"<li>{dtitle}: {points} points</li>")
-        f.write("""</ul>
-    </div>
-    <p class="description">Click the bar above to view/hide deduction breakdown.</p>
-""")
-
-        # Render each category in predefined order
-        for cat in order:
-            cat_issues = issues_data.get(cat, {}).get('issues', [])
-            count = len(cat_issues)
-            severity = sev_levels.get(cat, 'none')
-            color = sev_colors.get(severity, '#fff')
-
-            f.write(f"""
-<button type="button" class="collapsible section-title"
-        style="background-color:{color if count > 0 else '#555'};color:#fff;">
-    {cat} ({count})
-</button>
-<div class="content">""")
-
-            if count > 0:
-                f.write(f"<p>{count} issue(s) found.</p><ul>")
-                cat_expl_shown = False
-                short_expl = explanations.get(cat, '')
-                for issue in cat_issues:
-                    issue_text = issue if isinstance(issue, str) else issue[0]
-                    f.write(f"<li>{issue_text}")
-                    if short_expl and not cat_expl_shown:
-                        f.write(f"<br><span class='note'>{short_expl}</span>")
-                        cat_expl_shown = True
-                    # If we track user notes
-                    if cat in notes and issue_text in notes[cat]:
-                        f.write(f"<br><span class='note'>{notes[cat][issue_text]}</span>")
-                    f.write("</li>")
-                f.write("</ul>")
-            else:
-                f.write("<p>0 issues found.</p>")
-            f.write("""<p class="description">
-Please address these issues to improve security, compliance, and user experience.
-</p></div>""")
-
-        f.write("""
-</main>
-<footer><p>End of report.</p></footer>
-<script>
-function toggleScoreDetails(){
-    var d = document.getElementById("score-details");
-    if(d.style.display===""||d.style.display==="none"){d.style.display="block";}
-    else{d.style.display="none";}
-}
-var coll = document.getElementsByClassName("collapsible");
-for(var i=0;i<coll.length;i++){
-    coll[i].addEventListener("click",function(){
-        this.classList.toggle("active");
-        var content=this.nextElementSibling;
-        if(content.style.maxHeight){
-            content.style.maxHeight=null;
-        } else{
-            content.style.maxHeight=content.scrollHeight+"px";
-        }
-    });
-}
-</script>
-</body>
-</html>""")
-
-    if generate_pdf and PDF_EXPORT_AVAILABLE:
-        pdf_filename = os.path.splitext(report_filename)[0] + ".pdf"
-        pdfkit.from_file(report_filename, pdf_filename)
-        print(f"PDF generated: {pdf_filename}")
-
-def analyze_html():
-    # Load
-    soup, html_content = load_html_file(HTML_FILE_PATH)
-
-    # Gather data
-    results = {}
-    text_content = soup.get_text()
-
-    results['grammar'] = check_grammar(text_content)
-    results['accessibility'] = check_accessibility(soup)
-    results['keyboard_accessibility'] = check_keyboard_accessibility(soup)
-    results['color_contrast'] = check_color_contrast(soup, html_content)
-    results['missing_aria'] = check_missing_aria(soup)
-    results['missing_alt'] = check_missing_alt(soup)
-    results['exposed_keys'] = check_exposed_keys(html_content)
-    results['https'] = check_https(soup)
-    results['broken_links'] = check_broken_links(soup)
-    results['large_images'] = check_image_sizes(soup)
-    results['outdated_html'] = check_outdated_html(soup)
-    results['unused_css_js'] = check_unused_css_js(soup)
-    results['clickable_images'] = check_clickable_images(soup)
-    results['responsive_viewport'] = check_responsive_viewport(soup)
-    results['modern_doctype'] = check_modern_doctype(html_content)
-    results['layout_tables'] = check_layout_tables(soup)
+def check_resources(soup, html_content, network_profiles):
+    """Fetch every subresource for page weight, compression, caching and a load waterfall.
+
+    Optional: only runs when network profiles are passed to run_checks; see resources.py.
+    """
+    import resources
+    return resources.analyze_resources(soup, len(html_content.encode('utf-8')), network_profiles)
+
+def check_images(soup, image_workers):
+    """Intrinsic vs. rendered size and WebP/AVIF savings for every image; see images.py.
+
+    Optional: only runs when image_workers is passed to run_checks (0 = one per CPU core).
+    """
+    import images
+    return images.analyze_images(soup, image_workers)
+
+def check_unused_css_js(soup, stylesheets):
+    """Stylesheets carrying over UNUSED_MIN_BYTES of rules nothing on the page can match.
+
+    A rule is unused when none of its selectors' tags, classes, ids and
+    attributes all occur in the page (see unused_css.py). Unused JavaScript
+    cannot be judged without running it, so only CSS is reported.
+    """
+    import unused_css
+    issues = IssueList()
+    features = get_index(soup).features
+    for source, tag, css in stylesheets:
+        checkpoint()
+        usage = unused_css.stylesheet_usage(source, css, features)
+        if usage['unused_bytes'] >= unused_css.UNUSED_MIN_BYTES:
+            issues.add(unused_css.usage_text(usage), location_of(tag))
+    return issues
 
+def check_grammar(soup):
+    """Possible misspellings in the page's visible English text (see spelling.py).
+
+    Needs a compiled dictionary; without one the check finds nothing and
+    the page's text is never collected.
+    """
+    from spelling import SpellChecker, get_dictionary
+    if get_dictionary() is None:
+        return IssueList()
+    checker = SpellChecker()
+    for text, location in get_index(soup).prose:
+        checker.feed(text, location)
+    return checker.issues()
+
+def build_report_data(soup, results, title_and_url=None):
+    """Score the check results and wrap them in the structure generate_report expects.
+
+    title_and_url overrides what would be read from soup (streaming mode has no tree).
+    """
     # Score + Deductions
     score = calculate_score(results)
     deductions = calculate_deductions(results)
 
     # Wrap for report
-    title, url = get_title_and_url(soup)
+    title, url = title_and_url or get_title_and_url(soup)
     author_name = get_report_author()
 
-    issues_data = {
-        'Exposed API Keys/JWTs': {'issues': results['exposed_keys']},
-        '508 Accessibility Issues': {'issues': results['accessibility']},
-        'Keyboard Accessibility Issues': {'issues': results['keyboard_accessibility']},
-        'Broken Links': {'issues': results['broken_links']},
-        'Clickable Image Issues': {'issues': results['clickable_images']},
-        'Color Contrast Issues': {'issues': results['color_contrast']},
-        'Missing ARIA Labels': {'issues': results['missing_aria']},
-        'Large Images (over 200KB)': {'issues': results['large_images']},
-        'HTTPS Compliance': {'issues': results['https']},
-        'Outdated HTML Tags': {'issues': results['outdated_html']},
-        'Missing Alt Text': {'issues': results['missing_alt']},
-        'Responsive Viewport': {'issues': results['responsive_viewport']},
-        'Modern Doctype': {'issues': results['modern_doctype']},
-        'Layout Tables': {'issues': results['layout_tables']},
-    }
+    issues_data = {cat: {'issues': results[key]} for cat, key in RESULT_CATEGORIES}
+    incomplete = [cat for cat, key in RESULT_CATEGORIES if key in results.get('incomplete', [])]
+    skipped = [cat for cat, key in RESULT_CATEGORIES if key in results.get('skipped', [])]
 
     report_data = {
         'title': title,
@@ -652,16 +652,372 @@ def analyze_html():
         'score': score,
         'deductions': deductions,
         'issues_data': issues_data,
-        'notes': {}
+        'notes': {},
+        'profile': results.get('timings'),
+        'resources': results.get('resources') or None,
+        'images': results.get('images') or None,
+        'incomplete': incomplete,
+        'skipped': skipped,
+        'skip_reason': results.get('skip_reason')
     }
+    return report_data
+
+def page_stylesheets(soup, network):
+    """Stylesheet sources for the CSS checks; linked ones only when network I/O is allowed."""
+    return collect_stylesheet_sources(soup, fetch=network)
+
+def stylesheet_rules(stylesheets):
+    """Parsed rules (selectorText -> declarations) of every stylesheet, combined."""
+    return parse_styles_map('\n'.join(css for _, _, css in stylesheets))
+
+# Check and artifact kinds: None for cheap local work, 'css' for stylesheet
+# parsing, 'network' for anything that makes requests
+KINDS = (None, 'css', 'network')
+
+# Shared per-page inputs built on first demand: name -> (builder, inputs, kind).
+# soup, html, network (may go online), site_links and options are given.
+ARTIFACTS = {
+    'index': (get_index, ('soup',), None),
+    'stylesheets': (page_stylesheets, ('soup', 'network'), 'css'),
+    'styles_map': (stylesheet_rules, ('stylesheets',), 'css'),
+}
+
+# result key, check, inputs (artifacts) it takes, kind; checks of any kind but
+# None are expensive and run concurrently
+CHECKS = [
+    ('grammar', check_grammar, ('soup',), None),
+    ('accessibility', check_accessibility, ('soup',), None),
+    ('keyboard_accessibility', check_keyboard_accessibility, ('soup',), None),
+    ('color_contrast', check_color_contrast, ('soup', 'styles_map'), 'css'),
+    ('missing_aria', check_missing_aria, ('soup',), None),
+    ('missing_alt', check_missing_alt, ('soup',), None),
+    ('exposed_keys', check_exposed_keys, ('html',), None),
+    ('https', check_https, ('soup',), None),
+    ('broken_links', check_broken_links, ('soup', 'site_links'), 'network'),
+    ('large_images', check_image_sizes, ('soup',), 'network'),
+    ('outdated_html', check_outdated_html, ('soup',), None),
+    ('unused_css_js', check_unused_css_js, ('soup', 'stylesheets'), 'css'),
+    ('clickable_images', check_clickable_images, ('soup',), None),
+    ('responsive_viewport', check_responsive_viewport, ('soup',), None),
+    ('modern_doctype', check_modern_doctype, ('html',), None),
+    ('layout_tables', check_layout_tables, ('soup',), None),
+    ('web_vitals', check_web_vitals, ('soup',), None),
+]
+
+# Run only when run_checks is given every extra input they take
+OPTIONAL_CHECKS = [
+    ('resources', check_resources, ('soup', 'html', 'network_profiles'), 'network'),
+    ('images', check_images, ('soup', 'image_workers'), 'network'),
+]
+
+# Run profiles: check kinds run, and whether the stylesheets artifact may
+# fetch linked stylesheets. offline judges CSS from inline <style> only.
+PROFILES = {
+    'full': ((None, 'css', 'network'), True),
+    'offline': ((None, 'css'), False),
+    'fast': ((None,), False),
+}
+
+def input_kinds(names):
+    """Kinds of the artifacts behind names, including what they are built from."""
+    kinds = set()
+    for name in names:
+        if name in ARTIFACTS:
+            _, needs, kind = ARTIFACTS[name]
+            kinds.add(kind)
+            kinds |= input_kinds(needs)
+    return kinds
+
+class Artifacts:
+    """Inputs shared by the checks on one page, each built once on first demand.
+
+    Checks run concurrently, so each artifact is built under its own lock:
+    the first check to ask builds it (timed under the builder's name) and
+    the others wait for that result instead of building it again.
+    """
+
+    def __init__(self, values, prof=None):
+        self.prof = prof or profiler.Profiler()
+        self._values = dict(values)
+        self._locks = {name: threading.Lock() for name in ARTIFACTS}
+
+    def __contains__(self, name):
+        return name in self._values or name in ARTIFACTS
+
+    def get(self, name):
+        if name not in self._values:
+            builder, needs, _ = ARTIFACTS[name]
+            with self._locks[name]:
+                if name not in self._values:
+                    args = [self.get(n) for n in needs]
+                    self._values[name] = self.prof.call(builder, *args)
+        return self._values[name]
+
+    def resolver(self, names):
+        """Callable returning the values of names, for a scheduler Job's args."""
+        return lambda: tuple(self.get(n) for n in names)
+
+def check_jobs(soup, html_content, prof, only=None, options=None, run_profile='full'):
+    """Scheduler jobs for every check (or the result keys in only) on a parsed page.
+
+    options supplies extra inputs (e.g. network_profiles) that switch on OPTIONAL_CHECKS,
+    or site_links for a batch (see check_broken_links). run_profile (see
+    PROFILES) leaves out checks of kinds it does not run. Inputs are only
+    built when a job that needs them starts.
+    """
+    kinds, network = PROFILES[run_profile]
+    values = {'soup': soup, 'html': html_content, 'site_links': None, 'network': network}
+    values.update(options or {})
+    artifacts = Artifacts(values, prof)
+    checks = CHECKS + [c for c in OPTIONAL_CHECKS if all(n in artifacts for n in c[2])]
+    checks = [c for c in checks if only is None or c[0] in only]
+    checks = [c for c in checks if {c[3]} | input_kinds(c[2]) <= set(kinds)]
+    return [Job(key, func, artifacts.resolver(needs), kind is not None)
+            for key, func, needs, kind in checks]
+
+def run_checks(soup, html_content, prof=None, budget=None, check_timeout=None, deadlines=None,
+               only=None, options=None, run_profile='full'):
+    """Run every check (or just the result keys in only) on a parsed page.
+
+    budget caps the whole run and check_timeout/deadlines (seconds, keyed by
+    result key or check name) cap single checks; checks that run out of time
+    get an empty result and are listed under results['incomplete']. Checks
+    run_profile leaves out get an empty result and are listed under
+    results['skipped'].
+    """
+    prof = prof or profiler.Profiler()
+    jobs = check_jobs(soup, html_content, prof, only, options, run_profile)
+    done, incomplete = Scheduler(budget, check_timeout, deadlines, prof).run(jobs)
+    results = {job.key: done.get(job.key, []) for job in jobs}
+    results['incomplete'] = incomplete
+    return fill_skipped(results, only, [f"not run in the {run_profile} profile"])
+
+def fill_skipped(results, only=None, reasons=()):
+    """Give every check without a result an empty one and list it under results['skipped'].
+
+    Checks only leaves out are "not among the selected checks"; reasons
+    explain the rest (e.g. the run profile). skip_reason joins whichever apply.
+    """
+    missing = [key for key, _, _, _ in CHECKS if key not in results]
+    if not missing:
+        return results
+    unselected = [key for key in missing if only is not None and key not in only]
+    why = list(reasons) if len(unselected) < len(missing) else []
+    if unselected:
+        why.append("not among the selected checks")
+    for key in missing:
+        results[key] = []
+    results['skipped'] = missing
+    reason = ' or '.join(why)
+    results['skip_reason'] = reason[:1].upper() + reason[1:]
+    return results
+
+def analyze_html(file_path=None, profile=False, pstats_dir=None, budget=None,
+                 check_timeout=None, deadlines=None, stream=False, tree_checks=False,
+                 network_profiles=None, images=False, image_workers=None, run_profile='full',
+                 checks=None, history=None, metrics=None):
+    """Run every check on file_path (default HTML_FILE_PATH) and write the report.
+
+    profile=True adds peak memory tracking and a timing table to the results
+    and report; pstats_dir additionally dumps cProfile stats per page.
+    budget/check_timeout/deadlines are passed to run_checks.
+    stream=True runs the tag-local checks without building a tree (see
+    streaming.py); tree-only checks are skipped unless tree_checks is set.
+    network_profiles (names or NAME=KBPS/RTT_MS) switch on the resource
+    waterfall stage, which fetches every subresource (see resources.py).
+    images=True switches on image decode analysis on image_workers processes
+    (default one per CPU core; see images.py).
+    run_profile (full, offline or fast; see PROFILES) and checks (result
+    keys) narrow down which checks run; the rest are reported as not run.
+    history is the path of a history database (see history.py) to record
+    the audit in; metrics the path of a Prometheus textfile to write the
+    audit's metrics to (see metrics.py).
+    """
+    options = {}
+    if network_profiles:
+        options['network_profiles'] = network_profiles
+    if images:
+        options['image_workers'] = image_workers or 0
+    collector = None
+    if metrics:
+        from metrics import Metrics
+        collector = Metrics().install()
+    prof = profiler.Profiler(detailed=profile, cprofile=bool(pstats_dir))
+    prof.start()
+    page = None
+    try:
+        if stream:
+            import streaming
+            results, checker = streaming.run_streaming(file_path or HTML_FILE_PATH, prof, budget,
+                                                       check_timeout, deadlines, tree_checks,
+                                                       options, run_profile, checks)
+            soup, page = None, checker.title_and_url()
+            filename = report_filename_for_title(checker.title)
+        else:
+            # Load
+            with prof.section('parse'):
+                soup, html_content = load_html_file(file_path or HTML_FILE_PATH)
+
+            # Gather data
+            results = run_checks(soup, html_content, prof, budget, check_timeout, deadlines,
+                                 only=checks, options=options, run_profile=run_profile)
+            filename = generate_report_filename(soup)
+
+        if pstats_dir:
+            prof.pstats_path = os.path.join(pstats_dir, os.path.splitext(filename)[0] + '.pstats')
+    finally:
+        prof.stop()
+        if collector is not None:
+            collector.uninstall()
+    if profile:
+        results['timings'] = prof.summary()
+
+    report_data = build_report_data(soup, results, page)
+    score = report_data['score']
 
     # Build final report
-    filename = generate_report_filename(soup)
     generate_report(filename, report_data, generate_pdf=False)
+    if history:
+        from history import History
+        with History(history) as store:
+            store.record(report_data, prof.summary())
+    if collector is not None:
+        from metrics import write_textfile
+        collector.observe_audit(report_data)
+        write_textfile(metrics, collector)
 
     print(f"Analysis complete. Report: {filename}, Score: {score}/100")
+    if report_data['incomplete']:
+        print(f"Incomplete (out of time): {', '.join(report_data['incomplete'])}")
+    if report_data['skipped']:
+        print(f"Not run: {', '.join(report_data['skipped'])}")
+    if report_data['resources']:
+        res = report_data['resources']
+        print(f"Page weight: {res['transfer_bytes']/1024:.1f} KB transferred "
+              f"({res['decoded_bytes']/1024:.1f} KB uncompressed) in {res['requests'] + 1} request(s)")
+        for name, w in res['waterfall'].items():
+            print(f"  {name}: first render ~{w['first_render']:.2f}s, load ~{w['load']:.2f}s")
+    if report_data['images']:
+        img = report_data['images']
+        print(f"Images: {len(img['images'])} analyzed, {img['bytes']/1024:.1f} KB, "
+              f"~{img['savings']/1024:.1f} KB could be saved")
+    if profile:
+        print(prof.format_table())
+    if pstats_dir:
+        print(f"cProfile stats: {prof.pstats_path}")
     if not PDF_EXPORT_AVAILABLE:
         print("PDF generation requires pdfkit + wkhtmltopdf installed.")
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze captured website HTML and generate a report.")
+    parser.add_argument('file', nargs='?', default=HTML_FILE_PATH,
+                        help=f"Captured page source to analyze (default: {HTML_FILE_PATH}).")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record per-check wall/CPU time, network stats and peak memory.")
+    parser.add_argument('--pstats', metavar='DIR',
+                        help="Dump cProfile stats for each page into DIR.")
+    parser.add_argument('--budget', type=float, metavar='SECONDS',
+                        help="Overall time budget; checks still running are marked incomplete.")
+    parser.add_argument('--check-timeout', type=float, metavar='SECONDS',
+                        help="Default deadline for each individual check.")
+    parser.add_argument('--deadline', action='append', default=[], metavar='CHECK=SECONDS',
+                        type=deadline_arg,
+                        help="Deadline for one check, e.g. --deadline broken_links=20.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Check tags as the file streams by instead of building a tree.")
+    parser.add_argument('--tree-checks', action='store_true',
+                        help="With --stream, also build the tree for checks that need it.")
+    parser.add_argument('--resources', action='store_true',
+                        help="Fetch every subresource for page weight, caching and a load waterfall "
+                             "(with --stream, needs --tree-checks).")
+    parser.add_argument('--network-profile', action='append', default=[], metavar='PROFILE',
+                        help="Waterfall profile for --resources: slow-3g, 4g, cable or "
+                             "NAME=KBPS/RTT_MS (repeatable; default 4g).")
+    parser.add_argument('--images', action='store_true',
+                        help="Fetch every image to compare its intrinsic and rendered size and "
+                             "estimate WebP/AVIF savings (with --stream, needs --tree-checks).")
+    parser.add_argument('--image-workers', type=int, metavar='N',
+                        help="Processes for --images decoding/encoding (default: one per CPU core).")
+    parser.add_argument('--run-profile', choices=list(PROFILES), default='full',
+                        help="Checks to run: full (default), offline (no network I/O; CSS checks "
+                             "use inline styles only) or fast (no network, no CSS parsing).")
+    parser.add_argument('--checks', metavar='KEYS',
+                        help="Comma-separated result keys to run, e.g. exposed_keys,https.")
+    parser.add_argument('--history', metavar='DB',
+                        help="Record the audit in this SQLite history database (see history.py).")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Write the audit's metrics to FILE in Prometheus text format, for "
+                             "node_exporter's textfile collector.")
+    parser.add_argument('--watch', action='store_true',
+                        help="Stay running and re-analyze the file whenever it changes, re-running "
+                             "only the checks the change affects (ignores --stream).")
+    args = parser.parse_args(argv)
+    if args.watch:
+        unsupported = [flag for flag, value in (('--profile', args.profile), ('--pstats', args.pstats),
+                                                ('--history', args.history), ('--metrics', args.metrics))
+                       if value]
+        if unsupported:
+            parser.error(f"--watch does not support {', '.join(unsupported)}")
+    if args.checks is not None:
+        args.checks = [key.strip() for key in args.checks.split(',') if key.strip()]
+        known = [key for key, _, _, _ in CHECKS + OPTIONAL_CHECKS]
+        unknown = [key for key in args.checks if key not in known]
+        if unknown:
+            parser.error(f"unknown check(s) {', '.join(unknown)}; use any of {', '.join(known)}")
+    if args.network_profile:
+        import resources
+        for spec in args.network_profile:
+            try:
+                resources.parse_profile(spec)
+            except ValueError as e:
+                parser.error(str(e))
+    return args
+
+def resource_profiles(args):
+    """Network profiles for the resource stage, or None when it was not requested."""
+    if not (args.resources or args.network_profile):
+        return None
+    if args.network_profile:
+        return args.network_profile
+    import resources
+    return list(resources.DEFAULT_PROFILES)
+
+def deadline_arg(text):
+    """argparse type for --deadline: CHECK=SECONDS with a positive number of seconds."""
+    key, sep, secs = text.partition('=')
+    try:
+        valid = bool(sep and key.strip()) and float(secs) > 0
+    except ValueError:
+        valid = False
+    if not valid:
+        raise argparse.ArgumentTypeError(f"expected CHECK=SECONDS, e.g. broken_links=20, got {text!r}")
+    return text
+
+def parse_deadlines(items):
+    deadlines = {}
+    for item in items:
+        key, _, secs = item.partition('=')
+        deadlines[key.strip()] = float(secs)
+    return deadlines
 
 if __name__ == "__main__":
-    analyze_html()
+    args = parse_args()
+    if args.watch:
+        import watch
+        options = {}
+        if resource_profiles(args):
+            options['network_profiles'] = resource_profiles(args)
+        if args.images:
+            options['image_workers'] = args.image_workers or 0
+        watch.watch(args.file, budget=args.budget, check_timeout=args.check_timeout,
+                    deadlines=parse_deadlines(args.deadline), options=options,
+                    run_profile=args.run_profile, only=args.checks)
+        raise SystemExit(0)
+    analyze_html(args.file, profile=args.profile, pstats_dir=args.pstats, budget=args.budget,
+                 check_timeout=args.check_timeout, deadlines=parse_deadlines(args.deadline),
+                 stream=args.stream, tree_checks=args.tree_checks,
+                 network_profiles=resource_profiles(args), images=args.images,
+                 image_workers=args.image_workers, run_profile=args.run_profile,
+                 checks=args.checks, history=args.history,
+                 metrics=args.metrics)